@@ -2,6 +2,11 @@
 ASGI config for satellite_tracker project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Live position updates are streamed from /api/stream/positions/ as server-sent
+events; every other request is handled by Django. Fixes are ingested by a
+separate ``manage.py run_ingest`` worker and relayed into each web process by
+tracker.relay, started by the first request each worker process serves, so
+the app can be served by any number of worker processes.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
@@ -13,4 +18,19 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'satellite_tracker.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from tracker.relay import relay  # noqa: E402
+from tracker.streaming import PositionStreamApp  # noqa: E402
+
+POSITION_STREAM_PATH = '/api/stream/positions/'
+
+position_stream = PositionStreamApp()
+
+
+async def application(scope, receive, send):
+    relay.start()
+    if scope['type'] == 'http' and scope['path'] == POSITION_STREAM_PATH:
+        await position_stream(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -1,9 +1,15 @@
 import os
+import tempfile
 from pathlib import Path
 from datetime import timedelta
 
+from dotenv import load_dotenv
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Deployment settings may come from backend/.env (see .env.example)
+load_dotenv(BASE_DIR / '.env')
+
 SECRET_KEY = 'django-insecure-your-secret-key-change-in-production'
 
 DEBUG = True
@@ -24,6 +30,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'tracker.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -54,11 +61,54 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'satellite_tracker.wsgi.application'
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DATABASE_ENGINE=postgresql selects PostgreSQL (configured by the POSTGRES_*
+# variables); SQLite is the default. Connections are kept open for
+# DATABASE_CONN_MAX_AGE seconds rather than reopened per request.
+DATABASE_ENGINE = os.environ.get('DATABASE_ENGINE', 'sqlite')
+
+if DATABASE_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'satellite_tracker'),
+            'USER': os.environ.get('POSTGRES_USER', 'postgres'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+        }
     }
+    # Read-only views are served from a streaming replica when one is set
+    if os.environ.get('POSTGRES_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['POSTGRES_REPLICA_HOST'],
+            'PORT': os.environ.get('POSTGRES_REPLICA_PORT', DATABASES['default']['PORT']),
+            # The test runner reads through the test default database instead
+            # of creating an unmigrated test replica
+            'TEST': {'MIRROR': 'default'},
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Seconds to wait for the write lock instead of failing at once
+                'timeout': 20,
+            },
+        }
+    }
+
+DATABASE_ROUTERS = ['tracker.db.ReplicaRouter']
+
+# Applied to every SQLite connection, on top of journal_mode=WAL
+TRACKER_SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
 }
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -83,6 +133,29 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# REDIS_URL (e.g. redis://localhost:6379/0) selects a cache shared by every
+# worker process, which is needed to serve the API from several hosts. Without
+# it each process caches in memory, and cached selections are checked against
+# per-user versions kept in shared memory, which only processes on the same
+# host see (see tracker.cache).
+REDIS_URL = os.environ.get('REDIS_URL', '')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'satellite-tracker',
+        }
+    }
+TRACKER_SHARED_CACHE = bool(REDIS_URL)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
@@ -110,4 +183,163 @@ SIMPLE_JWT = {
 }
 
 CORS_ALLOW_ALL_ORIGINS = True
-CORS_ALLOW_CREDENTIALS = True
\ No newline at end of file
+CORS_ALLOW_CREDENTIALS = True
+CORS_EXPOSE_HEADERS = ['ETag', 'X-Selection-Limit']
+
+# Satellite tracker
+
+# TLE/OMM element sets (a file or a directory of files) used to propagate
+# positions on-box. Satellites without an element set fall back to their api_url.
+TRACKER_ELEMENTS_PATH = os.environ.get('TRACKER_ELEMENTS_PATH', str(BASE_DIR / 'elements'))
+
+# Also fetch propagated satellites over HTTP and report fixes that disagree
+TRACKER_HTTP_CROSS_CHECK = os.environ.get('TRACKER_HTTP_CROSS_CHECK', '') == '1'
+TRACKER_CROSS_CHECK_TOLERANCE_KM = 50.0
+
+# How upstream position APIs are fetched: 'async' uses a pooled aiohttp client
+# on a background event loop, 'executor' runs one blocking request per satellite
+# on TRACKER_EXECUTOR.
+TRACKER_FETCH_BACKEND = os.environ.get('TRACKER_FETCH_BACKEND', 'async')
+TRACKER_FETCH_TIMEOUT = 10  # seconds per request
+TRACKER_FETCH_DEADLINE = 15  # seconds for a whole fetch cycle
+TRACKER_FETCH_MAX_PER_HOST = 8  # concurrent connections per API host
+TRACKER_FETCH_KEEPALIVE = 75  # seconds; longer than the cycle so connections are reused
+TRACKER_FETCH_MAX_PENDING = 256  # requests in flight or awaiting the writer
+
+# Compute backend for blocking work: 'inprocess', 'thread' or 'ray'. Executors
+# are started on first use, so Ray is only initialized when actually needed.
+TRACKER_EXECUTOR = os.environ.get('TRACKER_EXECUTOR', 'thread')
+TRACKER_EXECUTOR_WORKERS = 16
+TRACKER_RAY_ADDRESS = os.environ.get('TRACKER_RAY_ADDRESS', '')
+
+# Number of recent fixes returned per satellite by /api/positions/, and how
+# long cached selections live (they are also invalidated on change)
+TRACKER_LATEST_POSITIONS = 10
+TRACKER_CACHE_TIMEOUT = 300
+
+# Recent fixes kept in memory per satellite. With TRACKER_RING_BUFFER_SHARED the
+# buffers live in shared memory so every process on the host reads the same data.
+TRACKER_RING_BUFFER_CAPACITY = 64
+TRACKER_RING_BUFFER_SHARED = os.environ.get('TRACKER_RING_BUFFER_SHARED', '') == '1'
+
+# Closed days of position history are compacted into columnar files here
+# before their partitions are dropped, and served by /api/archive/<id>/. A day
+# is archived TRACKER_ARCHIVE_GRACE_DAYS after it closes, leaving time for fixes
+# committed late, and archived again if its partition gains fixes after that.
+TRACKER_ARCHIVE_ENABLED = True
+TRACKER_ARCHIVE_GRACE_DAYS = 1
+TRACKER_ARCHIVE_DIR = os.environ.get('TRACKER_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+TRACKER_ARCHIVE_MAX_RANGE_DAYS = 31
+
+# Ground tracks served by /api/tracks/ are precomputed at these resolutions
+# (seconds). A request gets the finest one that keeps the track within
+# TRACKER_TRACK_MAX_POINTS points.
+TRACKER_TRACK_RESOLUTIONS = [60, 600, 3600]
+TRACKER_TRACK_MAX_POINTS = 1500
+TRACKER_TRACK_RETENTION_DAYS = 30
+
+
+# Satellites are polled every Satellite.poll_interval seconds. Satellites sharing
+# an interval are split into TRACKER_POLL_SLOTS jobs spread (and jittered)
+# across it. A job whose cycle takes more than TRACKER_POLL_BACKPRESSURE of its
+# interval has the interval doubled, up to TRACKER_POLL_MAX_BACKOFF times.
+TRACKER_POLL_SLOTS = 6
+TRACKER_POLL_BACKPRESSURE = 0.8
+TRACKER_POLL_MAX_BACKOFF = 8
+TRACKER_POLL_SYNC_INTERVAL = 60
+
+
+# Upstream hosts back off exponentially after each failed request (or for as
+# long as their Retry-After asks), and are skipped entirely after
+# TRACKER_UPSTREAM_FAILURE_THRESHOLD consecutive failures until a probe request
+# succeeds. Responses are cached per api_url for one poll slot (the satellites'
+# poll_interval / TRACKER_POLL_SLOTS), so satellites sharing an upstream in
+# neighbouring slots are fetched once; TRACKER_UPSTREAM_CACHE_TTL overrides it
+# with a fixed number of seconds, which should stay below a slot's gap between
+# runs (poll_interval less a slot).
+TRACKER_UPSTREAM_BACKOFF_BASE = 5
+TRACKER_UPSTREAM_BACKOFF_MAX = 600
+TRACKER_UPSTREAM_FAILURE_THRESHOLD = 3
+TRACKER_UPSTREAM_CACHE_TTL = None
+
+
+# Extra upstream response formats, as {name: schema} in the shape of
+# tracker.parsers.FORMATS. Satellites select one with Satellite.response_format.
+TRACKER_RESPONSE_FORMATS = {}
+
+
+# Satellites a user can track at once
+TRACKER_MAX_SELECTIONS = 500
+
+
+# Ingest writes fixes as they arrive, in batches of at most
+# TRACKER_INGEST_BATCH_SIZE, flushing early once a fix has waited
+# TRACKER_INGEST_FLUSH_INTERVAL seconds or the fetch is waiting on slower
+# upstreams
+TRACKER_INGEST_BATCH_SIZE = 200
+TRACKER_INGEST_FLUSH_INTERVAL = 1.0
+
+
+# Ingest runs in `manage.py run_ingest`. One worker per deployment holds the
+# ingest lock: a PostgreSQL advisory lock with this key, or on SQLite a lock on
+# this file.
+TRACKER_INGEST_LOCK_KEY = 0x5A7E11
+TRACKER_INGEST_LOCK_PATH = os.environ.get(
+    'TRACKER_INGEST_LOCK_PATH', os.path.join(tempfile.gettempdir(), 'satellite-tracker-ingest.lock')
+)
+
+# Web processes poll for fixes stored by the ingest worker every
+# TRACKER_RELAY_INTERVAL seconds, looking TRACKER_RELAY_LOOKBACK seconds back
+# in fix time and re-reading TRACKER_RELAY_OVERLAP seconds of inserts
+TRACKER_RELAY_INTERVAL = 1.0
+TRACKER_RELAY_LOOKBACK = 600
+TRACKER_RELAY_OVERLAP = 5
+
+# Spatial index of current positions behind /api/overhead/: grid cell size in
+# degrees, and the age in seconds past which a satellite's fix is no longer
+# considered current
+TRACKER_SPATIAL_CELL_DEGREES = 10
+TRACKER_SPATIAL_MAX_AGE = 600
+
+# Pass prediction (/api/passes/): passes are searched at a coarse and then a
+# fine step (seconds), computed for the centre of the observer's grid cell
+# (degrees), cached for TRACKER_PASS_CACHE_TIMEOUT seconds and requested at
+# most TRACKER_PASS_MAX_DAYS ahead
+TRACKER_PASS_COARSE_STEP = 300
+TRACKER_PASS_FINE_STEP = 30
+TRACKER_PASS_CELL_DEGREES = 0.1
+TRACKER_PASS_CACHE_TIMEOUT = 6 * 3600
+TRACKER_PASS_MAX_DAYS = 7
+
+# Positions at arbitrary times (/api/positions/at/): fixes further apart than
+# TRACKER_INTERPOLATION_MAX_GAP seconds are not interpolated between, and
+# positions are extrapolated at most TRACKER_INTERPOLATION_MAX_EXTRAPOLATION
+# seconds past a satellite's newest fix
+TRACKER_INTERPOLATION_MAX_GAP = 600
+TRACKER_INTERPOLATION_MAX_EXTRAPOLATION = 180
+
+# Metrics in the Prometheus text format: web processes serve them at /metrics,
+# and the ingest worker on TRACKER_INGEST_METRICS_ADDRESS and
+# TRACKER_INGEST_METRICS_PORT (0 disables it). Both require
+# `Authorization: Bearer <TRACKER_METRICS_TOKEN>`, and serve nothing until the
+# token is set
+TRACKER_METRICS_TOKEN = os.environ.get('TRACKER_METRICS_TOKEN', '')
+TRACKER_INGEST_METRICS_ADDRESS = os.environ.get('TRACKER_INGEST_METRICS_ADDRESS', '127.0.0.1')
+TRACKER_INGEST_METRICS_PORT = int(os.environ.get('TRACKER_INGEST_METRICS_PORT', '9108'))
+
+# Historical backfill (`manage.py backfill_positions`): fixes are written in
+# transactions of TRACKER_BACKFILL_CHUNK_SIZE fixes, and a job's progress is
+# checkpointed in TRACKER_BACKFILL_CHECKPOINT_DIR so it resumes when rerun
+TRACKER_BACKFILL_CHUNK_SIZE = 5000
+TRACKER_BACKFILL_CHECKPOINT_DIR = os.environ.get('TRACKER_BACKFILL_CHECKPOINT_DIR', str(BASE_DIR / 'backfill'))
+
+# Satellite catalog (/api/satellites/): pages of TRACKER_CATALOG_PAGE_SIZE
+# satellites (at most TRACKER_CATALOG_MAX_PAGE_SIZE on request), cached for
+# TRACKER_CATALOG_CACHE_TIMEOUT seconds. Satellites created by
+# `manage.py sync_catalog` are polled from TRACKER_CATALOG_API_URL (formatted
+# with their NORAD id) in TRACKER_CATALOG_RESPONSE_FORMAT.
+TRACKER_CATALOG_PAGE_SIZE = 100
+TRACKER_CATALOG_MAX_PAGE_SIZE = 1000
+TRACKER_CATALOG_CACHE_TIMEOUT = 60
+TRACKER_CATALOG_API_URL = 'https://api.satellitemap.space/v1/{norad_id}/position'
+TRACKER_CATALOG_RESPONSE_FORMAT = 'satellitemap'
@@ -2,6 +2,10 @@
 WSGI config for satellite_tracker project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Fixes are ingested by a separate ``manage.py run_ingest`` worker and relayed
+into this process's ring buffers by tracker.relay, started by the first
+request each worker process serves (so it also runs in workers forked from a
+preloaded application).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.2/howto/deployment/wsgi/
@@ -13,4 +17,11 @@ from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'satellite_tracker.settings')
 
-application = get_wsgi_application()
+django_application = get_wsgi_application()
+
+from tracker.relay import relay  # noqa: E402
+
+
+def application(environ, start_response):
+    relay.start()
+    return django_application(environ, start_response)
@@ -4,17 +4,28 @@ from .models import Satellite, SatellitePosition, UserSatelliteSelection
 
 @admin.register(Satellite)
 class SatelliteAdmin(admin.ModelAdmin):
-    list_display = ['name', 'satellite_id', 'is_active', 'created_at']
-    list_filter = ['is_active']
+    list_display = ['name', 'satellite_id', 'response_format', 'poll_interval', 'is_active', 'created_at']
+    list_filter = ['is_active', 'response_format']
     search_fields = ['name', 'satellite_id']
+    readonly_fields = ['elements_epoch']
 
 
 @admin.register(SatellitePosition)
 class SatellitePositionAdmin(admin.ModelAdmin):
-    list_display = ['satellite', 'user', 'timestamp', 'latitude', 'longitude', 'created_at']
-    list_filter = ['satellite', 'user', 'timestamp']
-    search_fields = ['satellite__name', 'user__username']
+    list_display = ['satellite', 'timestamp', 'latitude', 'longitude', 'created_at']
+    list_filter = ['satellite', 'timestamp']
+    search_fields = ['satellite__name']
     date_hierarchy = 'timestamp'
+    
+    # Positions are read through a view over the day partitions
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(UserSatelliteSelection)
@@ -1,5 +1,4 @@
 from django.apps import AppConfig
-import sys
 
 
 class TrackerConfig(AppConfig):
@@ -7,9 +6,22 @@ class TrackerConfig(AppConfig):
     name = 'tracker'
     
     def ready(self):
-        # Only start scheduler in the main process, not in migration or other commands
-        if 'runserver' in sys.argv and not any(
-            x in sys.argv for x in ['makemigrations', 'migrate', 'collectstatic']
-        ):
-            from .scheduler import start_scheduler
-            start_scheduler()
\ No newline at end of file
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from .db import configure_sqlite
+        from .metrics import install_query_counter
+        connection_created.connect(configure_sqlite)
+        connection_created.connect(install_query_counter)
+        
+        from django.db.models.signals import post_delete, post_save
+        from django.contrib.auth import get_user_model
+        from .cache import invalidate_catalog, invalidate_user
+        from .models import Satellite
+        post_save.connect(invalidate_catalog, sender=Satellite)
+        post_delete.connect(invalidate_catalog, sender=Satellite)
+        post_save.connect(invalidate_user, sender=get_user_model())
+        post_delete.connect(invalidate_user, sender=get_user_model())
+        
+        from .parsers import register_format
+        for name, schema in settings.TRACKER_RESPONSE_FORMATS.items():
+            register_format(name, schema)
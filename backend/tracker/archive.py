@@ -0,0 +1,238 @@
+"""
+Columnar archive of closed days of position history.
+
+Each archived UTC day is a directory of uncompressed .npy column files, so
+readers can memory-map them and slice out one satellite without loading the
+rest of the day. Columns are narrowed rather than compressed:
+
+* index.npy     satellite_id, offset, count and base timestamp (ms) per satellite
+* dt.npy        int32 milliseconds since the satellite's previous fix (delta encoded)
+* latitude.npy  int32 microdegrees
+* longitude.npy int32 microdegrees
+* altitude.npy  float32 km (NaN when unknown)
+* velocity.npy  float32 km/h (NaN when unknown)
+"""
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+import numpy as np
+from django.conf import settings
+
+from . import partitions
+
+
+INDEX_DTYPE = np.dtype([
+    ('satellite_id', '<i8'),
+    ('offset', '<i8'),
+    ('count', '<i8'),
+    ('base', '<i8'),
+])
+MICRODEGREES = 1e6
+COLUMNS = ('dt', 'latitude', 'longitude', 'altitude', 'velocity')
+
+
+def day_path(day):
+    return os.path.join(settings.TRACKER_ARCHIVE_DIR, f"{day:%Y}", f"{day:%m}", f"{day:%d}")
+
+
+def is_archived(day):
+    return os.path.exists(os.path.join(day_path(day), 'index.npy'))
+
+
+def read_partition(day, chunk_size=10000):
+    """
+    Read a day's partition, ordered by satellite and time, into the archive's
+    column types. Rows are streamed and narrowed a chunk at a time, so the day
+    is never held as Python objects.
+    """
+    model = partitions.partition_model(day)
+    rows = model.objects.order_by('satellite_id', 'timestamp').values_list(
+        'satellite_id', 'timestamp', 'latitude', 'longitude', 'altitude', 'velocity'
+    ).iterator(chunk_size=chunk_size)
+    chunks = []
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+        satellite_ids, timestamps, latitudes, longitudes, altitudes, velocities = zip(*chunk)
+        chunks.append((
+            np.array(satellite_ids, dtype=np.int64),
+            np.array([int(timestamp.timestamp() * 1000) for timestamp in timestamps], dtype=np.int64),
+            np.round(np.array(latitudes, dtype=np.float64) * MICRODEGREES).astype(np.int32),
+            np.round(np.array(longitudes, dtype=np.float64) * MICRODEGREES).astype(np.int32),
+            # None becomes NaN
+            np.array(altitudes, dtype=np.float32),
+            np.array(velocities, dtype=np.float32),
+        ))
+    if not chunks:
+        dtypes = (np.int64, np.int64, np.int32, np.int32, np.float32, np.float32)
+        return tuple(np.array([], dtype=dtype) for dtype in dtypes)
+    return tuple(np.concatenate(column) for column in zip(*chunks))
+
+
+def archive_day(day, chunk_size=10000):
+    """
+    Compact a day's partition into the archive, returning the number of fixes.
+    The day directory is written under a temporary name and renamed into place.
+    """
+    satellite_ids, timestamps, latitudes, longitudes, altitudes, velocities = read_partition(day, chunk_size)
+    starts = np.flatnonzero(np.r_[True, np.diff(satellite_ids) != 0]) if len(satellite_ids) else np.array([], dtype=np.int64)
+    counts = np.diff(np.r_[starts, len(satellite_ids)])
+
+    index = np.zeros(len(starts), dtype=INDEX_DTYPE)
+    index['satellite_id'] = satellite_ids[starts]
+    index['offset'] = starts
+    index['count'] = counts
+    index['base'] = timestamps[starts]
+
+    dt = np.diff(timestamps, prepend=timestamps[:1])
+    dt[starts] = 0
+    columns = {
+        'dt': dt.astype(np.int32),
+        'latitude': latitudes,
+        'longitude': longitudes,
+        'altitude': altitudes,
+        'velocity': velocities,
+    }
+
+    target = day_path(day)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{day:%d}-", dir=os.path.dirname(target))
+    try:
+        for name, values in columns.items():
+            np.save(os.path.join(staging, f"{name}.npy"), values)
+        # The index is written last; its presence marks a complete day
+        np.save(os.path.join(staging, 'index.npy'), index)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return len(timestamps)
+
+
+def archived_count(day):
+    """
+    Number of fixes in a day's archive
+    """
+    return int(np.load(os.path.join(day_path(day), 'index.npy'))['count'].sum())
+
+
+def archive_cutoff():
+    """
+    First day not yet archived: days close at midnight UTC, and are left
+    open for TRACKER_ARCHIVE_GRACE_DAYS more so fixes committed late land
+    before the day is archived
+    """
+    today = datetime.now(dt_timezone.utc).date()
+    return today - timedelta(days=settings.TRACKER_ARCHIVE_GRACE_DAYS)
+
+
+def archive_closed_days():
+    """
+    Archive every partition of a closed day that is not archived yet, or
+    that gained fixes since it was (partitions only ever gain rows)
+    """
+    cutoff = archive_cutoff()
+    archived = []
+    for day in partitions.list_partitions(refresh=True):
+        if day >= cutoff:
+            continue
+        if is_archived(day) and archived_count(day) == partitions.partition_model(day).objects.count():
+            continue
+        archive_day(day)
+        archived.append(day)
+    return archived
+
+
+def reopen_day(day, chunk_size=10000):
+    """
+    Make a closed day's partition the only copy of its fixes again, so fixes
+    added to it late (by a backfill) are archived along with the others: an
+    archived day is loaded back into its partition, which is recreated if it
+    was dropped, and its archive removed. The next cleanup archives it anew.
+    Returns the number of fixes restored.
+    """
+    path = day_path(day)
+    if not is_archived(day):
+        return 0
+    from .models import SatellitePosition
+
+    index = np.load(os.path.join(path, 'index.npy'))
+    columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r') for name in COLUMNS}
+    satellite_ids = np.repeat(index['satellite_id'], index['count'])
+    # dt restarts at 0 on each satellite's first fix, on top of its base
+    elapsed = np.cumsum(columns['dt'], dtype=np.int64)
+    starts = np.repeat(index['offset'], index['count'])
+    timestamps = np.repeat(index['base'], index['count']) + elapsed - elapsed[starts]
+
+    partitions.ensure_partition(day)
+    for lo in range(0, len(satellite_ids), chunk_size):
+        rows = slice(lo, lo + chunk_size)
+        partitions.insert_positions([
+            SatellitePosition(
+                satellite_id=satellite_id,
+                timestamp=datetime.fromtimestamp(timestamp / 1000, tz=dt_timezone.utc),
+                latitude=latitude / MICRODEGREES,
+                longitude=longitude / MICRODEGREES,
+                altitude=None if altitude != altitude else altitude,
+                velocity=None if velocity != velocity else velocity,
+            )
+            for satellite_id, timestamp, latitude, longitude, altitude, velocity in zip(
+                satellite_ids[rows].tolist(), timestamps[rows].tolist(),
+                columns['latitude'][rows].tolist(), columns['longitude'][rows].tolist(),
+                columns['altitude'][rows].tolist(), columns['velocity'][rows].tolist(),
+            )
+        ])
+    shutil.rmtree(path)
+    return len(satellite_ids)
+
+
+def read_range(satellite_id, start, end):
+    """
+    Return a satellite's archived fixes between start and end (inclusive) as
+    columns: timestamps in epoch milliseconds, and latitude, longitude,
+    altitude and velocity arrays. Column files are memory-mapped, so only the
+    satellite's slice of each day is read.
+    """
+    start_ms = int(start.timestamp() * 1000)
+    end_ms = int(end.timestamp() * 1000)
+    chunks = {name: [] for name in ('timestamp',) + COLUMNS[1:]}
+
+    day = start.astimezone(dt_timezone.utc).date()
+    last_day = end.astimezone(dt_timezone.utc).date()
+    while day <= last_day:
+        path = day_path(day)
+        day += timedelta(days=1)
+        if not os.path.exists(os.path.join(path, 'index.npy')):
+            continue
+
+        index = np.load(os.path.join(path, 'index.npy'))
+        i = np.searchsorted(index['satellite_id'], satellite_id)
+        if i == len(index) or index['satellite_id'][i] != satellite_id:
+            continue
+        entry = index[i]
+        rows = slice(int(entry['offset']), int(entry['offset'] + entry['count']))
+
+        def column(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode='r')[rows]
+
+        timestamps = entry['base'] + np.cumsum(column('dt'), dtype=np.int64)
+        lo = np.searchsorted(timestamps, start_ms, side='left')
+        hi = np.searchsorted(timestamps, end_ms, side='right')
+        if lo >= hi:
+            continue
+        chunks['timestamp'].append(timestamps[lo:hi])
+        chunks['latitude'].append(column('latitude')[lo:hi] / MICRODEGREES)
+        chunks['longitude'].append(column('longitude')[lo:hi] / MICRODEGREES)
+        chunks['altitude'].append(np.asarray(column('altitude')[lo:hi], dtype=np.float64))
+        chunks['velocity'].append(np.asarray(column('velocity')[lo:hi], dtype=np.float64))
+
+    return {
+        name: np.concatenate(values) if values else np.array([], dtype=np.float64)
+        for name, values in chunks.items()
+    }
@@ -0,0 +1,195 @@
+import asyncio
+import atexit
+import itertools
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+import aiohttp
+from django.conf import settings
+
+from .http_fetcher import parse_retry_after
+
+
+class AsyncFetchEngine:
+    """
+    Fetches upstream position APIs on a private asyncio event loop.
+    One aiohttp session is kept for the lifetime of the engine, so keep-alive
+    connections to each API host are reused across ingest cycles, and the
+    connector caps the number of concurrent connections per host.
+    At most max_pending requests are in flight or delivered but not yet
+    consumed, so a consumer falling behind holds back new requests instead
+    of letting responses pile up.
+    """
+
+    def __init__(self, request_timeout=10, max_per_host=8, keepalive_timeout=75, max_pending=256):
+        self.request_timeout = request_timeout
+        self.max_per_host = max_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.max_pending = max_pending
+        self._loop = asyncio.new_event_loop()
+        self._session = None
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name='tracker-async-fetch', daemon=True
+        )
+        self._thread.start()
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.max_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+            )
+        return self._session
+
+    async def _fetch_one(self, session, api_url):
+        start = time.perf_counter()
+        result = await self._request(session, api_url)
+        result['elapsed'] = time.perf_counter() - start
+        return result
+
+    async def _request(self, session, api_url):
+        try:
+            async with session.get(api_url) as response:
+                if response.status >= 400:
+                    return {
+                        'api_url': api_url,
+                        'success': False,
+                        'error': f"HTTP {response.status} {response.reason}",
+                        'status': response.status,
+                        'retry_after': parse_retry_after(response.headers.get('Retry-After')),
+                    }
+                try:
+                    data = await response.json(content_type=None)
+                except ValueError as e:
+                    return {
+                        'api_url': api_url,
+                        'success': False,
+                        'error': f"Malformed JSON: {e}",
+                        'status': response.status,
+                    }
+            return {'api_url': api_url, 'success': True, 'data': data}
+        except asyncio.TimeoutError:
+            return {
+                'api_url': api_url,
+                'success': False,
+                'error': f"Request timed out after {self.request_timeout}s"
+            }
+        except Exception as e:
+            return {
+                'api_url': api_url,
+                'success': False,
+                'error': str(e)
+            }
+
+    async def _new_slots(self):
+        # Created on the engine's loop, which it binds to
+        return asyncio.Semaphore(self.max_pending)
+
+    async def _deliver(self, session, api_url, results):
+        results.put(await self._fetch_one(session, api_url))
+
+    async def _fetch_all(self, urls, results, slots):
+        session = await self._get_session()
+        tasks = set()
+        try:
+            for api_url in interleave_hosts(urls):
+                # Freed by the consumer as it takes each result
+                await slots.acquire()
+                task = asyncio.ensure_future(self._deliver(session, api_url, results))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            for task in list(tasks):
+                task.cancel()
+
+    def fetch(self, urls, deadline, on_idle=None):
+        """
+        Fetch and decode the JSON bodies of urls concurrently, yielding
+        responses (see tracker.http_fetcher.fetch_json) in completion order.
+        URLs still pending once `deadline` seconds have passed are cancelled
+        and reported as failures. on_idle, if given, is called whenever the
+        consumer has caught up and is about to wait for the next response.
+        """
+        urls = list(urls)
+        results = queue.Queue()
+        slots = asyncio.run_coroutine_threadsafe(self._new_slots(), self._loop).result()
+        future = asyncio.run_coroutine_threadsafe(self._fetch_all(urls, results, slots), self._loop)
+        pending = set(urls)
+        expires_at = time.monotonic() + deadline
+        try:
+            while pending:
+                remaining = expires_at - time.monotonic()
+                if remaining <= 0:
+                    break
+                if on_idle is not None and results.empty():
+                    on_idle()
+                    remaining = expires_at - time.monotonic()
+                try:
+                    result = results.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                self._loop.call_soon_threadsafe(slots.release)
+                pending.discard(result['api_url'])
+                yield result
+        finally:
+            future.cancel()
+
+        for api_url in pending:
+            yield {
+                'api_url': api_url,
+                'success': False,
+                'error': f"Fetch deadline of {deadline}s exceeded",
+                'cancelled': True,
+            }
+
+    def close(self):
+        async def _close():
+            if self._session is not None:
+                await self._session.close()
+
+        if self._loop.is_running():
+            asyncio.run_coroutine_threadsafe(_close(), self._loop).result(timeout=5)
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=5)
+
+
+def interleave_hosts(urls):
+    """
+    Order urls round-robin across their hosts, so a slow host cannot take
+    every pending slot while the others wait
+    """
+    by_host = {}
+    for api_url in urls:
+        by_host.setdefault(urlsplit(api_url).netloc, []).append(api_url)
+    for batch in itertools.zip_longest(*by_host.values()):
+        yield from (api_url for api_url in batch if api_url is not None)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_fetch_engine():
+    """
+    Return the process-wide fetch engine, starting it on first use
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = AsyncFetchEngine(
+                request_timeout=settings.TRACKER_FETCH_TIMEOUT,
+                max_per_host=settings.TRACKER_FETCH_MAX_PER_HOST,
+                keepalive_timeout=settings.TRACKER_FETCH_KEEPALIVE,
+                max_pending=settings.TRACKER_FETCH_MAX_PENDING,
+            )
+            atexit.register(_engine.close)
+        return _engine
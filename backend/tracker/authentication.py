@@ -0,0 +1,18 @@
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+
+from .cache import is_user_active
+
+
+class ActiveUserJWTAuthentication(JWTStatelessUserAuthentication):
+    """
+    Stateless JWT authentication that still refuses deactivated and deleted
+    users, through their cached active flag instead of loading the user row
+    on every request.
+    """
+
+    def get_user(self, validated_token):
+        user = super().get_user(validated_token)
+        if not is_user_active(user.id):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
@@ -0,0 +1,334 @@
+"""
+Bulk loading of historical positions, for `manage.py backfill_positions`.
+
+Two sources yield fixes as (satellite pk, timestamp, latitude, longitude,
+altitude, velocity) tuples in chunks:
+
+* ElementsSource propagates the satellites' stored element sets over a time
+  range, a block of timestamps at a time.
+* FileSource streams recorded fixes from CSV or JSON-lines files (optionally
+  gzipped), in the shape of the positions-batch format: norad_id, timestamp
+  (ISO 8601 or epoch seconds), latitude, longitude and optional altitude and
+  velocity.
+
+Each source can report where it is (`position`) after a chunk and start over
+from there, so Backfill commits a chunk and then records that position in a
+checkpoint file; rerunning the same job picks up after the last committed
+chunk. Inserts skip fixes already stored, so replaying a chunk is harmless.
+"""
+import csv
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Satellite, SatellitePosition
+from .partitions import insert_positions, partition_day
+from .tracks import record_positions
+
+
+FIELDS = ('norad_id', 'timestamp', 'latitude', 'longitude', 'altitude', 'velocity')
+REQUIRED_FIELDS = FIELDS[:4]
+
+
+def parse_timestamp(value):
+    """
+    An aware datetime from epoch seconds or an ISO 8601 string (UTC when it
+    has no offset)
+    """
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=dt_timezone.utc)
+    value = value.strip()
+    try:
+        return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+    except ValueError:
+        pass
+    # fromisoformat() only accepts a 'Z' suffix from Python 3.11
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return timestamp.replace(tzinfo=dt_timezone.utc) if timezone.is_naive(timestamp) else timestamp
+
+
+def optional_float(value):
+    if value is None or value == '':
+        return None
+    value = float(value)
+    return None if value != value else value
+
+
+class ElementsSource:
+    """
+    Fixes every `step` seconds from `start` to `end` (exclusive) for the
+    given satellites, propagated from their stored elements. Without an
+    `end` the range runs up to now, fixed when the job starts: it is part of
+    the position rather than of the job, so a rerun resumes it. Positions
+    are [timestamp offset from `start`, end].
+    """
+
+    def __init__(self, satellites, start, end, step):
+        from .propagation import Propagator
+
+        element_sets = {satellite: satellite.element_set() for satellite in satellites}
+        self.satellites = [satellite for satellite, element_set in element_sets.items() if element_set is not None]
+        self.propagator = Propagator([element_sets[satellite] for satellite in self.satellites])
+        self.start = start
+        self.open_end = end is None
+        self.end = timezone.now() if end is None else end
+        self.step = step
+        self.offset = 0
+
+    def describe(self):
+        return {
+            'source': 'elements',
+            'satellites': sorted(satellite.id for satellite in self.satellites),
+            'start': self.start.isoformat(),
+            'end': None if self.open_end else self.end.isoformat(),
+            'step': self.step,
+        }
+
+    @property
+    def position(self):
+        return [self.offset, self.end.isoformat()]
+
+    @property
+    def total(self):
+        return len(self.satellites) * self.steps
+
+    @property
+    def steps(self):
+        return max(0, -(-int((self.end - self.start).total_seconds()) // self.step))
+
+    def chunks(self, chunk_size):
+        import numpy as np
+
+        if not self.satellites:
+            return
+        # As many timestamps per block as keep it near chunk_size fixes
+        per_block = max(1, chunk_size // len(self.satellites))
+        satellite_ids = [satellite.id for satellite in self.satellites]
+        while self.offset < self.steps:
+            offsets = range(self.offset, min(self.offset + per_block, self.steps))
+            times = [self.start + timedelta(seconds=offset * self.step) for offset in offsets]
+            columns = self.propagator.propagate(times)
+            valid = ~np.isnan(columns['latitude'])
+            rows, cols = np.nonzero(valid)
+            fixes = list(zip(
+                [satellite_ids[row] for row in rows.tolist()],
+                [times[col] for col in cols.tolist()],
+                columns['latitude'][valid].tolist(),
+                columns['longitude'][valid].tolist(),
+                columns['altitude'][valid].tolist(),
+                columns['velocity'][valid].tolist(),
+            ))
+            self.offset = offsets[-1] + 1
+            yield fixes, len(offsets) * len(self.satellites) - len(fixes)
+
+    def seek(self, position):
+        self.offset, end = position
+        self.end = datetime.fromisoformat(end)
+
+
+class FileSource:
+    """
+    Recorded fixes from CSV (with a header row) or JSON-lines files, read a
+    line at a time. Positions are [file index, byte offset, CSV header].
+    Fixes of satellites not in `satellites_by_norad_id` are skipped.
+    """
+
+    def __init__(self, paths, satellites_by_norad_id, file_format=None):
+        self.paths = [os.path.abspath(path) for path in paths]
+        self.satellites_by_norad_id = satellites_by_norad_id
+        self.file_format = file_format
+        self.position = [0, 0, None]
+        self.errors = []
+
+    def describe(self):
+        files = []
+        for path in self.paths:
+            stat = os.stat(path)
+            files.append([path, stat.st_size, stat.st_mtime_ns])
+        return {'source': 'files', 'files': files, 'format': self.file_format}
+
+    @property
+    def total(self):
+        return None
+
+    def format_of(self, path):
+        if self.file_format:
+            return self.file_format
+        name = path[:-3] if path.endswith('.gz') else path
+        if name.endswith('.csv'):
+            return 'csv'
+        if name.endswith(('.jsonl', '.ndjson', '.json')):
+            return 'jsonl'
+        raise ValueError(f"Cannot tell the format of {path}; pass --format")
+
+    def seek(self, position):
+        self.position = list(position)
+
+    def chunks(self, chunk_size):
+        while self.position[0] < len(self.paths):
+            path = self.paths[self.position[0]]
+            yield from self._read(path, self.format_of(path), chunk_size)
+            self.position = [self.position[0] + 1, 0, None]
+
+    def _read(self, path, file_format, chunk_size):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            offset = self.position[1]
+            f.seek(offset)
+            header = self.position[2]
+            line_start = offset
+
+            def lines():
+                nonlocal offset, line_start
+                for raw in f:
+                    line_start, offset = offset, offset + len(raw)
+                    yield raw.decode('utf-8')
+
+            if file_format == 'csv':
+                records = csv.reader(lines())
+                if header is None:
+                    header = [name.strip() for name in next(records, [])]
+                    missing = [name for name in REQUIRED_FIELDS if name not in header]
+                    if missing:
+                        raise ValueError(f"{path} lacks the columns {', '.join(missing)}")
+                columns = [header.index(name) if name in header else None for name in FIELDS]
+
+                def to_fields(row):
+                    return [None if column is None else row[column] for column in columns]
+            else:
+                records = filter(str.strip, lines())
+
+                def to_fields(line):
+                    record = json.loads(line)
+                    return [record.get(name) for name in FIELDS]
+
+            fixes, skipped = [], 0
+            for record in records:
+                try:
+                    fixes.append(self._fix(to_fields(record)))
+                except (ValueError, TypeError, IndexError, AttributeError) as e:
+                    skipped += 1
+                    if len(self.errors) < 10:
+                        self.errors.append(f"{path}, byte {line_start}: {e}")
+                if len(fixes) + skipped >= chunk_size:
+                    self.position = [self.position[0], offset, header]
+                    yield fixes, skipped
+                    fixes, skipped = [], 0
+            self.position = [self.position[0], offset, header]
+            if fixes or skipped:
+                yield fixes, skipped
+
+    def _fix(self, record):
+        norad_id, timestamp, latitude, longitude, altitude, velocity = record
+        satellite_id = self.satellites_by_norad_id.get(str(norad_id).strip())
+        if satellite_id is None:
+            raise ValueError(f"unknown satellite {norad_id}")
+        latitude, longitude = float(latitude), float(longitude)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError(f"coordinates out of range ({latitude}, {longitude})")
+        return (
+            satellite_id, parse_timestamp(timestamp), latitude, longitude,
+            optional_float(altitude), optional_float(velocity),
+        )
+
+
+def satellites_by_norad_id():
+    return dict(Satellite.objects.values_list('satellite_id', 'id'))
+
+
+class Backfill:
+    """
+    Write a source's chunks, one transaction each, checkpointing after every
+    chunk under TRACKER_BACKFILL_CHECKPOINT_DIR. The checkpoint is removed
+    once the job completes.
+    """
+
+    def __init__(self, source, chunk_size=None, checkpoint_dir=None):
+        self.source = source
+        self.chunk_size = chunk_size or settings.TRACKER_BACKFILL_CHUNK_SIZE
+        job = json.dumps(source.describe(), sort_keys=True)
+        directory = checkpoint_dir or settings.TRACKER_BACKFILL_CHECKPOINT_DIR
+        self.checkpoint_path = os.path.join(directory, f"{hashlib.sha1(job.encode()).hexdigest()}.json")
+        self.saved = 0
+        self.skipped = 0
+        self.days = set()
+        self.resumed = False
+
+    def load_checkpoint(self):
+        """
+        Resume from the job's checkpoint, if there is one
+        """
+        try:
+            with open(self.checkpoint_path) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return False
+        self.source.seek(state['position'])
+        self.saved, self.skipped = state['saved'], state['skipped']
+        self.days = {datetime.fromisoformat(day).date() for day in state['days']}
+        self.resumed = True
+        return True
+
+    def save_checkpoint(self):
+        os.makedirs(os.path.dirname(self.checkpoint_path), exist_ok=True)
+        state = {
+            'job': self.source.describe(),
+            'position': self.source.position,
+            'saved': self.saved,
+            'skipped': self.skipped,
+            'days': sorted(day.isoformat() for day in self.days),
+        }
+        staging = f"{self.checkpoint_path}.tmp"
+        with open(staging, 'w') as f:
+            json.dump(state, f)
+        os.replace(staging, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        try:
+            os.remove(self.checkpoint_path)
+        except FileNotFoundError:
+            pass
+
+    def run(self, on_chunk=None):
+        """
+        Write every remaining chunk, calling on_chunk(self) after each
+        """
+        for fixes, skipped in self.source.chunks(self.chunk_size):
+            positions = [
+                SatellitePosition(
+                    satellite_id=satellite_id, timestamp=timestamp, latitude=latitude,
+                    longitude=longitude, altitude=altitude, velocity=velocity,
+                )
+                for satellite_id, timestamp, latitude, longitude, altitude, velocity in fixes
+            ]
+            self.reopen_days({partition_day(position.timestamp) for position in positions} - self.days)
+            with transaction.atomic():
+                insert_positions(positions)
+                record_positions(positions)
+            self.saved += len(positions)
+            self.skipped += skipped
+            self.save_checkpoint()
+            if on_chunk is not None:
+                on_chunk(self)
+        # Cleanup may have archived a day while it was being filled
+        self.reopen_days(self.days, record=False)
+        self.clear_checkpoint()
+
+    def reopen_days(self, days, record=True):
+        """
+        Closed days receiving fixes must not keep a stale archive: it would
+        hide the new fixes once their partition is dropped
+        """
+        today = timezone.now().astimezone(dt_timezone.utc).date()
+        for day in sorted(days):
+            if settings.TRACKER_ARCHIVE_ENABLED and day < today:
+                from .archive import reopen_day
+                reopen_day(day)
+            if record:
+                self.days.add(day)
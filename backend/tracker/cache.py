@@ -0,0 +1,199 @@
+import fcntl
+import hashlib
+import os
+import tempfile
+import threading
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import UserSatelliteSelection
+
+
+SELECTIONS_KEY = 'tracker:selections:{user_id}'
+
+
+class SharedVersions:
+    """
+    Version counters shared by every process on the host, in a shared memory
+    table indexed by key modulo its size (keys sharing a slot only cost each
+    other a reload). A change in any process bumps its key's counter, so
+    entries cached by the others are recognized as stale without asking the
+    database.
+    """
+
+    def __init__(self, name, slots):
+        self.name = name
+        self.slots = slots
+        self._counters = None
+        self._lock = threading.RLock()
+
+    def _table(self):
+        if self._counters is None:
+            with self._lock:
+                if self._counters is None:
+                    size = self.slots * np.dtype(np.uint64).itemsize
+                    try:
+                        segment = shared_memory.SharedMemory(name=self.name, create=True, size=size)
+                    except FileExistsError:
+                        segment = shared_memory.SharedMemory(name=self.name)
+                    # The table outlives the process that created it, like the ring buffers
+                    resource_tracker.unregister(segment._name, 'shared_memory')
+                    self._segment = segment
+                    self._counters = np.ndarray(self.slots, dtype=np.uint64, buffer=segment.buf)
+        return self._counters
+
+    def get(self, key):
+        return int(self._table()[key % self.slots])
+
+    def bump(self, key):
+        # Increments from other processes are serialized through a lock file,
+        # so none is lost
+        path = os.path.join(tempfile.gettempdir(), f"{self.name}.lock")
+        with self._lock, open(path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._table()[key % self.slots] += 1
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def unlink(self):
+        """
+        Remove the shared memory table
+        """
+        with self._lock:
+            if self._counters is None:
+                return
+            self._counters = None
+            segment, self._segment = self._segment, None
+            segment.close()
+            # unlink() unregisters the segment from the resource tracker again
+            resource_tracker.register(segment._name, 'shared_memory')
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                # Already removed by another process
+                resource_tracker.unregister(segment._name, 'shared_memory')
+
+
+selection_versions = SharedVersions('tracker_selection_versions', slots=65536)
+
+
+def get_selected_satellites(user_id):
+    """
+    Return the user's actively tracked satellites as (id, name) pairs, cached.
+    A cache shared by every worker (TRACKER_SHARED_CACHE) is invalidated
+    directly; a per-process cache keeps each list with the user's selection
+    version, and reloads it once another process on the host bumped it.
+    """
+    return get_versioned(
+        SELECTIONS_KEY.format(user_id=user_id), selection_versions, user_id,
+        lambda: load_selected_satellites(user_id),
+    )
+
+
+def get_versioned(key, versions, version_key, load):
+    """
+    Cached value of load(), invalidated by deleting the key from a shared
+    cache, or else by bumping its counter in the shared version table.
+    """
+    if settings.TRACKER_SHARED_CACHE:
+        value = cache.get(key)
+        if value is None:
+            value = load()
+            cache.set(key, value, settings.TRACKER_CACHE_TIMEOUT)
+        return value
+
+    # Read before the rows, so a change committed meanwhile is caught next time
+    version = versions.get(version_key)
+    cached = cache.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    value = load()
+    cache.set(key, (version, value), settings.TRACKER_CACHE_TIMEOUT)
+    return value
+
+
+def load_selected_satellites(user_id):
+    # Read from the primary even inside replica_reads(): a lagging replica
+    # would return (and cache) a stale list right after a change
+    return list(
+        UserSatelliteSelection.objects.using(DEFAULT_DB_ALIAS).filter(user_id=user_id, is_active=True)
+        .order_by('selected_at')
+        .values_list('satellite_id', 'satellite__name')
+    )
+
+
+def invalidate_selections(user_id):
+    """
+    Drop a user's cached selections; call once the change is committed
+    """
+    cache.delete(SELECTIONS_KEY.format(user_id=user_id))
+    if not settings.TRACKER_SHARED_CACHE:
+        selection_versions.bump(user_id)
+
+
+USER_ACTIVE_KEY = 'tracker:user-active:{user_id}'
+
+
+user_versions = SharedVersions('tracker_user_versions', slots=65536)
+
+
+def is_user_active(user_id):
+    """
+    Whether the user still exists and is active, cached like the selections
+    so that token-authenticated polls need no user query
+    """
+    return get_versioned(
+        USER_ACTIVE_KEY.format(user_id=user_id), user_versions, user_id,
+        lambda: get_user_model().objects.using(DEFAULT_DB_ALIAS).filter(id=user_id, is_active=True).exists(),
+    )
+
+
+def invalidate_user(instance, **kwargs):
+    """
+    Drop a user's cached active flag; a User post_save/post_delete handler.
+    Queryset update()s send no signal, and are only caught once the entry
+    expires (TRACKER_CACHE_TIMEOUT).
+    """
+    cache.delete(USER_ACTIVE_KEY.format(user_id=instance.pk))
+    if not settings.TRACKER_SHARED_CACHE:
+        user_versions.bump(instance.pk)
+
+
+CATALOG_KEY = 'tracker:catalog:{version}:{digest}'
+CATALOG_VERSION_KEY = 'tracker:catalog:version'
+
+
+catalog_versions = SharedVersions('tracker_catalog_version', slots=1)
+
+
+def catalog_key(url):
+    """
+    Cache key of a catalog page, by its full URL. Changing the version
+    orphans every cached page at once. Without a shared cache the version
+    lives in shared memory, so changes made by another process on the host
+    (e.g. manage.py sync_catalog) reach every worker's cache.
+    """
+    if settings.TRACKER_SHARED_CACHE:
+        version = cache.get_or_set(CATALOG_VERSION_KEY, 0, None)
+    else:
+        version = catalog_versions.get(0)
+    return CATALOG_KEY.format(version=version, digest=hashlib.md5(url.encode()).hexdigest())
+
+
+def invalidate_catalog(**kwargs):
+    """
+    Drop the cached catalog pages; also a Satellite post_save/post_delete handler
+    """
+    if not settings.TRACKER_SHARED_CACHE:
+        catalog_versions.bump(0)
+        return
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.set(CATALOG_VERSION_KEY, 1, None)
@@ -0,0 +1,68 @@
+"""
+Database plumbing: the read-replica router and SQLite tuning.
+
+Views that only read shared data wrap their requests in replica_reads(), and
+ReplicaRouter sends the reads made meanwhile to the 'replica' database when
+one is configured, away from the ingest writer on 'default'.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+REPLICA_DB = 'replica'
+
+_replica_reads = ContextVar('tracker_replica_reads', default=False)
+
+
+@contextmanager
+def replica_reads():
+    """
+    Route reads made inside the block to the replica, if there is one
+    """
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaReadMixin:
+    """
+    View mixin serving the whole request from the replica
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        with replica_reads():
+            return super().dispatch(request, *args, **kwargs)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and REPLICA_DB in settings.DATABASES:
+            return REPLICA_DB
+        return None
+
+    def db_for_write(self, model, **hints):
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_DB
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """
+    connection_created handler: switch SQLite to WAL, so API readers are not
+    blocked by the ingest writer, and apply TRACKER_SQLITE_PRAGMAS
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL')
+        for name, value in settings.TRACKER_SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
@@ -0,0 +1,150 @@
+import atexit
+import concurrent.futures
+import threading
+import time
+
+from django.conf import settings
+
+
+class InProcessExecutor:
+    """
+    Runs every call sequentially in the calling thread. Useful for tests and
+    management commands where starting workers is not worth it.
+    """
+
+    def imap_unordered(self, fn, items, timeout=None):
+        """
+        Call fn(*item) for each item, yielding (item, result, error) triples.
+        Items not started before the timeout are reported as timed out.
+        """
+        expires_at = None if timeout is None else time.monotonic() + timeout
+        for item in items:
+            if expires_at is not None and time.monotonic() > expires_at:
+                yield item, None, TimeoutError(f"Not started within {timeout}s")
+                continue
+            try:
+                yield item, fn(*item), None
+            except Exception as e:
+                yield item, None, e
+
+    def shutdown(self):
+        pass
+
+
+class ThreadPoolExecutor:
+    """
+    Runs calls on a pool of worker threads, which suits I/O-bound work
+    """
+
+    def __init__(self, max_workers=None):
+        self._pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='tracker-executor'
+        )
+
+    def imap_unordered(self, fn, items, timeout=None):
+        futures = {self._pool.submit(fn, *item): item for item in items}
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=timeout):
+                error = future.exception()
+                yield futures[future], (None if error else future.result()), error
+        except concurrent.futures.TimeoutError:
+            for future, item in futures.items():
+                if not future.done():
+                    future.cancel()
+                    yield item, None, TimeoutError(f"Did not complete within {timeout}s")
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class RayExecutor:
+    """
+    Runs calls as Ray tasks. Ray is imported and initialized on first use,
+    so processes that never submit work never start a Ray runtime.
+    """
+
+    def __init__(self, address=None):
+        self.address = address
+        self._ray = None
+        self._remote_functions = {}
+
+    def _get_ray(self):
+        if self._ray is None:
+            import ray
+            if not ray.is_initialized():
+                ray.init(address=self.address, ignore_reinit_error=True)
+            self._ray = ray
+        return self._ray
+
+    def _remote(self, fn):
+        if fn not in self._remote_functions:
+            self._remote_functions[fn] = self._get_ray().remote(fn)
+        return self._remote_functions[fn]
+
+    def imap_unordered(self, fn, items, timeout=None):
+        ray = self._get_ray()
+        remote_fn = self._remote(fn)
+        pending = {remote_fn.remote(*item): item for item in items}
+        expires_at = None if timeout is None else time.monotonic() + timeout
+
+        while pending:
+            remaining = None if expires_at is None else max(expires_at - time.monotonic(), 0)
+            ready, _ = ray.wait(list(pending), num_returns=1, timeout=remaining)
+            if not ready:
+                break
+            ref = ready[0]
+            item = pending.pop(ref)
+            try:
+                yield item, ray.get(ref), None
+            except Exception as e:
+                yield item, None, e
+
+        for ref, item in pending.items():
+            ray.cancel(ref, force=True)
+            yield item, None, TimeoutError(f"Did not complete within {timeout}s")
+
+    def shutdown(self):
+        if self._ray is not None and self._ray.is_initialized():
+            self._ray.shutdown()
+        self._ray = None
+        self._remote_functions = {}
+
+
+EXECUTORS = {
+    'inprocess': InProcessExecutor,
+    'thread': lambda: ThreadPoolExecutor(max_workers=settings.TRACKER_EXECUTOR_WORKERS),
+    'ray': lambda: RayExecutor(address=settings.TRACKER_RAY_ADDRESS or None),
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Return the executor selected by settings.TRACKER_EXECUTOR, creating it on first use
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            try:
+                factory = EXECUTORS[settings.TRACKER_EXECUTOR]
+            except KeyError:
+                raise ValueError(
+                    f"Unknown TRACKER_EXECUTOR {settings.TRACKER_EXECUTOR!r}, "
+                    f"expected one of {', '.join(EXECUTORS)}"
+                )
+            _executor = factory()
+        return _executor
+
+
+@atexit.register
+def shutdown_executor():
+    """
+    Tear down the current executor, if one was started
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
@@ -0,0 +1,64 @@
+import time
+from email.utils import parsedate_to_datetime
+
+import requests
+
+
+def parse_retry_after(value):
+    """
+    Return the delay in seconds asked for by a Retry-After header (either
+    delay-seconds or an HTTP date), or None when absent or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_json(api_url, timeout=10):
+    """
+    Fetch and decode an upstream API response. Returns {'api_url', 'success',
+    'data'} on success, or {'api_url', 'success', 'error'} plus the HTTP
+    'status' when the upstream answered (with the 'retry_after' delay of an
+    error status). Both carry the request's 'elapsed' seconds.
+    Runs on executor workers, so this module must stay importable without
+    Django being configured
+    """
+    start = time.perf_counter()
+    try:
+        response = requests.get(api_url, timeout=timeout)
+        if response.status_code >= 400:
+            return {
+                'api_url': api_url,
+                'success': False,
+                'error': f"HTTP {response.status_code} {response.reason}",
+                'status': response.status_code,
+                'retry_after': parse_retry_after(response.headers.get('Retry-After')),
+                'elapsed': time.perf_counter() - start,
+            }
+        try:
+            data = response.json()
+        except ValueError as e:
+            return {
+                'api_url': api_url,
+                'success': False,
+                'error': f"Malformed JSON: {e}",
+                'status': response.status_code,
+                'elapsed': time.perf_counter() - start,
+            }
+        return {'api_url': api_url, 'success': True, 'data': data, 'elapsed': time.perf_counter() - start}
+
+    except Exception as e:
+        return {
+            'api_url': api_url,
+            'success': False,
+            'error': str(e),
+            'elapsed': time.perf_counter() - start,
+        }
+
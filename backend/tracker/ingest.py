@@ -0,0 +1,83 @@
+"""
+Single-leader locking for the ingest worker.
+
+Exactly one `manage.py run_ingest` process per deployment runs the scheduler.
+On PostgreSQL the leader holds a session-level advisory lock, so workers on
+any host can stand by; otherwise an exclusive lock on a file serializes the
+workers sharing a host.
+"""
+import fcntl
+import os
+
+from django.conf import settings
+from django.db import connection
+
+
+class IngestLock:
+    def __init__(self):
+        self._file = None
+        self._held = False
+
+    @property
+    def uses_database(self):
+        return connection.vendor == 'postgresql'
+
+    def acquire(self):
+        """
+        Try to become the ingest leader, without blocking
+        """
+        if self.uses_database:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_lock(%s)', [settings.TRACKER_INGEST_LOCK_KEY])
+                self._held = cursor.fetchone()[0]
+            return self._held
+
+        self._file = open(settings.TRACKER_INGEST_LOCK_PATH, 'a+')
+        try:
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            self._file.close()
+            self._file = None
+            return False
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(f"{os.getpid()}\n")
+        self._file.flush()
+        self._held = True
+        return True
+
+    def is_held(self):
+        """
+        Check that the lock is still ours. An advisory lock is lost with the
+        session, e.g. when the database connection drops.
+        """
+        if not self._held:
+            return False
+        if not self.uses_database:
+            return True
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_locks WHERE locktype = 'advisory' AND granted "
+                    "AND pid = pg_backend_pid() AND objid = %s",
+                    [settings.TRACKER_INGEST_LOCK_KEY],
+                )
+                self._held = cursor.fetchone() is not None
+        except Exception:
+            connection.close()
+            self._held = False
+        return self._held
+
+    def release(self):
+        if self.uses_database:
+            if self._held:
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute('SELECT pg_advisory_unlock(%s)', [settings.TRACKER_INGEST_LOCK_KEY])
+                except Exception:
+                    connection.close()
+        elif self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._held = False
@@ -0,0 +1,127 @@
+"""
+Positions of satellites at arbitrary times, between or just after their
+stored fixes.
+
+For each satellite the two fixes bracketing the requested time are taken
+from its ring buffer (or from the database for times older than the
+buffer), or its two newest fixes when the time is past the newest one. The
+position is then moved along the great circle through both fixes at their
+angular rate, for every satellite at once.
+"""
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+
+from .models import SatellitePosition
+from .ringbuffer import FIX_DTYPE, ring_buffers, to_fixes
+from .spatial import unit_vector
+
+
+def slerp(lat0, lon0, lat1, lon1, fraction):
+    """
+    Points at `fraction` of the way along the great circles from
+    (lat0, lon0) to (lat1, lon1), in degrees. Fractions above 1 extrapolate
+    past the second point at the same angular rate.
+    """
+    p0, p1 = unit_vector(lat0, lon0), unit_vector(lat1, lon1)
+    omega = np.arccos(np.clip(np.sum(p0 * p1, axis=-1), -1, 1))
+    sin_omega = np.sin(omega)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Nearly coincident points: fall back to linear weights
+        w0 = np.where(sin_omega > 1e-12, np.sin((1 - fraction) * omega) / sin_omega, 1 - fraction)
+        w1 = np.where(sin_omega > 1e-12, np.sin(fraction * omega) / sin_omega, fraction)
+    p = w0[..., None] * p0 + w1[..., None] * p1
+    lat = np.degrees(np.arcsin(np.clip(p[..., 2] / np.linalg.norm(p, axis=-1), -1, 1)))
+    lon = np.degrees(np.arctan2(p[..., 1], p[..., 0]))
+    return lat, lon
+
+
+def choose_fixes(fixes, at, max_gap, max_extrapolation):
+    """
+    Pick the two fixes (oldest first) to estimate the position at `at` (epoch
+    seconds) from, out of a satellite's fixes sorted by time. Returns
+    (first, second, method), None when the fixes are too far apart or too
+    old, or 'older' when `at` precedes every fix.
+    """
+    timestamps = fixes['timestamp']
+    i = int(np.searchsorted(timestamps, at, side='right'))
+    if i == 0:
+        return 'older'
+    if timestamps[i - 1] == at:
+        return fixes[i - 1], fixes[i - 1], 'fix'
+    if i < len(fixes):
+        if timestamps[i] - timestamps[i - 1] > max_gap:
+            return None
+        return fixes[i - 1], fixes[i], 'interpolated'
+    if len(fixes) < 2 or at - timestamps[-1] > max_extrapolation or timestamps[-1] - timestamps[-2] > max_gap:
+        return None
+    return fixes[-2], fixes[-1], 'extrapolated'
+
+
+def estimate(pairs, at):
+    """
+    Positions at `at` from (first, second) FIX_DTYPE fix pairs, as columns
+    """
+    first = np.array([pair[0] for pair in pairs], dtype=FIX_DTYPE)
+    second = np.array([pair[1] for pair in pairs], dtype=FIX_DTYPE)
+    span = second['timestamp'] - first['timestamp']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fraction = np.where(span > 0, (at - first['timestamp']) / span, 0.0)
+    latitude, longitude = slerp(
+        first['latitude'], first['longitude'], second['latitude'], second['longitude'], fraction
+    )
+    columns = {'latitude': latitude, 'longitude': longitude}
+    for name in ('altitude', 'velocity'):
+        columns[name] = first[name] + fraction * (second[name] - first[name])
+    return columns
+
+
+def positions_at(satellite_ids, at):
+    """
+    Estimated position of each satellite at `at` (an aware datetime), keyed
+    by satellite id: a dict of latitude, longitude, altitude, velocity and
+    method ('fix', 'interpolated' or 'extrapolated'), or None when there are
+    no fixes close enough. Fixes more than TRACKER_INTERPOLATION_MAX_GAP
+    seconds apart are not interpolated between, and positions are not
+    extrapolated more than TRACKER_INTERPOLATION_MAX_EXTRAPOLATION seconds
+    past the newest fix.
+    """
+    max_gap = settings.TRACKER_INTERPOLATION_MAX_GAP
+    max_extrapolation = settings.TRACKER_INTERPOLATION_MAX_EXTRAPOLATION
+    when = at.timestamp()
+
+    choices = {}
+    for satellite_id, fixes in ring_buffers.latest(satellite_ids).items():
+        choices[satellite_id] = choose_fixes(fixes[::-1], when, max_gap, max_extrapolation)
+
+    # Times before the buffered fixes: read the fixes around them, in one query
+    older = [satellite_id for satellite_id, choice in choices.items() if choice == 'older']
+    if older:
+        rows = {satellite_id: [] for satellite_id in older}
+        for satellite_id, *fix in (
+            SatellitePosition.objects.filter(
+                satellite_id__in=older,
+                timestamp__range=(at - timedelta(seconds=max_gap), at + timedelta(seconds=max_gap)),
+            )
+            .order_by('timestamp')
+            .values_list('satellite_id', 'timestamp', 'latitude', 'longitude', 'altitude', 'velocity')
+        ):
+            rows[satellite_id].append((fix[0].timestamp(), *fix[1:]))
+        for satellite_id, satellite_rows in rows.items():
+            choice = choose_fixes(to_fixes(satellite_rows), when, max_gap, max_extrapolation) if satellite_rows else None
+            choices[satellite_id] = None if choice == 'older' else choice
+
+    chosen = [satellite_id for satellite_id, choice in choices.items() if choice is not None]
+    positions = {satellite_id: None for satellite_id in satellite_ids}
+    if chosen:
+        columns = estimate([choices[satellite_id][:2] for satellite_id in chosen], when)
+        for i, satellite_id in enumerate(chosen):
+            positions[satellite_id] = {
+                'latitude': float(columns['latitude'][i]),
+                'longitude': float(columns['longitude'][i]),
+                'altitude': None if np.isnan(columns['altitude'][i]) else float(columns['altitude'][i]),
+                'velocity': None if np.isnan(columns['velocity'][i]) else float(columns['velocity'][i]),
+                'method': choices[satellite_id][2],
+            }
+    return positions
@@ -0,0 +1,124 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tracker.backfill import Backfill, ElementsSource, FileSource, satellites_by_norad_id
+from tracker.models import Satellite
+
+
+# Seconds between progress reports
+PROGRESS_INTERVAL = 5
+
+
+class Command(BaseCommand):
+    help = (
+        'Load historical positions, propagated from the stored element sets over a time range '
+        'or read from CSV/JSON-lines files of recorded fixes. Interrupted jobs resume when rerun.'
+    )
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument(
+            '--elements', action='store_true',
+            help='Propagate the element sets stored on the satellites (see load_elements)',
+        )
+        source.add_argument(
+            '--file', action='append', dest='files', metavar='PATH',
+            help='CSV or JSON-lines file of fixes, optionally gzipped (repeatable)',
+        )
+        parser.add_argument('--start', help='With --elements: first timestamp (ISO 8601)')
+        parser.add_argument('--end', help='With --elements: end of the range (ISO 8601, default: now)')
+        parser.add_argument('--step', type=int, default=60, help='With --elements: seconds between fixes')
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help='With --file: format of the files (default: from their extension)',
+        )
+        parser.add_argument(
+            '--satellite', action='append', dest='satellites', metavar='NORAD_ID',
+            help='Only backfill this satellite (repeatable)',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Fixes per transaction (default: TRACKER_BACKFILL_CHUNK_SIZE)',
+        )
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint of an interrupted run')
+
+    def handle(self, *args, **options):
+        satellites = Satellite.objects.all()
+        if options['satellites']:
+            satellites = satellites.filter(satellite_id__in=options['satellites'])
+
+        if options['elements']:
+            source = self.elements_source(satellites, options)
+        else:
+            norad_ids = satellites_by_norad_id()
+            if options['satellites']:
+                norad_ids = {norad_id: pk for norad_id, pk in norad_ids.items() if norad_id in options['satellites']}
+            source = FileSource(options['files'], norad_ids, options['format'])
+
+        try:
+            backfill = Backfill(source, options['chunk_size'])
+        except OSError as e:
+            raise CommandError(f"Cannot read {e.filename}: {e.strerror}")
+        if options['restart']:
+            backfill.clear_checkpoint()
+        elif backfill.load_checkpoint():
+            self.stdout.write(f"Resuming an interrupted backfill after {backfill.saved} saved fixes.")
+
+        start = time.monotonic()
+        saved_before = backfill.saved
+        last_report = start
+
+        def report(backfill):
+            nonlocal last_report
+            now = time.monotonic()
+            if now - last_report < PROGRESS_INTERVAL:
+                return
+            last_report = now
+            rate = (backfill.saved - saved_before) / (now - start)
+            total = f" of {source.total}" if source.total else ''
+            self.stdout.write(f"Saved {backfill.saved}{total} fixes ({rate:.0f} fixes/s).")
+
+        try:
+            backfill.run(on_chunk=report)
+        except ValueError as e:
+            raise CommandError(str(e))
+        except KeyboardInterrupt:
+            raise CommandError(
+                f"Interrupted after {backfill.saved} saved fixes; rerun the same command to resume."
+            )
+
+        for error in getattr(source, 'errors', []):
+            self.stderr.write(f"Skipped {error}")
+        elapsed = time.monotonic() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Saved {backfill.saved} fixes ({backfill.skipped} skipped) over {len(backfill.days)} days "
+            f"in {elapsed:.1f}s."
+        ))
+
+    def elements_source(self, satellites, options):
+        if not options['start']:
+            raise CommandError('--elements needs --start')
+        try:
+            start = parse_datetime(options['start'])
+            end = parse_datetime(options['end']) if options['end'] else timezone.now()
+        except ValueError:
+            start = end = None
+        if start is None or end is None:
+            raise CommandError('--start and --end must be ISO 8601 timestamps')
+        start, end = (timezone.make_aware(t) if timezone.is_naive(t) else t for t in (start, end))
+        if end > timezone.now():
+            raise CommandError('--end cannot be in the future')
+        if start >= end or options['step'] <= 0:
+            raise CommandError('--start must precede --end, and --step must be positive')
+
+        # An omitted --end stays open, so that rerunning the command resumes
+        # the job up to the end chosen by its first run
+        source = ElementsSource(
+            satellites.exclude(tle_line1=''), start, end if options['end'] else None, options['step'],
+        )
+        if not source.satellites:
+            raise CommandError('No satellites with element sets; load them with load_elements first')
+        return source
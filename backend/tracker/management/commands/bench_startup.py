@@ -0,0 +1,86 @@
+import json
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Modules that must only be imported when the work that needs them actually runs
+LAZY_MODULES = ['ray', 'aiohttp', 'numpy', 'sgp4']
+
+PROBE = '''
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'satellite_tracker.settings')
+start = time.perf_counter()
+import django
+from tracker.apps import TrackerConfig
+timings = {}
+original_ready = TrackerConfig.ready
+def timed_ready(self):
+    ready_start = time.perf_counter()
+    original_ready(self)
+    timings['ready'] = time.perf_counter() - ready_start
+TrackerConfig.ready = timed_ready
+django.setup()
+timings['setup'] = time.perf_counter() - start
+import_start = time.perf_counter()
+import tracker.scheduler
+timings['scheduler_import'] = time.perf_counter() - import_start
+timings['eager_modules'] = [name for name in %r if name in sys.modules]
+print(json.dumps(timings))
+'''
+
+
+class Command(BaseCommand):
+    help = 'Measure Django startup and tracker import time in fresh interpreters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument(
+            '--max-setup-seconds', type=float, default=1.5,
+            help='Fail when the median django.setup() time exceeds this budget',
+        )
+        parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+
+    def handle(self, *args, **options):
+        runs = []
+        for _ in range(options['runs']):
+            completed = subprocess.run(
+                [sys.executable, '-c', PROBE % LAZY_MODULES],
+                cwd=settings.BASE_DIR, capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                raise CommandError(f"Startup probe failed:\n{completed.stderr}")
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+        report = {
+            'runs': len(runs),
+            'setup_median': statistics.median(run['setup'] for run in runs),
+            'ready_median': statistics.median(run['ready'] for run in runs),
+            'scheduler_import_median': statistics.median(run['scheduler_import'] for run in runs),
+            'eager_modules': sorted({name for run in runs for name in run['eager_modules']}),
+        }
+
+        if options['json']:
+            self.stdout.write(json.dumps(report))
+        else:
+            self.stdout.write(
+                f"django.setup(): {report['setup_median'] * 1000:.1f} ms "
+                f"(TrackerConfig.ready: {report['ready_median'] * 1000:.2f} ms), "
+                f"import tracker.scheduler: {report['scheduler_import_median'] * 1000:.1f} ms "
+                f"over {report['runs']} runs"
+            )
+
+        if report['eager_modules']:
+            raise CommandError(
+                f"Imported at startup but should be lazy: {', '.join(report['eager_modules'])}"
+            )
+        if report['setup_median'] > options['max_setup_seconds']:
+            raise CommandError(
+                f"Median startup {report['setup_median']:.3f}s exceeds "
+                f"{options['max_setup_seconds']:.3f}s budget"
+            )
+        if not options['json']:
+            self.stdout.write(self.style.SUCCESS('Startup within budget.'))
@@ -0,0 +1,244 @@
+import contextlib
+import io
+import json
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone as dt_timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tracker.db import REPLICA_DB
+from tracker.models import Satellite, UserSatelliteSelection
+from tracker.simulator import SINGLE_FORMATS, UpstreamSimulator
+
+
+# Synthetic NORAD ids, above the real catalog
+FIRST_NORAD_ID = 900000
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark ingest and the positions API against a local upstream simulator, '
+        'on a throwaway database filled with a synthetic fleet'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--satellites', type=int, default=2000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--selections-per-user', type=int, default=10)
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Satellites per positions-batch URL; a quarter of the fleet uses that format (0 disables it)',
+        )
+        parser.add_argument('--cycles', type=int, default=3, help='Ingest cycles to run')
+        parser.add_argument('--requests', type=int, default=1000, help='API requests per path')
+        parser.add_argument(
+            '--api-path', action='append', dest='api_paths',
+            help='API path to measure (repeatable, default: /api/positions/)',
+        )
+        parser.add_argument('--hosts', type=int, default=4, help='Simulated upstream hosts')
+        parser.add_argument('--latency', type=float, default=0.05, help='Upstream latency in seconds')
+        parser.add_argument('--jitter', type=float, default=0.02, help='Extra random upstream latency in seconds')
+        parser.add_argument('--failure-rate', type=float, default=0.01, help='Fraction of upstream requests failing')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', action='store_true', help='Print machine-readable results')
+        parser.add_argument('--output', help='Also write the JSON results to this file')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        report = {
+            'started_at': datetime.now(dt_timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'fetch_backend': settings.TRACKER_FETCH_BACKEND,
+            'parameters': {
+                name: options[name] for name in (
+                    'satellites', 'users', 'selections_per_user', 'batch_size', 'cycles', 'requests',
+                    'hosts', 'latency', 'jitter', 'failure_rate', 'seed',
+                )
+            },
+            'peak_rss_mb': {},
+        }
+
+        with self.throwaway_database(), UpstreamSimulator(
+            hosts=options['hosts'], latency=options['latency'], jitter=options['jitter'],
+            failure_rate=options['failure_rate'], seed=options['seed'],
+        ) as simulator:
+            report['fleet'] = self.create_fleet(simulator, options)
+            report['peak_rss_mb']['fleet'] = peak_rss_mb()
+            report['ingest'] = self.bench_ingest(simulator, options['cycles'])
+            report['peak_rss_mb']['ingest'] = peak_rss_mb()
+            report['api'] = {
+                path: self.bench_api(path, options['requests'])
+                for path in options['api_paths'] or ['/api/positions/']
+            }
+            report['peak_rss_mb']['api'] = peak_rss_mb()
+
+        if options['output']:
+            Path(options['output']).write_text(json.dumps(report, indent=2))
+        if options['json']:
+            self.stdout.write(json.dumps(report))
+        else:
+            self.print_summary(report)
+
+    @contextlib.contextmanager
+    def throwaway_database(self):
+        """
+        Run on a fresh test database, so the benchmark never touches real data.
+        On SQLite it is a file (not the in-memory default) so writes cost what
+        they do in production.
+        """
+        # Reads must not be routed to a replica of the real database
+        replica = settings.DATABASES.pop(REPLICA_DB, None)
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                connection.settings_dict.setdefault('TEST', {})['NAME'] = str(Path(directory) / 'bench.sqlite3')
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                yield
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                if replica is not None:
+                    settings.DATABASES[REPLICA_DB] = replica
+
+    def create_fleet(self, simulator, options):
+        start = time.perf_counter()
+        count, batch_size = options['satellites'], options['batch_size']
+        # A quarter of the fleet reports through batch URLs, each covering
+        # batch_size consecutive NORAD ids after those of the other satellites
+        batched = count // 4 if batch_size else 0
+        satellites = []
+        for i in range(count):
+            norad_id = FIRST_NORAD_ID + i
+            if i < count - batched:
+                response_format = SINGLE_FORMATS[i % len(SINGLE_FORMATS)]
+                api_url = simulator.url(i, response_format, norad_id)
+            else:
+                group = (i - (count - batched)) // batch_size
+                first = FIRST_NORAD_ID + count - batched + group * batch_size
+                last = min(first + batch_size, FIRST_NORAD_ID + count) - 1
+                response_format = 'positions-batch'
+                api_url = simulator.batch_url(group, first, last)
+            satellites.append(Satellite(
+                name=f'Bench satellite {norad_id}', search_name=f'bench satellite {norad_id}',
+                satellite_id=str(norad_id),
+                api_url=api_url, response_format=response_format,
+            ))
+        Satellite.objects.bulk_create(satellites, batch_size=500)
+        satellite_ids = list(Satellite.objects.values_list('id', flat=True))
+
+        users = [User(username=f'bench-user-{i}') for i in range(options['users'])]
+        for user in users:
+            user.set_unusable_password()
+        User.objects.bulk_create(users, batch_size=500)
+        self.users = list(User.objects.filter(username__startswith='bench-user-'))
+
+        per_user = min(options['selections_per_user'], len(satellite_ids))
+        UserSatelliteSelection.objects.bulk_create(
+            [
+                UserSatelliteSelection(user=user, satellite_id=satellite_id)
+                for user in self.users
+                for satellite_id in self.random.sample(satellite_ids, per_user)
+            ],
+            batch_size=1000,
+        )
+        return {
+            'satellites': len(satellite_ids),
+            'tracked_satellites': UserSatelliteSelection.objects.values('satellite').distinct().count(),
+            'users': len(self.users),
+            'selections': len(self.users) * per_user,
+            'setup_seconds': round(time.perf_counter() - start, 3),
+        }
+
+    def bench_ingest(self, simulator, cycles):
+        from tracker.satellite_service import fetch_and_save_satellite_positions
+        from tracker.upstream import response_cache, upstream_health
+
+        results = []
+        for _ in range(cycles):
+            # Start every cycle cold, like a real poll a minute after the last one
+            response_cache.clear()
+            upstream_health.clear()
+            requests, failures = simulator.requests, simulator.failures
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                rows = fetch_and_save_satellite_positions()
+            elapsed = time.perf_counter() - start
+            results.append({
+                'seconds': round(elapsed, 3),
+                'rows': rows,
+                'rows_per_second': round(rows / elapsed, 1),
+                'upstream_requests': simulator.requests - requests,
+                'upstream_failures': simulator.failures - failures,
+            })
+            # Fixes carry whole-second timestamps: keep cycles in distinct seconds
+            time.sleep(max(0.0, 1.0 - elapsed))
+
+        total_seconds = sum(cycle['seconds'] for cycle in results)
+        return {
+            'cycles': results,
+            'cycle_seconds_median': statistics.median(cycle['seconds'] for cycle in results),
+            'rows_per_second': round(sum(cycle['rows'] for cycle in results) / total_seconds, 1),
+        }
+
+    def bench_api(self, path, count):
+        client = Client()
+        tokens = {}
+        latencies, errors = [], 0
+        for _ in range(count):
+            user = self.random.choice(self.users)
+            if user.id not in tokens:
+                tokens[user.id] = str(AccessToken.for_user(user))
+            start = time.perf_counter()
+            response = client.get(path, HTTP_AUTHORIZATION=f'Bearer {tokens[user.id]}')
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+        return {
+            'requests': count,
+            'errors': errors,
+            'p50_ms': round(percentile(latencies, 0.5), 3),
+            'p99_ms': round(percentile(latencies, 0.99), 3),
+            'mean_ms': round(statistics.fmean(latencies), 3),
+            'max_ms': round(max(latencies), 3),
+        }
+
+    def print_summary(self, report):
+        fleet, ingest = report['fleet'], report['ingest']
+        self.stdout.write(
+            f"Fleet: {fleet['satellites']} satellites ({fleet['tracked_satellites']} tracked), "
+            f"{fleet['users']} users, {fleet['selections']} selections"
+        )
+        for i, cycle in enumerate(ingest['cycles'], 1):
+            self.stdout.write(
+                f"Ingest cycle {i}: {cycle['seconds']:.3f}s, {cycle['rows']} rows "
+                f"({cycle['rows_per_second']:.0f} rows/s), {cycle['upstream_requests']} upstream requests, "
+                f"{cycle['upstream_failures']} failed"
+            )
+        for path, api in report['api'].items():
+            self.stdout.write(
+                f"GET {path}: p50 {api['p50_ms']:.2f} ms, p99 {api['p99_ms']:.2f} ms, "
+                f"max {api['max_ms']:.2f} ms over {api['requests']} requests ({api['errors']} errors)"
+            )
+        self.stdout.write(f"Peak RSS: {report['peak_rss_mb']['api']} MB")
@@ -11,11 +11,20 @@ class Command(BaseCommand):
                 'name': 'ISS (International Space Station)',
                 'satellite_id': '25544',
                 'api_url': 'https://api.wheretheiss.at/v1/satellites/25544',
+                'response_format': 'wheretheiss',
             },
             {
                 'name': 'Hubble Space Telescope',
                 'satellite_id': '20580',
                 'api_url': 'https://api.satellitemap.space/v1/20580/position',
+                'response_format': 'satellitemap',
             },
         ]
-        
\ No newline at end of file
+        
+        for data in satellites:
+            satellite, created = Satellite.objects.update_or_create(
+                satellite_id=data['satellite_id'],
+                defaults=data,
+            )
+            action = 'Created' if created else 'Updated'
+            self.stdout.write(self.style.SUCCESS(f"{action} satellite: {satellite.name}"))
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.models import Satellite
+from tracker.propagation import load_element_sets
+
+
+class Command(BaseCommand):
+    help = 'Store TLE/OMM element sets on the satellites with the same NORAD id, for pass prediction'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', default=None,
+            help='Element set file or directory (default: TRACKER_ELEMENTS_PATH)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path'] or settings.TRACKER_ELEMENTS_PATH
+        try:
+            element_sets = {element_set.norad_id: element_set for element_set in load_element_sets(path)}
+        except OSError as e:
+            raise CommandError(f"Cannot read element sets from {path}: {e}")
+
+        updated = []
+        for satellite in Satellite.objects.filter(satellite_id__in=element_sets):
+            element_set = element_sets[satellite.satellite_id]
+            # Keep the stored elements when they are as recent
+            if satellite.elements_epoch is not None and satellite.elements_epoch >= element_set.epoch:
+                continue
+            satellite.set_elements(element_set)
+            updated.append(satellite)
+        Satellite.objects.bulk_update(updated, ['tle_line1', 'tle_line2', 'elements_epoch'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated elements of {len(updated)} satellites from {len(element_sets)} element sets"
+        ))
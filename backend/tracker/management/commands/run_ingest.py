@@ -0,0 +1,91 @@
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from tracker.ingest import IngestLock
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the satellite ingest scheduler. Only one worker per deployment '
+        'ingests at a time; the others stand by and take over when it stops.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check-interval', type=float, default=10,
+            help='Seconds between leadership checks, and between attempts while on standby',
+        )
+        parser.add_argument(
+            '--metrics-port', type=int, default=None,
+            help='Port serving ingest metrics in the Prometheus text format '
+                 '(default: TRACKER_INGEST_METRICS_PORT, 0 disables it)',
+        )
+        parser.add_argument(
+            '--metrics-address', default=None,
+            help='Address the ingest metrics are served on '
+                 '(default: TRACKER_INGEST_METRICS_ADDRESS)',
+        )
+
+    def handle(self, *args, **options):
+        interval = options['check_interval']
+        stop = threading.Event()
+
+        def request_stop(signum, frame):
+            self.stdout.write(f"Received signal {signum}, stopping ingest...")
+            stop.set()
+
+        signal.signal(signal.SIGTERM, request_stop)
+        signal.signal(signal.SIGINT, request_stop)
+
+        metrics_port = options['metrics_port']
+        if metrics_port is None:
+            metrics_port = settings.TRACKER_INGEST_METRICS_PORT
+        metrics_address = options['metrics_address']
+        if metrics_address is None:
+            metrics_address = settings.TRACKER_INGEST_METRICS_ADDRESS
+        metrics_server = None
+        if metrics_port and not settings.TRACKER_METRICS_TOKEN:
+            self.stderr.write('Not serving ingest metrics: TRACKER_METRICS_TOKEN is not set.')
+        elif metrics_port:
+            from tracker.metrics import serve_metrics
+            try:
+                metrics_server = serve_metrics(
+                    metrics_port, address=metrics_address, token=settings.TRACKER_METRICS_TOKEN
+                )
+                self.stdout.write(f"Serving ingest metrics on {metrics_address}:{metrics_port}.")
+            except OSError as e:
+                # e.g. another worker on this host already serves the port
+                self.stderr.write(f"Not serving ingest metrics on port {metrics_port}: {e}")
+
+        lock = IngestLock()
+        announced_standby = False
+        while not stop.is_set():
+            if not lock.acquire():
+                if not announced_standby:
+                    self.stdout.write('Another ingest worker is running; standing by.')
+                    announced_standby = True
+                stop.wait(interval)
+                continue
+            announced_standby = False
+
+            # Imported here so standby workers never load the fetch stack
+            from tracker.scheduler import start_scheduler
+            self.stdout.write(self.style.SUCCESS('Acquired the ingest lock; starting the scheduler.'))
+            scheduler = start_scheduler()
+            try:
+                while not stop.wait(interval):
+                    if not lock.is_held():
+                        self.stderr.write('Lost the ingest lock; stopping the scheduler.')
+                        break
+            finally:
+                scheduler.shutdown(wait=True)
+                lock.release()
+                connection.close()
+
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        self.stdout.write('Ingest worker stopped.')
@@ -0,0 +1,86 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tracker.cache import invalidate_catalog
+from tracker.models import Satellite
+from tracker.propagation import load_element_sets
+
+
+class Command(BaseCommand):
+    help = (
+        'Create or update satellites from a TLE/OMM catalog file (or directory), in bulk. '
+        'New satellites get the catalog name and element set; existing ones get newer element sets.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Catalog file or directory, e.g. a CelesTrak group export')
+        parser.add_argument(
+            '--api-url', default=None,
+            help='api_url of new satellites, formatted with {norad_id} (default: TRACKER_CATALOG_API_URL)',
+        )
+        parser.add_argument(
+            '--response-format', default=None,
+            help='response_format of new satellites (default: TRACKER_CATALOG_RESPONSE_FORMAT)',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Satellites per upsert statement')
+
+    def handle(self, *args, **options):
+        api_url = options['api_url'] or settings.TRACKER_CATALOG_API_URL
+        response_format = options['response_format'] or settings.TRACKER_CATALOG_RESPONSE_FORMAT
+        try:
+            loaded = load_element_sets(options['path'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Cannot read the catalog {options['path']}: {e}")
+
+        # The newest element set of each object
+        element_sets, invalid = {}, 0
+        for element_set in loaded:
+            if element_set.satrec.error:
+                invalid += 1
+                continue
+            current = element_sets.get(element_set.norad_id)
+            if current is None or element_set.epoch > current.epoch:
+                element_sets[element_set.norad_id] = element_set
+
+        existing = {
+            satellite_id: (name, epoch)
+            for satellite_id, name, epoch in Satellite.objects.values_list('satellite_id', 'name', 'elements_epoch')
+        }
+        taken_names = {name for name, _ in existing.values()}
+
+        satellites, created = [], 0
+        for norad_id, element_set in element_sets.items():
+            if norad_id in existing:
+                name, epoch = existing[norad_id]
+                if epoch is not None and epoch >= element_set.epoch:
+                    continue
+            else:
+                # Names are unique, and catalogs repeat some (debris pieces)
+                name = (element_set.name or f"NORAD {norad_id}")[:100]
+                if name in taken_names:
+                    name = f"{name[:100 - len(norad_id) - 3]} ({norad_id})"
+                taken_names.add(name)
+                created += 1
+            satellite = Satellite(
+                name=name, search_name=name.lower(), satellite_id=norad_id,
+                api_url=api_url.format(norad_id=norad_id), response_format=response_format,
+            )
+            satellite.set_elements(element_set)
+            satellites.append(satellite)
+
+        # New satellites are inserted, and existing ones only get their
+        # elements updated: names, upstreams and activity are left alone.
+        Satellite.objects.bulk_create(
+            satellites, batch_size=options['batch_size'],
+            update_conflicts=True, unique_fields=['satellite_id'],
+            update_fields=['tle_line1', 'tle_line2', 'elements_epoch'],
+        )
+        # bulk_create sends no post_save, so the cached catalog pages are
+        # dropped here
+        invalidate_catalog()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Synced {len(element_sets)} catalog objects: created {created} satellites, "
+            f"updated the elements of {len(satellites) - created}"
+            + (f", skipped {invalid} invalid element sets" if invalid else '')
+        ))
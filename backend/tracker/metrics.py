@@ -0,0 +1,284 @@
+"""
+In-process metrics, rendered in the Prometheus text format at /metrics.
+
+Counters and histograms are plain Python objects guarded by a lock, so
+recording costs a dict lookup and a bisect. Every process keeps its own
+values: web processes serve them at /metrics, and the ingest worker from its
+own port (see manage.py run_ingest --metrics-port).
+"""
+import hmac
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# Seconds, from sub-millisecond queries to slow upstreams
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, extra=''):
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.label_names)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_samples(self, items):
+        for key, value in items:
+            yield f'{self.name}{format_labels(self.label_names, key)} {format_value(value)}'
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (not cumulative) counts, the sum and the count
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _render_samples(self, items):
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = format_labels(self.label_names, key, f'le="{format_value(bound)}"')
+                yield f'{self.name}_bucket{labels} {cumulative}'
+            labels = format_labels(self.label_names, key)
+            yield f'{self.name}_sum{labels} {format_value(total)}'
+            yield f'{self.name}_count{labels} {count}'
+
+
+class GaugeCallback(Metric):
+    """
+    A gauge read when rendered: `collect` returns {label values tuple: value}
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels, collect):
+        super().__init__(name, documentation, labels)
+        self.collect = collect
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for key, value in sorted(self.collect().items()):
+            lines.append(f'{self.name}{format_labels(self.label_names, key)} {format_value(value)}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+ingest_cycle_seconds = registry.register(Histogram(
+    'tracker_ingest_cycle_seconds', 'Duration of whole ingest cycles (one poll slot).',
+))
+ingest_phase_seconds = registry.register(Histogram(
+    'tracker_ingest_phase_seconds',
+    'Duration of ingest phases: select, propagate, group, parse, write, rollup, publish.',
+    labels=['phase'],
+))
+ingest_fixes = registry.register(Counter(
+    'tracker_ingest_fixes_total', 'Fixes saved by ingest.',
+))
+upstream_requests = registry.register(Counter(
+    'tracker_upstream_requests_total',
+    'Upstream URLs handled per host, by outcome: success, error, cached or skipped (backed off).',
+    labels=['host', 'outcome'],
+))
+upstream_request_seconds = registry.register(Histogram(
+    'tracker_upstream_request_seconds', 'Latency of upstream requests.', labels=['host'],
+))
+http_request_seconds = registry.register(Histogram(
+    'tracker_http_request_seconds', 'Latency of API requests.', labels=['view', 'method', 'status'],
+))
+http_db_queries = registry.register(Histogram(
+    'tracker_http_db_queries', 'Database queries per API request.', labels=['view'], buckets=COUNT_BUCKETS,
+))
+http_db_seconds = registry.register(Histogram(
+    'tracker_http_db_seconds', 'Time spent in database queries per API request.', labels=['view'],
+))
+
+
+def _upstream_backoff():
+    from .upstream import upstream_health
+    return {(host,): delay for host, (_, delay) in upstream_health.status().items()}
+
+
+registry.register(GaugeCallback(
+    'tracker_upstream_backoff_seconds', 'Seconds until a backed-off upstream host is retried.',
+    ['host'], _upstream_backoff,
+))
+
+
+# [queries, seconds] of the request being served, shared with the threads
+# its context is copied to
+_request_queries = ContextVar('tracker_request_queries', default=None)
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    Database execute wrapper adding each query to the current request's totals
+    """
+    totals = _request_queries.get()
+    if totals is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - start
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    connection_created handler: count the queries of every connection
+    """
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class MetricsMiddleware:
+    """
+    Record the latency and database queries of each request, labelled with
+    the name of the URL pattern it matched
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        totals = [0, 0.0]
+        token = _request_queries.set(totals)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        elapsed = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match is not None else 'unmatched'
+        http_request_seconds.observe(elapsed, view=view, method=request.method, status=response.status_code)
+        http_db_queries.observe(totals[0], view=view)
+        http_db_seconds.observe(totals[1], view=view)
+        return response
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        token = self.server.token
+        if not token:
+            self.send_empty(404)
+            return
+        if not hmac.compare_digest(self.headers.get('Authorization', ''), f'Bearer {token}'):
+            self.send_empty(401)
+            return
+        body = registry.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_empty(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, address='127.0.0.1', token=''):
+    """
+    Serve the metrics of this process on `address`:`port` from a daemon
+    thread, for processes outside the web server (the ingest worker).
+    Scrapers must send `Authorization: Bearer <token>`, as at /metrics, and
+    nothing is served without a token. Returns the server; call shutdown()
+    on it to stop.
+    """
+    server = ThreadingHTTPServer((address, port), MetricsHandler)
+    server.daemon_threads = True
+    server.token = token
+    threading.Thread(target=server.serve_forever, name='tracker-metrics', daemon=True).start()
+    return server
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:10
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def collapse_user_positions(apps, schema_editor):
+    """
+    Positions used to be fanned out into one identical row per tracking user.
+    Keep the oldest row of every (satellite, timestamp) fix and drop the copies,
+    in a single DELETE ... WHERE id NOT IN (SELECT MIN(id) ... GROUP BY ...).
+    """
+    SatellitePosition = apps.get_model('tracker', 'SatellitePosition')
+    keep_ids = (
+        SatellitePosition.objects.values('satellite_id', 'timestamp')
+        .annotate(keep_id=Min('id'))
+        .order_by()
+        .values('keep_id')
+    )
+    SatellitePosition.objects.exclude(id__in=keep_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(collapse_user_positions, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='satelliteposition',
+            name='tracker_sat_user_id_6b922a_idx',
+        ),
+        migrations.RemoveField(
+            model_name='satelliteposition',
+            name='user',
+        ),
+        migrations.AddIndex(
+            model_name='satelliteposition',
+            index=models.Index(fields=['satellite', '-timestamp'], name='tracker_sat_satelli_bb2578_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='satelliteposition',
+            constraint=models.UniqueConstraint(fields=('satellite', 'timestamp'), name='unique_satellite_fix'),
+        ),
+    ]
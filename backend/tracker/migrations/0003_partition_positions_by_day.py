@@ -0,0 +1,127 @@
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.apps.registry import Apps
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# The partition layout as of this migration, frozen here rather than read
+# from tracker.partitions so later changes there cannot alter it
+LEGACY_TABLE = 'tracker_satelliteposition_legacy'
+VIEW_NAME = 'tracker_satelliteposition'
+COLUMNS = ['id', 'satellite_id', 'timestamp', 'latitude', 'longitude', 'altitude', 'velocity', 'created_at']
+IDS_PER_PARTITION = 10 ** 9
+
+
+def partition_model(registry, day):
+    meta = type('Meta', (), {
+        'apps': registry,
+        'app_label': 'tracker',
+        'db_table': f'tracker_satelliteposition_p{day:%Y%m%d}',
+        'indexes': [models.Index(fields=['satellite_id', '-timestamp'], name=f'tracker_pos_{day:%Y%m%d}_idx')],
+        'constraints': [models.UniqueConstraint(fields=['satellite_id', 'timestamp'], name=f'tracker_pos_{day:%Y%m%d}_fix')],
+    })
+    return type(f'SatellitePositionP{day:%Y%m%d}', (models.Model,), {
+        '__module__': __name__,
+        'id': models.BigAutoField(primary_key=True),
+        'satellite_id': models.BigIntegerField(),
+        'timestamp': models.DateTimeField(),
+        'latitude': models.FloatField(),
+        'longitude': models.FloatField(),
+        'altitude': models.FloatField(null=True, blank=True),
+        'velocity': models.FloatField(null=True, blank=True),
+        'created_at': models.DateTimeField(auto_now_add=True),
+        'Meta': meta,
+    })
+
+
+def create_partition(schema_editor, registry, day):
+    """
+    Create a day's partition, numbering its rows from the day's block of ids
+    """
+    connection = schema_editor.connection
+    model = partition_model(registry, day)
+    table = model._meta.db_table
+    schema_editor.create_model(model)
+    start = day.toordinal() * IDS_PER_PARTITION
+    if connection.vendor == 'sqlite':
+        schema_editor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, start])
+    elif connection.vendor == 'postgresql':
+        schema_editor.execute(f"ALTER TABLE {connection.ops.quote_name(table)} ALTER COLUMN id RESTART WITH {start + 1:d}")
+    return table
+
+
+def move_positions_into_partitions(apps, schema_editor):
+    """
+    Copy existing fixes into one table per UTC day, then replace the original
+    table with the view spanning every partition.
+    """
+    SatellitePosition = apps.get_model('tracker', 'SatellitePosition')
+    connection = schema_editor.connection
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(column) for column in COLUMNS)
+
+    days = [
+        value.date() for value in SatellitePosition.objects.using(connection.alias)
+        .order_by().datetimes('timestamp', 'day', tzinfo=dt_timezone.utc)
+    ]
+    schema_editor.alter_db_table(SatellitePosition, VIEW_NAME, LEGACY_TABLE)
+
+    # Keep the view valid with an empty partition for today
+    registry = Apps()
+    tables = []
+    for day in days or [datetime.now(dt_timezone.utc).date()]:
+        table = create_partition(schema_editor, registry, day)
+        tables.append(table)
+        start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+        schema_editor.execute(
+            f"INSERT INTO {qn(table)} ({columns}) "
+            f"SELECT {columns} FROM {qn(LEGACY_TABLE)} "
+            f"WHERE {qn('timestamp')} >= %s AND {qn('timestamp')} < %s",
+            [
+                connection.ops.adapt_datetimefield_value(start),
+                connection.ops.adapt_datetimefield_value(start + timedelta(days=1)),
+            ],
+        )
+
+    schema_editor.execute(schema_editor.sql_delete_table % {'table': qn(LEGACY_TABLE)})
+    select = ' UNION ALL '.join(f"SELECT {columns} FROM {qn(table)}" for table in tables)
+    schema_editor.execute(f"CREATE VIEW {qn(VIEW_NAME)} AS {select}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0002_shared_satellite_positions'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(move_positions_into_partitions),
+            ],
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='satelliteposition',
+                    name='tracker_sat_satelli_bb2578_idx',
+                ),
+                migrations.RemoveConstraint(
+                    model_name='satelliteposition',
+                    name='unique_satellite_fix',
+                ),
+                migrations.AlterField(
+                    model_name='satelliteposition',
+                    name='satellite',
+                    field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='positions', to='tracker.satellite'),
+                ),
+                migrations.AlterModelOptions(
+                    name='satelliteposition',
+                    options={'managed': False, 'ordering': ['-timestamp']},
+                ),
+                migrations.AlterModelTable(
+                    name='satelliteposition',
+                    table='tracker_satelliteposition',
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:22
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def build_track_points(positions, TrackPoint, resolutions):
+    """
+    One track point per satellite, resolution and bucket: the first of the
+    positions (oldest first) falling in it
+    """
+    points = {}
+    for position in positions:
+        seconds = int(position.timestamp.timestamp())
+        for resolution in resolutions:
+            bucket = datetime.fromtimestamp(seconds - seconds % resolution, tz=dt_timezone.utc)
+            key = (position.satellite_id, resolution, bucket)
+            if key not in points:
+                points[key] = TrackPoint(
+                    satellite_id=position.satellite_id, resolution=resolution, bucket=bucket,
+                    timestamp=position.timestamp, latitude=position.latitude,
+                    longitude=position.longitude, altitude=position.altitude,
+                )
+    return list(points.values())
+
+
+def backfill_track_points(apps, schema_editor):
+    """
+    Roll up the fixes already stored, oldest first, so each bucket keeps its
+    first fix just as it would have at ingest
+    """
+    SatellitePosition = apps.get_model('tracker', 'SatellitePosition')
+    TrackPoint = apps.get_model('tracker', 'TrackPoint')
+    resolutions = getattr(settings, 'TRACKER_TRACK_RESOLUTIONS', [60, 600, 3600])
+    batch = []
+    for position in SatellitePosition.objects.order_by('timestamp').iterator(chunk_size=5000):
+        batch.append(position)
+        if len(batch) == 5000:
+            TrackPoint.objects.bulk_create(build_track_points(batch, TrackPoint, resolutions), ignore_conflicts=True)
+            batch = []
+    if batch:
+        TrackPoint.objects.bulk_create(build_track_points(batch, TrackPoint, resolutions), ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0003_partition_positions_by_day'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TrackPoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.PositiveIntegerField()),
+                ('bucket', models.DateTimeField()),
+                ('timestamp', models.DateTimeField()),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('altitude', models.FloatField(blank=True, null=True)),
+                ('satellite', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='track_points', to='tracker.satellite')),
+            ],
+            options={
+                'ordering': ['bucket'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='trackpoint',
+            constraint=models.UniqueConstraint(fields=('satellite', 'resolution', 'bucket'), name='unique_track_bucket'),
+        ),
+        migrations.RunPython(backfill_track_points, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:23
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0004_track_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='satellite',
+            name='poll_interval',
+            field=models.PositiveIntegerField(default=60, help_text='Seconds between fixes', validators=[django.core.validators.MinValueValidator(5)]),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:26
+
+from django.db import migrations, models
+import tracker.models
+
+
+# Formats of the upstreams the tracker used to detect by probing each response
+KNOWN_HOSTS = {
+    'api.open-notify.org': 'open-notify',
+    'api.wheretheiss.at': 'wheretheiss',
+    'api.satellitemap.space': 'satellitemap',
+}
+
+
+def declare_known_formats(apps, schema_editor):
+    """
+    Resolve the response format of existing satellites from their API host
+    """
+    Satellite = apps.get_model('tracker', 'Satellite')
+    for host, response_format in KNOWN_HOSTS.items():
+        Satellite.objects.filter(api_url__contains=f"//{host}/").update(response_format=response_format)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0005_satellite_poll_interval'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='satellite',
+            name='response_format',
+            field=models.CharField(default='auto', help_text='Upstream response format, see tracker.parsers', max_length=50, validators=[tracker.models.validate_response_format]),
+        ),
+        migrations.RunPython(declare_known_formats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0006_satellite_response_format'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersatelliteselection',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['satellite'], name='tracker_active_sel_sat_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usersatelliteselection',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['user', 'selected_at'], name='tracker_active_sel_user_idx'),
+        ),
+    ]
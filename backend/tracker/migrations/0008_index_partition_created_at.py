@@ -0,0 +1,34 @@
+import re
+
+from django.db import migrations
+
+
+PARTITION_PATTERN = re.compile(r'^tracker_satelliteposition_p(\d{8})$')
+
+
+def index_created_at(apps, schema_editor):
+    """
+    Partitions created from now on index created_at; add the index to the
+    existing ones that lack it
+    """
+    connection = schema_editor.connection
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        for table in connection.introspection.table_names(cursor):
+            match = PARTITION_PATTERN.match(table)
+            if not match:
+                continue
+            name = f"tracker_pos_{match.group(1)}_new"
+            if name not in connection.introspection.get_constraints(cursor, table):
+                schema_editor.execute(f"CREATE INDEX {qn(name)} ON {qn(table)} ({qn('created_at')})")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0007_active_selection_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_created_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-18 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0008_index_partition_created_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='satellite',
+            name='elements_epoch',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='satellite',
+            name='tle_line1',
+            field=models.CharField(blank=True, max_length=69),
+        ),
+        migrations.AddField(
+            model_name='satellite',
+            name='tle_line2',
+            field=models.CharField(blank=True, max_length=69),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:02
+
+from django.db import migrations, models
+
+
+def fill_search_names(apps, schema_editor):
+    Satellite = apps.get_model('tracker', 'Satellite')
+    satellites = list(Satellite.objects.only('id', 'name'))
+    for satellite in satellites:
+        satellite.search_name = satellite.name.lower()
+    Satellite.objects.bulk_update(satellites, ['search_name'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0009_satellite_elements'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='satellite',
+            name='search_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_search_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='satellite',
+            index=models.Index(fields=['is_active', 'search_name'], name='tracker_sat_active_name_idx'),
+        ),
+    ]
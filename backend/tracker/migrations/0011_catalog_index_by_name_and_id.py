@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-18 05:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tracker', '0010_satellite_search_name'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='satellite',
+            name='tracker_sat_active_name_idx',
+        ),
+        migrations.AddIndex(
+            model_name='satellite',
+            index=models.Index(fields=['is_active', 'search_name', 'id'], name='tracker_sat_active_name_id_idx'),
+        ),
+    ]
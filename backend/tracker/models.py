@@ -1,23 +1,93 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
+
+
+# Shortest supported poll interval, in seconds
+MIN_POLL_INTERVAL = 5
+
+
+def validate_response_format(value):
+    from .parsers import PARSERS
+    if value not in PARSERS:
+        raise ValidationError(f"Unknown response format {value!r}; known formats: {', '.join(sorted(PARSERS))}")
 
 class Satellite(models.Model):
     name = models.CharField(max_length=100, unique=True)
+    # Lower-cased name, for the catalog's case-insensitive prefix search
+    search_name = models.CharField(max_length=100, db_index=True, editable=False, default='')
     satellite_id = models.CharField(max_length=50, unique=True)
     api_url = models.URLField()
     is_active = models.BooleanField(default=True)
+    response_format = models.CharField(
+        max_length=50, default='auto', validators=[validate_response_format],
+        help_text='Upstream response format, see tracker.parsers'
+    )
+    poll_interval = models.PositiveIntegerField(
+        default=60, validators=[MinValueValidator(MIN_POLL_INTERVAL)],
+        help_text='Seconds between fixes'
+    )
+    # Orbital elements used for pass prediction (see tracker.passes)
+    tle_line1 = models.CharField(max_length=69, blank=True)
+    tle_line2 = models.CharField(max_length=69, blank=True)
+    elements_epoch = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return self.name
     
+    def save(self, *args, **kwargs):
+        self.search_name = self.name.lower()
+        if kwargs.get('update_fields') is not None and 'name' in kwargs['update_fields']:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'search_name'}
+        super().save(*args, **kwargs)
+    
+    def clean(self):
+        if bool(self.tle_line1) != bool(self.tle_line2):
+            raise ValidationError('Both TLE lines are required')
+        element_set = self.element_set()
+        if element_set is not None and element_set.satrec.error:
+            raise ValidationError('The TLE lines could not be parsed')
+        self.elements_epoch = element_set.epoch if element_set is not None else None
+    
+    def element_set(self):
+        """
+        The stored orbital elements as a propagation.ElementSet, or None
+        """
+        if not (self.tle_line1 and self.tle_line2):
+            return None
+        from .propagation import ElementSet
+        return ElementSet.from_tle(self.tle_line1, self.tle_line2, self.name)
+    
+    def set_elements(self, element_set):
+        """
+        Store an element set (from a TLE or OMM record) on the satellite
+        """
+        from sgp4.exporter import export_tle
+        self.tle_line1, self.tle_line2 = export_tle(element_set.satrec)
+        self.elements_epoch = element_set.epoch
+    
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Active catalog pages in (search_name, id) order
+            models.Index(fields=['is_active', 'search_name', 'id'], name='tracker_sat_active_name_id_idx'),
+        ]
 
 
 class SatellitePosition(models.Model):
-    satellite = models.ForeignKey(Satellite, on_delete=models.CASCADE, related_name='positions')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tracked_positions')
+    """
+    A single fix of a satellite. Positions are shared by every user tracking
+    the satellite; visibility comes from UserSatelliteSelection at read time.
+
+    Rows are stored in one table per UTC day and this model reads them through
+    a view spanning every partition, so it is read-only: write new fixes with
+    tracker.partitions.insert_positions().
+    """
+    satellite = models.ForeignKey(
+        Satellite, on_delete=models.DO_NOTHING, db_constraint=False, related_name='positions'
+    )
     timestamp = models.DateTimeField()
     latitude = models.FloatField()
     longitude = models.FloatField()
@@ -29,9 +99,31 @@ class SatellitePosition(models.Model):
         return f"{self.satellite.name} - {self.timestamp}"
     
     class Meta:
+        managed = False
+        db_table = 'tracker_satelliteposition'
         ordering = ['-timestamp']
-        indexes = [
-            models.Index(fields=['user', 'satellite', '-timestamp']),
+
+
+class TrackPoint(models.Model):
+    """
+    One point of a satellite's downsampled ground track: the first fix seen in
+    each `resolution`-second bucket. Maintained at ingest by tracker.tracks.
+    """
+    satellite = models.ForeignKey(Satellite, on_delete=models.CASCADE, related_name='track_points')
+    resolution = models.PositiveIntegerField()
+    bucket = models.DateTimeField()
+    timestamp = models.DateTimeField()
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    altitude = models.FloatField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.satellite.name} - {self.bucket} ({self.resolution}s)"
+    
+    class Meta:
+        ordering = ['bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['satellite', 'resolution', 'bucket'], name='unique_track_bucket'),
         ]
 
 
@@ -44,6 +136,12 @@ class UserSatelliteSelection(models.Model):
     class Meta:
         unique_together = ['user', 'satellite']
         ordering = ['selected_at']
+        indexes = [
+            # Only active selections are ever looked up: the ingest job's
+            # tracked satellites, and each user's current selections
+            models.Index(fields=['satellite'], condition=models.Q(is_active=True), name='tracker_active_sel_sat_idx'),
+            models.Index(fields=['user', 'selected_at'], condition=models.Q(is_active=True), name='tracker_active_sel_user_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.satellite.name}"
\ No newline at end of file
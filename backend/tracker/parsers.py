@@ -0,0 +1,176 @@
+"""
+Upstream response parsers.
+
+Each response format is declared as a schema mapping fix fields to dotted
+paths into the decoded JSON, and compiled once into a ResponseParser. A
+Satellite names its format in response_format, so responses are parsed
+without probing. Batch formats carry many satellites in one response: `items`
+is the path of the list and `id` the NORAD id field of each item.
+Extra formats can be registered with register_format().
+"""
+from datetime import datetime, timezone as dt_timezone
+from operator import itemgetter
+
+
+FIELDS = ('latitude', 'longitude', 'altitude', 'velocity', 'timestamp')
+REQUIRED_FIELDS = ('latitude', 'longitude', 'timestamp')
+
+FORMATS = {
+    # http://api.open-notify.org/iss-now.json
+    'open-notify': {
+        'latitude': 'iss_position.latitude',
+        'longitude': 'iss_position.longitude',
+        'timestamp': 'timestamp',
+        'timestamp_format': 'epoch',
+    },
+    # https://api.wheretheiss.at/v1/satellites/<norad id>
+    'wheretheiss': {
+        'latitude': 'latitude',
+        'longitude': 'longitude',
+        'altitude': 'altitude',
+        'velocity': 'velocity',
+        'timestamp': 'timestamp',
+        'timestamp_format': 'epoch',
+    },
+    # https://api.satellitemap.space/v1/<norad id>/position
+    'satellitemap': {
+        'latitude': 'lat',
+        'longitude': 'lon',
+        'altitude': 'alt',
+        'timestamp': 'timestamp',
+        'timestamp_format': 'iso',
+    },
+    # Any batch endpoint answering {"positions": [{"norad_id": ..., ...}, ...]}
+    'positions-batch': {
+        'items': 'positions',
+        'id': 'norad_id',
+        'latitude': 'latitude',
+        'longitude': 'longitude',
+        'altitude': 'altitude',
+        'velocity': 'velocity',
+        'timestamp': 'timestamp',
+        'timestamp_format': 'epoch',
+    },
+}
+
+
+def _compile_path(path):
+    """
+    Compile a dotted path into a getter for a decoded JSON document
+    """
+    keys = path.split('.')
+    if len(keys) == 1:
+        return itemgetter(keys[0])
+    getters = [itemgetter(key) for key in keys]
+
+    def get(data):
+        for getter in getters:
+            data = getter(data)
+        return data
+    return get
+
+
+def _epoch(value):
+    return datetime.fromtimestamp(int(value), tz=dt_timezone.utc)
+
+
+def _iso(value):
+    # fromisoformat() only accepts a 'Z' suffix from Python 3.11
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=dt_timezone.utc)
+
+
+TIMESTAMP_CONVERTERS = {'epoch': _epoch, 'iso': _iso}
+
+
+class ResponseParser:
+    """
+    A response format compiled from its schema
+    """
+
+    def __init__(self, name, schema):
+        missing = [field for field in REQUIRED_FIELDS if field not in schema]
+        if missing:
+            raise ValueError(f"Response format {name!r} does not map {', '.join(missing)}")
+        self.name = name
+        self.batch = 'items' in schema
+        self._items = _compile_path(schema['items']) if self.batch else None
+        self._id = _compile_path(schema['id']) if self.batch else None
+        self._required = [(field, _compile_path(schema[field])) for field in REQUIRED_FIELDS if field != 'timestamp']
+        self._optional = [
+            (field, _compile_path(schema[field])) for field in ('altitude', 'velocity') if field in schema
+        ]
+        self._timestamp = _compile_path(schema['timestamp'])
+        self._convert_timestamp = TIMESTAMP_CONVERTERS[schema.get('timestamp_format', 'epoch')]
+
+    def parse_fix(self, item):
+        """
+        Parse one fix into a dict of FIELDS
+        """
+        fix = {field: float(get(item)) for field, get in self._required}
+        for field, get in self._optional:
+            try:
+                value = get(item)
+            except (KeyError, IndexError, TypeError):
+                value = None
+            fix[field] = None if value is None else float(value)
+        fix.setdefault('altitude', None)
+        fix.setdefault('velocity', None)
+        fix['timestamp'] = self._convert_timestamp(self._timestamp(item))
+        return fix
+
+    def parse(self, data):
+        """
+        Parse a decoded response into {norad id: fix}. Single-satellite
+        formats return their only fix under the key None.
+        """
+        if not self.batch:
+            return {None: self.parse_fix(data)}
+        fixes = {}
+        for item in self._items(data):
+            try:
+                fixes[str(self._id(item))] = self.parse_fix(item)
+            except (KeyError, IndexError, TypeError, ValueError):
+                # One malformed entry must not lose the rest of the batch
+                continue
+        return fixes
+
+
+class AutoParser:
+    """
+    Fallback for satellites without a declared format: detects the format by
+    probing the response, as older versions did for every response
+    """
+    name = 'auto'
+    batch = False
+
+    def parse(self, data):
+        if 'iss_position' in data:
+            return PARSERS['open-notify'].parse(data)
+        if 'latitude' in data:
+            return PARSERS['wheretheiss'].parse(data)
+        if 'lat' in data:
+            return PARSERS['satellitemap'].parse(data)
+        raise ValueError('Unknown API response format')
+
+
+PARSERS = {'auto': AutoParser()}
+
+
+def register_format(name, schema):
+    """
+    Compile and register a response format
+    """
+    PARSERS[name] = ResponseParser(name, schema)
+    return PARSERS[name]
+
+
+def get_parser(name):
+    try:
+        return PARSERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown response format {name!r}")
+
+
+for _name, _schema in FORMATS.items():
+    register_format(_name, _schema)
@@ -0,0 +1,290 @@
+"""
+Day-partitioned storage of satellite positions.
+
+Fixes are written to one physical table per UTC day
+(``tracker_satelliteposition_pYYYYMMDD``). ``tracker_satelliteposition`` is a
+view that UNIONs every partition, so the unmanaged SatellitePosition model reads
+across partitions transparently. Retention drops whole partitions instead of
+deleting rows.
+"""
+import re
+import threading
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.apps.registry import Apps
+from django.db import DatabaseError, connection, models, transaction
+from django.utils import timezone
+
+
+VIEW_NAME = 'tracker_satelliteposition'
+PARTITION_PREFIX = 'tracker_satelliteposition_p'
+PARTITION_PATTERN = re.compile(r'^tracker_satelliteposition_p(\d{8})$')
+COLUMNS = ['id', 'satellite_id', 'timestamp', 'latitude', 'longitude', 'altitude', 'velocity', 'created_at']
+
+# Each partition numbers its rows from day.toordinal() * IDS_PER_PARTITION, so
+# ids stay unique across the view
+IDS_PER_PARTITION = 10 ** 9
+
+# Partition models live in their own registry so they never show up in
+# migrations or the admin
+partition_apps = Apps()
+
+_models = {}
+_partitions = None
+_lock = threading.RLock()
+
+
+def partition_table(day):
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def partition_day(timestamp):
+    return timestamp.astimezone(dt_timezone.utc).date()
+
+
+def day_bounds(day):
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def partition_model(day):
+    """
+    Return the model class for a day's partition table
+    """
+    with _lock:
+        model = _models.get(day)
+        if model is None:
+            table = partition_table(day)
+            meta = type('Meta', (), {
+                'apps': partition_apps,
+                'app_label': 'tracker',
+                'db_table': table,
+                'indexes': [
+                    models.Index(fields=['satellite_id', '-timestamp'], name=f'tracker_pos_{day:%Y%m%d}_idx'),
+                    # Lets web processes find newly stored fixes (see tracker.relay)
+                    models.Index(fields=['created_at'], name=f'tracker_pos_{day:%Y%m%d}_new'),
+                ],
+                'constraints': [models.UniqueConstraint(fields=['satellite_id', 'timestamp'], name=f'tracker_pos_{day:%Y%m%d}_fix')],
+            })
+            model = type(f'SatellitePositionP{day:%Y%m%d}', (models.Model,), {
+                '__module__': __name__,
+                'id': models.BigAutoField(primary_key=True),
+                'satellite_id': models.BigIntegerField(),
+                'timestamp': models.DateTimeField(),
+                'latitude': models.FloatField(),
+                'longitude': models.FloatField(),
+                'altitude': models.FloatField(null=True, blank=True),
+                'velocity': models.FloatField(null=True, blank=True),
+                'created_at': models.DateTimeField(auto_now_add=True),
+                'Meta': meta,
+            })
+            _models[day] = model
+        return model
+
+
+def list_partitions(refresh=False):
+    """
+    Return the sorted days that currently have a partition table
+    """
+    global _partitions
+    with _lock:
+        if _partitions is None or refresh:
+            days = set()
+            for table in connection.introspection.table_names():
+                match = PARTITION_PATTERN.match(table)
+                if match:
+                    days.add(datetime.strptime(match.group(1), '%Y%m%d').date())
+            _partitions = days
+        return sorted(_partitions)
+
+
+def rebuild_view():
+    """
+    (Re)create the view over every partition
+    """
+    days = list_partitions()
+    if not days:
+        # Keep the view valid with an empty partition for today
+        ensure_partition(datetime.now(dt_timezone.utc).date())
+        return
+
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(column) for column in COLUMNS)
+    select = ' UNION ALL '.join(f"SELECT {columns} FROM {qn(partition_table(day))}" for day in days)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"CREATE OR REPLACE VIEW {qn(VIEW_NAME)} AS {select}")
+        else:
+            cursor.execute(f"DROP VIEW IF EXISTS {qn(VIEW_NAME)}")
+            cursor.execute(f"CREATE VIEW {qn(VIEW_NAME)} AS {select}")
+
+
+def _run_schema_operation(operation):
+    """
+    Run a schema editor operation without entering the editor. Partitions have
+    no foreign keys, so the SQLite editor's constraint-check toggling is not
+    needed, and skipping it lets partitions be created inside a transaction.
+    """
+    editor = connection.schema_editor(atomic=False)
+    editor.deferred_sql = []
+    operation(editor)
+    for sql in editor.deferred_sql:
+        editor.execute(sql)
+
+
+def _seed_ids(model, day):
+    table = model._meta.db_table
+    start = day.toordinal() * IDS_PER_PARTITION
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute("INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)", [table, start])
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f"ALTER TABLE {connection.ops.quote_name(table)} ALTER COLUMN id RESTART WITH {start + 1:d}"
+            )
+
+
+def ensure_partition(day):
+    """
+    Create the partition for a day if it does not exist yet, returning its model
+    """
+    model = partition_model(day)
+    with _lock:
+        if day in list_partitions():
+            return model
+        # Another process may have created it since we last looked
+        if day in list_partitions(refresh=True):
+            return model
+        try:
+            with transaction.atomic():
+                _run_schema_operation(lambda editor: editor.create_model(model))
+                _seed_ids(model, day)
+                _partitions.add(day)
+                rebuild_view()
+        except DatabaseError:
+            if day not in list_partitions(refresh=True):
+                raise
+    return model
+
+
+def drop_partition(day):
+    """
+    Drop a day's partition. The view is rebuilt first, since some databases
+    refuse to drop a table a view still depends on.
+    """
+    with _lock:
+        if day not in list_partitions(refresh=True):
+            return False
+        _partitions.discard(day)
+        table = connection.ops.quote_name(partition_table(day))
+        with transaction.atomic():
+            rebuild_view()
+            _run_schema_operation(lambda editor: editor.execute(editor.sql_delete_table % {'table': table}))
+        _models.pop(day, None)
+        return True
+
+
+def drop_partitions_before(cutoff_day):
+    """
+    Drop every partition older than cutoff_day, returning the dropped days
+    """
+    dropped = []
+    for day in list_partitions(refresh=True):
+        if day < cutoff_day and drop_partition(day):
+            dropped.append(day)
+    return dropped
+
+
+STAGING_TABLE = 'tracker_position_staging'
+COPY_COLUMNS = ['satellite_id', 'timestamp', 'latitude', 'longitude', 'altitude', 'velocity']
+
+
+def _copy_positions(model, positions):
+    """
+    Bulk load fixes into a partition on PostgreSQL: COPY them into a session
+    temporary table, then move them over with ON CONFLICT DO NOTHING, which
+    COPY alone cannot do
+    """
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(column) for column in COPY_COLUMNS)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE IF NOT EXISTS {qn(STAGING_TABLE)} ("
+            f"{qn('satellite_id')} bigint, {qn('timestamp')} timestamptz, "
+            f"{qn('latitude')} double precision, {qn('longitude')} double precision, "
+            f"{qn('altitude')} double precision, {qn('velocity')} double precision"
+            f") ON COMMIT DELETE ROWS"
+        )
+        cursor.execute(f"TRUNCATE {qn(STAGING_TABLE)}")
+        with cursor.cursor.copy(f"COPY {qn(STAGING_TABLE)} ({columns}) FROM STDIN") as copy:
+            for position in positions:
+                copy.write_row((
+                    position.satellite_id, position.timestamp, position.latitude,
+                    position.longitude, position.altitude, position.velocity,
+                ))
+        cursor.execute(
+            f"INSERT INTO {qn(model._meta.db_table)} ({columns}, {qn('created_at')}) "
+            f"SELECT {columns}, now() FROM {qn(STAGING_TABLE)} "
+            f"ON CONFLICT ({qn('satellite_id')}, {qn('timestamp')}) DO NOTHING"
+        )
+
+
+def _executemany_positions(model, positions):
+    """
+    Insert fixes into a partition on SQLite as one prepared statement run
+    over every row, without building a model instance per fix
+    """
+    qn = connection.ops.quote_name
+    adapt = connection.ops.adapt_datetimefield_value
+    columns = COPY_COLUMNS + ['created_at']
+    created_at = adapt(timezone.now())
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR IGNORE INTO {qn(model._meta.db_table)} ({', '.join(qn(column) for column in columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})",
+            [
+                (
+                    position.satellite_id, adapt(position.timestamp), position.latitude,
+                    position.longitude, position.altitude, position.velocity, created_at,
+                )
+                for position in positions
+            ],
+        )
+
+
+def insert_positions(positions, batch_size=None):
+    """
+    Write SatellitePosition objects into their day partitions. Fixes already
+    stored for the same satellite and timestamp are skipped. On PostgreSQL
+    (with psycopg 3) the rows are loaded with COPY, and on SQLite with a
+    single executemany.
+    """
+    by_day = {}
+    for position in positions:
+        by_day.setdefault(partition_day(position.timestamp), []).append(position)
+
+    use_copy = connection.vendor == 'postgresql' and connection.Database.__name__ == 'psycopg'
+    for day, day_positions in by_day.items():
+        model = ensure_partition(day)
+        if use_copy:
+            _copy_positions(model, day_positions)
+            continue
+        if connection.vendor == 'sqlite':
+            _executemany_positions(model, day_positions)
+            continue
+        model.objects.bulk_create(
+            [
+                model(
+                    satellite_id=position.satellite_id,
+                    timestamp=position.timestamp,
+                    latitude=position.latitude,
+                    longitude=position.longitude,
+                    altitude=position.altitude,
+                    velocity=position.velocity,
+                )
+                for position in day_positions
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+    return len(positions)
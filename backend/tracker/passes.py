@@ -0,0 +1,238 @@
+"""
+Pass prediction: when satellites rise above, culminate in and set below the
+sky of a ground observer, computed from their stored orbital elements.
+
+Every satellite is propagated over the whole window at a coarse step. The
+angular speed of its ground track bounds how close it can come to the
+observer between two coarse samples, which rules out most intervals; the
+rest are sampled at a fine step, and the rise, set and culmination of each
+pass found there are refined by bisection and golden-section search.
+"""
+import math
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from sgp4.api import SatrecArray
+
+from .propagation import EARTH_E2, EARTH_RADIUS_KM, julian_dates, teme_to_ecef
+
+
+EARTH_ROTATION = 7.2921159e-5  # rad/s
+# Slack on the reach of a satellite, covering the tilt between geodetic and
+# geocentric vertical and the perturbations SGP4 adds to the mean motion
+REACH_MARGIN = math.radians(0.5)
+RATE_MARGIN = 1.05
+BISECTIONS = 10
+GOLDEN_SECTIONS = 12
+GOLDEN = (math.sqrt(5) - 1) / 2
+
+PASSES_KEY = 'tracker:passes:{satellite_id}:{cell}:{epoch}:{min_elevation}'
+
+
+def observer_vectors(lat, lon):
+    """
+    Earth-fixed position (km) and local vertical of a sea-level observer
+    """
+    lat, lon = math.radians(lat), math.radians(lon)
+    n = EARTH_RADIUS_KM / math.sqrt(1 - EARTH_E2 * math.sin(lat) ** 2)
+    up = np.array([math.cos(lat) * math.cos(lon), math.cos(lat) * math.sin(lon), math.sin(lat)])
+    position = np.array([n * up[0], n * up[1], n * (1 - EARTH_E2) * up[2]])
+    return position, up
+
+
+def elevations(satrecs, rows, times, position, up):
+    """
+    Elevation in degrees of satrecs[rows[i]] at times[i] (epoch seconds), NaN
+    where propagation fails
+    """
+    jd, fr = julian_dates(times)
+    r = np.empty((len(times), 3))
+    order = np.argsort(rows, kind='stable')
+    bounds = np.flatnonzero(np.diff(rows[order])) + 1
+    for selected in np.split(order, bounds):
+        error, r[selected], _ = satrecs[rows[selected[0]]].sgp4_array(jd[selected], fr[selected])
+        r[selected[error != 0]] = np.nan
+    line_of_sight = teme_to_ecef(r, jd + fr) - position
+    return np.degrees(np.arcsin((line_of_sight @ up) / np.linalg.norm(line_of_sight, axis=-1)))
+
+
+def reach_and_rate(satrecs, min_elevation, observer_radius):
+    """
+    Per satellite: the largest angle between the observer and the
+    sub-satellite point at which it is min_elevation above the horizon (at
+    apogee), and the fastest its ground track moves (at perigee), in rad/s
+    """
+    elevation = math.radians(min_elevation)
+    apogee = np.array([(1 + satrec.alta) * satrec.radiusearthkm for satrec in satrecs])
+    eccentricity = np.array([satrec.ecco for satrec in satrecs])
+    mean_motion = np.array([satrec.no_kozai for satrec in satrecs]) / 60
+    reach = np.arccos(np.clip(observer_radius * math.cos(elevation) / apogee, -1, 1)) - elevation
+    rate = mean_motion * (1 + eccentricity) ** 2 / (1 - eccentricity ** 2) ** 1.5
+    return reach + REACH_MARGIN, (rate + EARTH_ROTATION) * RATE_MARGIN
+
+
+def predict_passes(element_sets, lat, lon, start, end, min_elevation=10.0, coarse_step=300.0, fine_step=30.0):
+    """
+    Passes of each element set over a sea-level observer at lat/lon between
+    start and end (epoch seconds) that reach min_elevation degrees. Returns a
+    list of passes per element set, each a dict of rise, culmination and set
+    (epoch seconds; rise or set is None when the pass is in progress at start
+    or end) and max_elevation. Passes shorter than fine_step can be missed.
+    """
+    satrecs = [element_set.satrec for element_set in element_sets]
+    if not satrecs:
+        return []
+    position, up = observer_vectors(lat, lon)
+    zenith = position / np.linalg.norm(position)
+
+    # Coarse pass: keep the intervals in which the satellite may come into view
+    times = np.append(np.arange(start, end, coarse_step), end)
+    jd, fr = julian_dates(times)
+    _, r, _ = SatrecArray(satrecs).sgp4(jd, fr)
+    r = teme_to_ecef(r, jd + fr)
+    angle = np.arccos(np.clip((r @ zenith) / np.linalg.norm(r, axis=-1), -1, 1))
+    reach, rate = reach_and_rate(satrecs, min_elevation, np.linalg.norm(position))
+    closest = (angle[:, :-1] + angle[:, 1:] - rate[:, None] * np.diff(times)) / 2
+    rows, intervals = np.nonzero(closest <= reach[:, None])
+    if not len(rows):
+        return [[] for _ in satrecs]
+
+    # Fine pass over those intervals, both ends included, in (satellite, time) order
+    offsets = np.arange(0, coarse_step + fine_step, fine_step)
+    fine = np.minimum(times[intervals][:, None] + offsets, times[intervals + 1][:, None]).ravel()
+    rows = np.repeat(rows, len(offsets))
+    keep = np.ones(len(rows), dtype=bool)
+    keep[1:] = (rows[1:] != rows[:-1]) | (fine[1:] != fine[:-1])
+    rows, fine = rows[keep], fine[keep]
+
+    elevation = elevations(satrecs, rows, fine, position, up)
+    above = elevation >= min_elevation
+    same = rows[1:] == rows[:-1]
+    # Runs of samples above min_elevation; outside the fine intervals a
+    # satellite is below it, so a run starting or ending at the edge of the
+    # sampled times is a pass in progress at start or end
+    rising = np.zeros(len(rows), dtype=bool)
+    rising[0] = above[0]
+    rising[1:] = above[1:] & ~(above[:-1] & same)
+    setting = np.zeros(len(rows), dtype=bool)
+    setting[-1] = above[-1]
+    setting[:-1] = above[:-1] & ~(above[1:] & same)
+    firsts, lasts = np.flatnonzero(rising), np.flatnonzero(setting)
+    if not len(firsts):
+        return [[] for _ in satrecs]
+
+    def refine_crossings(below, above_at, pass_rows):
+        for _ in range(BISECTIONS):
+            middle = (below + above_at) / 2
+            up_there = elevations(satrecs, pass_rows, middle, position, up) >= min_elevation
+            above_at = np.where(up_there, middle, above_at)
+            below = np.where(up_there, below, middle)
+        return (below + above_at) / 2
+
+    pass_rows = rows[firsts]
+    has_rise = np.append(False, same)[firsts]
+    has_set = np.append(same, False)[lasts]
+    rises = refine_crossings(fine[np.maximum(firsts - 1, 0)], fine[firsts], pass_rows)
+    sets = refine_crossings(fine[np.minimum(lasts + 1, len(rows) - 1)], fine[lasts], pass_rows)
+
+    # Golden-section search for the culmination around the highest sample
+    peaks = np.array(
+        [first + int(np.argmax(elevation[first:last + 1])) for first, last in zip(firsts, lasts)],
+        dtype=np.int64,
+    )
+    low = np.maximum(fine[peaks] - fine_step, start)
+    high = np.minimum(fine[peaks] + fine_step, end)
+    for _ in range(GOLDEN_SECTIONS):
+        left = high - GOLDEN * (high - low)
+        right = low + GOLDEN * (high - low)
+        higher_left = (
+            elevations(satrecs, pass_rows, left, position, up)
+            >= elevations(satrecs, pass_rows, right, position, up)
+        )
+        high = np.where(higher_left, right, high)
+        low = np.where(higher_left, low, left)
+    culminations = (low + high) / 2
+    peak_elevations = elevations(satrecs, pass_rows, culminations, position, up)
+    fallback = ~(peak_elevations >= elevation[peaks])
+    culminations = np.where(fallback, fine[peaks], culminations)
+    peak_elevations = np.where(fallback, elevation[peaks], peak_elevations)
+
+    passes = [[] for _ in satrecs]
+    for i, row in enumerate(pass_rows.tolist()):
+        passes[row].append({
+            'rise': float(rises[i]) if has_rise[i] else None,
+            'culmination': float(culminations[i]),
+            'set': float(sets[i]) if has_set[i] else None,
+            'max_elevation': float(peak_elevations[i]),
+        })
+    return passes
+
+
+def observer_cell(lat, lon):
+    """
+    Centre of the TRACKER_PASS_CELL_DEGREES grid cell holding an observer;
+    passes are computed and cached per cell
+    """
+    size = settings.TRACKER_PASS_CELL_DEGREES
+    return round(lat / size) * size, round(lon / size) * size
+
+
+def get_passes(satellites, lat, lon, start, end, min_elevation):
+    """
+    Passes of the given satellites (which must have stored elements) over an
+    observer between start and end, as {satellite id: [pass, ...]}. Results
+    are cached per satellite, observer cell and element epoch, and computed
+    TRACKER_PASS_CACHE_TIMEOUT seconds past `end` so the next requests reuse
+    them.
+    """
+    cell_lat, cell_lon = observer_cell(lat, lon)
+    keys = {
+        satellite.id: PASSES_KEY.format(
+            satellite_id=satellite.id,
+            cell=f'{cell_lat:.4f},{cell_lon:.4f}',
+            epoch=int(satellite.elements_epoch.timestamp()),
+            min_elevation=min_elevation,
+        )
+        for satellite in satellites
+    }
+    cached = cache.get_many(keys.values())
+    start_ts, end_ts = start.timestamp(), end.timestamp()
+
+    passes, missing = {}, []
+    for satellite in satellites:
+        entry = cached.get(keys[satellite.id])
+        if entry is not None and entry['start'] <= start_ts and entry['end'] >= end_ts:
+            passes[satellite.id] = entry['passes']
+        else:
+            missing.append(satellite)
+
+    if missing:
+        timeout = settings.TRACKER_PASS_CACHE_TIMEOUT
+        computed = predict_passes(
+            [satellite.element_set() for satellite in missing], cell_lat, cell_lon,
+            start_ts, end_ts + timeout, min_elevation,
+            coarse_step=settings.TRACKER_PASS_COARSE_STEP, fine_step=settings.TRACKER_PASS_FINE_STEP,
+        )
+        cache.set_many({
+            keys[satellite.id]: {'start': start_ts, 'end': end_ts + timeout, 'passes': satellite_passes}
+            for satellite, satellite_passes in zip(missing, computed)
+        }, timeout)
+        passes.update({satellite.id: satellite_passes for satellite, satellite_passes in zip(missing, computed)})
+
+    # Drop passes over before start or starting after end
+    return {
+        satellite_id: [
+            satellite_pass for satellite_pass in satellite_passes
+            if (satellite_pass['set'] is None or satellite_pass['set'] >= start_ts)
+            and (satellite_pass['rise'] is None or satellite_pass['rise'] <= end_ts)
+        ]
+        for satellite_id, satellite_passes in passes.items()
+    }
+
+
+def to_iso(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=dt_timezone.utc).isoformat()
@@ -0,0 +1,298 @@
+import csv
+import io
+import json
+import os
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from sgp4 import omm
+from sgp4.api import Satrec, SatrecArray, WGS72
+
+
+# WGS84 ellipsoid, used for the geodetic conversion of propagated positions
+EARTH_RADIUS_KM = 6378.137
+EARTH_FLATTENING = 1 / 298.257223563
+EARTH_E2 = EARTH_FLATTENING * (2 - EARTH_FLATTENING)
+
+UNIX_EPOCH_JD = 2440587.5
+SECONDS_PER_DAY = 86400.0
+
+TLE_EXTENSIONS = ('.tle', '.txt', '.3le', '.2le')
+OMM_EXTENSIONS = ('.json', '.csv', '.xml')
+
+
+class ElementSet:
+    """
+    A single orbital element set, keyed by NORAD catalog number
+    """
+    __slots__ = ('norad_id', 'name', 'satrec')
+
+    def __init__(self, norad_id, name, satrec):
+        self.norad_id = str(norad_id)
+        self.name = name
+        self.satrec = satrec
+
+    @property
+    def epoch(self):
+        seconds = (self.satrec.jdsatepoch + self.satrec.jdsatepochF - UNIX_EPOCH_JD) * SECONDS_PER_DAY
+        return datetime.fromtimestamp(seconds, tz=dt_timezone.utc)
+
+    @classmethod
+    def from_tle(cls, line1, line2, name=''):
+        satrec = Satrec.twoline2rv(line1, line2, WGS72)
+        return cls(satrec.satnum_str.strip().lstrip('0') or '0', name, satrec)
+
+    @classmethod
+    def from_omm(cls, fields):
+        satrec = Satrec()
+        omm.initialize(satrec, fields)
+        return cls(fields['NORAD_CAT_ID'], fields.get('OBJECT_NAME', ''), satrec)
+
+
+def parse_tle(text):
+    """
+    Parse two-line or three-line (named) element sets
+    """
+    lines = [line.rstrip() for line in text.splitlines() if line.strip()]
+    element_sets = []
+    name = ''
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        if line.startswith('1 ') and i + 1 < len(lines) and lines[i + 1].startswith('2 '):
+            element_sets.append(ElementSet.from_tle(line, lines[i + 1], name))
+            name = ''
+            i += 2
+        else:
+            name = line[2:].strip() if line.startswith('0 ') else line.strip()
+            i += 1
+    return element_sets
+
+
+def parse_omm(text, fmt):
+    """
+    Parse CCSDS OMM element sets in the JSON, CSV or XML layouts published by CelesTrak
+    """
+    if fmt == '.json':
+        records = json.loads(text)
+        if isinstance(records, dict):
+            records = [records]
+        records = [{key: str(value) for key, value in record.items()} for record in records]
+    elif fmt == '.csv':
+        records = list(csv.DictReader(io.StringIO(text)))
+    elif fmt == '.xml':
+        records = list(omm.parse_xml(io.StringIO(text)))
+    else:
+        raise ValueError(f"Unsupported OMM format: {fmt}")
+    return [ElementSet.from_omm(record) for record in records]
+
+
+def load_element_sets(path):
+    """
+    Load element sets from a TLE/OMM file, or from every such file in a directory
+    """
+    if os.path.isdir(path):
+        element_sets = []
+        for filename in sorted(os.listdir(path)):
+            if filename.lower().endswith(TLE_EXTENSIONS + OMM_EXTENSIONS):
+                element_sets.extend(load_element_sets(os.path.join(path, filename)))
+        return element_sets
+
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if ext in OMM_EXTENSIONS:
+        return parse_omm(text, ext)
+    return parse_tle(text)
+
+
+def to_epoch_seconds(times):
+    """
+    Normalize datetimes, datetime64 values or epoch seconds to a float64 array
+    """
+    if isinstance(times, datetime):
+        times = [times]
+    if isinstance(times, np.ndarray) and np.issubdtype(times.dtype, np.datetime64):
+        return times.astype('datetime64[us]').astype(np.int64) / 1e6
+    if isinstance(times, np.ndarray):
+        return times.astype(np.float64)
+    return np.array(
+        [t.timestamp() if isinstance(t, datetime) else t for t in times], dtype=np.float64
+    )
+
+
+def gmst(jd_ut1):
+    """
+    Greenwich mean sidereal time in radians (IAU-82), used to rotate TEME into ECEF
+    """
+    t = (jd_ut1 - 2451545.0) / 36525.0
+    seconds = (
+        67310.54841 + (876600.0 * 3600 + 8640184.812866) * t
+        + 0.093104 * t ** 2 - 6.2e-6 * t ** 3
+    )
+    return np.mod(np.radians(seconds / 240.0), 2 * np.pi)
+
+
+def julian_dates(seconds):
+    """
+    Split epoch seconds into the (jd, fr) Julian date pairs SGP4 expects
+    """
+    days = np.floor(seconds / SECONDS_PER_DAY)
+    return UNIX_EPOCH_JD + days, (seconds - days * SECONDS_PER_DAY) / SECONDS_PER_DAY
+
+
+def teme_to_ecef(r, jd_ut1):
+    """
+    Rotate TEME positions (km, shape (..., 3)) into the Earth-fixed frame
+    """
+    theta = gmst(jd_ut1)
+    cos_t, sin_t = np.cos(theta), np.sin(theta)
+    return np.stack([
+        cos_t * r[..., 0] + sin_t * r[..., 1],
+        -sin_t * r[..., 0] + cos_t * r[..., 1],
+        r[..., 2],
+    ], axis=-1)
+
+
+def teme_to_geodetic(r, jd_ut1):
+    """
+    Convert TEME positions (km, shape (..., 3)) to geodetic latitude/longitude
+    in degrees and altitude in km above the WGS84 ellipsoid
+    """
+    ecef = teme_to_ecef(r, jd_ut1)
+    x, y, z = ecef[..., 0], ecef[..., 1], ecef[..., 2]
+
+    longitude = np.degrees(np.arctan2(y, x))
+    p = np.hypot(x, y)
+    lat = np.arctan2(z, p * (1 - EARTH_E2))
+    # A few fixed-point iterations converge well below a metre for LEO-GEO altitudes
+    for _ in range(4):
+        sin_lat = np.sin(lat)
+        n = EARTH_RADIUS_KM / np.sqrt(1 - EARTH_E2 * sin_lat ** 2)
+        lat = np.arctan2(z + n * EARTH_E2 * sin_lat, p)
+    sin_lat = np.sin(lat)
+    n = EARTH_RADIUS_KM / np.sqrt(1 - EARTH_E2 * sin_lat ** 2)
+    cos_lat = np.cos(lat)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        altitude = np.where(
+            np.abs(cos_lat) > 1e-10,
+            p / cos_lat - n,
+            np.abs(z) / np.abs(sin_lat) - n * (1 - EARTH_E2),
+        )
+    return np.degrees(lat), longitude, altitude
+
+
+class Propagator:
+    """
+    Vectorized SGP4 propagation of many element sets over many timestamps
+    """
+
+    def __init__(self, element_sets):
+        self.element_sets = list(element_sets)
+        self.index = {element_set.norad_id: i for i, element_set in enumerate(self.element_sets)}
+        self._array = SatrecArray([element_set.satrec for element_set in self.element_sets])
+
+    def __len__(self):
+        return len(self.element_sets)
+
+    def __contains__(self, norad_id):
+        return str(norad_id) in self.index
+
+    def propagate(self, times, rows=None):
+        """
+        Propagate every element set (or the given rows) to every timestamp.
+        Returns a dict of (n_satellites, n_times) arrays: latitude and longitude
+        in degrees, altitude in km and velocity in km/h. Element sets that fail
+        to propagate at a timestamp yield NaN.
+        """
+        jd, fr = julian_dates(to_epoch_seconds(times))
+
+        array = self._array if rows is None else SatrecArray([self.element_sets[i].satrec for i in rows])
+        error, r, v = array.sgp4(jd, fr)
+
+        latitude, longitude, altitude = teme_to_geodetic(r, jd + fr)
+        velocity = np.linalg.norm(v, axis=-1) * 3600.0
+        failed = error != 0
+        for values in (latitude, longitude, altitude, velocity):
+            values[failed] = np.nan
+        return {
+            'latitude': latitude,
+            'longitude': longitude,
+            'altitude': altitude,
+            'velocity': velocity,
+        }
+
+    def positions_at(self, when, norad_ids):
+        """
+        Propagate the given satellites to a single timestamp, returning results
+        in the same shape as the HTTP fetchers, keyed by NORAD id
+        """
+        norad_ids = [str(norad_id) for norad_id in norad_ids if str(norad_id) in self.index]
+        if not norad_ids:
+            return {}
+        rows = [self.index[norad_id] for norad_id in norad_ids]
+        columns = self.propagate([when], rows=rows)
+
+        results = {}
+        for i, norad_id in enumerate(norad_ids):
+            if np.isnan(columns['latitude'][i, 0]):
+                results[norad_id] = {
+                    'success': False,
+                    'error': 'SGP4 propagation failed (element set decayed or out of range)',
+                }
+                continue
+            results[norad_id] = {
+                'latitude': float(columns['latitude'][i, 0]),
+                'longitude': float(columns['longitude'][i, 0]),
+                'timestamp': when,
+                'altitude': float(columns['altitude'][i, 0]),
+                'velocity': float(columns['velocity'][i, 0]),
+                'success': True,
+            }
+        return results
+
+
+_propagator = None
+_propagator_mtime = None
+_propagator_lock = threading.Lock()
+
+
+def _catalog_mtime(path):
+    if os.path.isdir(path):
+        return max([os.path.getmtime(os.path.join(path, name)) for name in os.listdir(path)] or [0])
+    return os.path.getmtime(path)
+
+
+def get_propagator():
+    """
+    Return a propagator over the element sets at settings.TRACKER_ELEMENTS_PATH,
+    reloading it when the files change. Returns None when no catalog is configured.
+    A catalog that fails to load (e.g. caught mid-rewrite) is reported and
+    skipped, keeping the previous propagator until the files change again.
+    """
+    global _propagator, _propagator_mtime
+    from django.conf import settings
+
+    path = settings.TRACKER_ELEMENTS_PATH
+    if not path or not os.path.exists(path):
+        return None
+
+    with _propagator_lock:
+        try:
+            mtime = _catalog_mtime(path)
+            if mtime != _propagator_mtime:
+                _propagator_mtime = mtime
+                _propagator = Propagator(load_element_sets(path))
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Could not load orbital elements from {path}: {e}")
+        return _propagator
+
+
+def great_circle_km(lat1, lon1, lat2, lon2):
+    """
+    Haversine distance in km between two points given in degrees
+    """
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
@@ -0,0 +1,122 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+
+class Subscription:
+    """
+    A client's view of the broker: a bounded queue of encoded messages for a
+    fixed set of satellites, living on the client's event loop
+    """
+
+    def __init__(self, broker, satellite_ids, loop, max_pending):
+        self.broker = broker
+        self.satellite_ids = frozenset(satellite_ids)
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_pending)
+
+    def _deliver(self, message):
+        # Slow clients lose their oldest updates rather than holding memory
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class PositionBroker:
+    """
+    In-memory pub/sub fan-out of new fixes. Each satellite's update is encoded
+    once per publish and the same bytes are handed to every subscriber of that
+    satellite. Publishing is thread-safe, so the ingest job can publish from
+    the scheduler thread while subscribers wait on an asyncio event loop.
+    """
+
+    def __init__(self, max_pending=32):
+        self.max_pending = max_pending
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, satellite_ids, loop):
+        subscription = Subscription(self, satellite_ids, loop, self.max_pending)
+        with self._lock:
+            for satellite_id in subscription.satellite_ids:
+                self._subscribers[satellite_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for satellite_id in subscription.satellite_ids:
+                subscribers = self._subscribers.get(satellite_id)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[satellite_id]
+
+    def subscribed_ids(self):
+        with self._lock:
+            return set(self._subscribers)
+
+    def subscriber_count(self, satellite_id):
+        with self._lock:
+            return len(self._subscribers.get(satellite_id, ()))
+
+    def publish(self, satellite_id, payload, event='position'):
+        """
+        Send an event to every subscriber of the satellite
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(satellite_id, ()))
+        if not subscribers:
+            return 0
+
+        message = encode_event(event, payload)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._deliver, message)
+            except RuntimeError:
+                # The subscriber's event loop has been closed
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+    def publish_positions(self, positions):
+        """
+        Publish saved SatellitePosition objects, one event per satellite
+        """
+        by_satellite = defaultdict(list)
+        for position in positions:
+            by_satellite[position.satellite_id].append(position)
+
+        for satellite_id, satellite_positions in by_satellite.items():
+            if not self.subscriber_count(satellite_id):
+                continue
+            satellite_positions.sort(key=lambda position: position.timestamp, reverse=True)
+            self.publish(satellite_id, {
+                'satellite': satellite_positions[0].satellite.name,
+                'satellite_id': satellite_id,
+                'positions': [
+                    {
+                        'timestamp': position.timestamp.isoformat(),
+                        'latitude': position.latitude,
+                        'longitude': position.longitude,
+                        'altitude': position.altitude,
+                        'velocity': position.velocity
+                    }
+                    for position in satellite_positions
+                ],
+            })
+
+
+def encode_event(event, payload):
+    """
+    Encode a server-sent event frame
+    """
+    return f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n".encode()
+
+
+broker = PositionBroker()
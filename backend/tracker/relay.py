@@ -0,0 +1,107 @@
+"""
+Relay of new fixes from the ingest worker into web processes.
+
+The ingest worker (manage.py run_ingest) runs in its own process, so web
+processes learn about new fixes by polling the database: every
+TRACKER_RELAY_INTERVAL seconds a single query on the partitions' created_at
+index fetches the fixes stored since the last poll. The relay appends them to
+the ring buffers this process has open, publishes them to live subscribers
+and updates the spatial index of current positions.
+"""
+import os
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import SatellitePosition
+from .pubsub import broker
+
+
+class PositionRelay:
+    def __init__(self, interval, lookback, overlap):
+        self.interval = interval
+        self.lookback = lookback
+        self.overlap = overlap
+        # created_at of the newest fix seen, and the newest fix timestamp
+        # already relayed per satellite
+        self._watermark = None
+        self._relayed = {}
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        """
+        Start polling in this process, once; cheap enough to call on every
+        request. Threads do not survive a fork, so a worker forked from a
+        process that had started the relay (gunicorn --preload) starts its own.
+        """
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, name='tracker-relay', daemon=True)
+                self._thread.start()
+                self._pid = os.getpid()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Position relay poll failed: {e}")
+            finally:
+                close_old_connections()
+
+    def poll(self):
+        """
+        Relay fixes stored since the last poll, returning how many were new
+        """
+        from .ringbuffer import ring_buffers
+        from .spatial import position_index
+
+        now = timezone.now()
+        if self._watermark is None:
+            self._watermark = now
+
+        # The overlap re-reads fixes whose transaction committed just after
+        # the previous poll; the lookback ignores backfilled history
+        rows = list(
+            SatellitePosition.objects.filter(
+                created_at__gt=self._watermark - self.overlap,
+                timestamp__gte=now - self.lookback,
+            )
+            .select_related('satellite')
+            .order_by('timestamp')
+        )
+        if not rows:
+            return 0
+        self._watermark = max(self._watermark, max(position.created_at for position in rows))
+
+        fresh = []
+        for position in rows:
+            newest = self._relayed.get(position.satellite_id)
+            if newest is None or position.timestamp > newest:
+                fresh.append(position)
+                self._relayed[position.satellite_id] = position.timestamp
+        if fresh:
+            watched = ring_buffers.satellite_ids()
+            ring_buffers.extend([position for position in fresh if position.satellite_id in watched])
+            broker.publish_positions(fresh)
+            position_index.update(fresh)
+        return len(fresh)
+
+
+relay = PositionRelay(
+    interval=settings.TRACKER_RELAY_INTERVAL,
+    lookback=timedelta(seconds=settings.TRACKER_RELAY_LOOKBACK),
+    overlap=timedelta(seconds=settings.TRACKER_RELAY_OVERLAP),
+)
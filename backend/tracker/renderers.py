@@ -0,0 +1,100 @@
+"""
+Compact alternatives to JSON for the position endpoints, chosen by the
+Accept header or ?format=.
+
+Views hand these renderers columns (numpy arrays) instead of one dict per
+fix, so nothing is built per row in Python:
+
+    application/msgpack                   ?format=msgpack
+    application/vnd.tracker.positions     ?format=bin (latest positions only)
+
+The binary layout is little-endian and keeps every column aligned, so
+browsers can view it with typed arrays without copying:
+
+    4 bytes   magic b'STP1'
+    uint32    satellite count S
+    uint32    fix count N
+    uint32    byte length L of the names
+    uint32    fix count of each satellite [S]
+    L bytes   satellite names, UTF-8, separated by newlines, then zero
+              padding to a multiple of 8 bytes
+    int64     timestamps, epoch seconds [N]
+    float32   latitudes [N], longitudes [N], altitudes [N], velocities [N]
+
+Fixes are grouped by satellite in name order, newest first; a missing
+altitude or velocity is NaN.
+"""
+import json
+
+import msgpack
+import numpy as np
+from rest_framework.renderers import BaseRenderer
+
+
+BINARY_MAGIC = b'STP1'
+COLUMN_DTYPES = {
+    'timestamp': '<i8',
+    'latitude': '<f4',
+    'longitude': '<f4',
+    'altitude': '<f4',
+    'velocity': '<f4',
+}
+
+
+def pack_default(value):
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to MessagePack")
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Coordinates are float32 in the columns too; NaN marks missing values
+        return msgpack.packb(data, default=pack_default, use_single_float=True)
+
+
+class PositionBinaryRenderer(BaseRenderer):
+    """
+    The raw layout above, for {satellite name: columns} data. Errors are
+    still rendered as JSON.
+    """
+    media_type = 'application/vnd.tracker.positions'
+    format = 'bin'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None and response.exception:
+            response['Content-Type'] = 'application/json'
+            return json.dumps(data).encode()
+        return encode_positions(data)
+
+
+def encode_positions(columns_by_name):
+    names = sorted(columns_by_name)
+    counts = np.array([len(columns_by_name[name]['timestamp']) for name in names], dtype='<u4')
+    encoded_names = '\n'.join(names).encode()
+    padding = -(16 + 4 * len(names) + len(encoded_names)) % 8
+
+    parts = [
+        BINARY_MAGIC,
+        np.array([len(names), counts.sum(), len(encoded_names)], dtype='<u4').tobytes(),
+        counts.tobytes(),
+        encoded_names,
+        bytes(padding),
+    ]
+    for column, dtype in COLUMN_DTYPES.items():
+        values = [np.asarray(columns_by_name[name][column], dtype=dtype) for name in names]
+        parts.append(np.concatenate(values).tobytes() if values else b'')
+    return b''.join(parts)
+
@@ -0,0 +1,321 @@
+import fcntl
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import SatellitePosition
+
+
+FIX_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('latitude', '<f8'),
+    ('longitude', '<f8'),
+    ('altitude', '<f8'),
+    ('velocity', '<f8'),
+])
+
+# Header slots: write sequence (odd while a write is in progress), number of
+# stored fixes, index of the next write, and whether the buffer was warmed
+HEADER_DTYPE = np.dtype('<i8')
+SEQUENCE, COUNT, HEAD, WARMED = range(4)
+HEADER_SIZE = 4 * HEADER_DTYPE.itemsize
+
+# A read retried this many times, backing off up to READ_MAX_BACKOFF seconds
+# between attempts (about 0.1s in all), gives up on the buffer: its writer
+# must have died mid-write
+READ_ATTEMPTS = 100
+READ_MAX_BACKOFF = 0.001
+
+
+class TornReadError(Exception):
+    """
+    A ring buffer stayed mid-write for every read attempt
+    """
+
+
+class PositionRingBuffer:
+    """
+    Fixed-size ring of the most recent fixes of one satellite, stored as a
+    compact structured NumPy array. The buffer may live in process memory or
+    on top of a shared memory segment, in which case readers in other
+    processes use the write sequence to detect and retry torn reads.
+    """
+
+    def __init__(self, capacity, buffer=None):
+        self.capacity = capacity
+        if buffer is None:
+            buffer = bytearray(self.nbytes(capacity))
+        self.header = np.frombuffer(buffer, dtype=HEADER_DTYPE, count=4)
+        self.fixes = np.frombuffer(buffer, dtype=FIX_DTYPE, count=capacity, offset=HEADER_SIZE)
+
+    @staticmethod
+    def nbytes(capacity):
+        return HEADER_SIZE + capacity * FIX_DTYPE.itemsize
+
+    @property
+    def warmed(self):
+        return bool(self.header[WARMED])
+
+    @property
+    def sequence(self):
+        return int(self.header[SEQUENCE])
+
+    def append(self, fixes):
+        """
+        Append fixes (a FIX_DTYPE array). Fixes not newer than the newest stored
+        fix are ignored, so re-appending rows that were warmed from the database
+        is harmless. Callers must serialize writers.
+        """
+        fixes = np.sort(np.asarray(fixes, dtype=FIX_DTYPE), order='timestamp')
+        count, head = int(self.header[COUNT]), int(self.header[HEAD])
+        if count:
+            newest = self.fixes[(head - 1) % self.capacity]['timestamp']
+            fixes = fixes[fixes['timestamp'] > newest]
+        fixes = fixes[-self.capacity:]
+
+        self.header[SEQUENCE] += 1
+        if len(fixes):
+            slots = (head + np.arange(len(fixes))) % self.capacity
+            self.fixes[slots] = fixes
+            self.header[HEAD] = (head + len(fixes)) % self.capacity
+            self.header[COUNT] = min(count + len(fixes), self.capacity)
+        self.header[WARMED] = 1
+        self.header[SEQUENCE] += 1
+
+    def latest(self, n=None, attempts=READ_ATTEMPTS):
+        """
+        Return up to n of the newest fixes, newest first. Raises TornReadError
+        when no attempt found the buffer between writes.
+        """
+        backoff = 0.0
+        for _ in range(attempts):
+            sequence = int(self.header[SEQUENCE])
+            if sequence % 2 == 0:
+                count, head = int(self.header[COUNT]), int(self.header[HEAD])
+                wanted = count if n is None else min(n, count)
+                fixes = self.fixes[(head - 1 - np.arange(wanted)) % self.capacity]
+                if int(self.header[SEQUENCE]) == sequence:
+                    return fixes
+            # Yield to the writer, then back off exponentially
+            time.sleep(backoff)
+            backoff = min(max(backoff * 2, 0.00001), READ_MAX_BACKOFF)
+        raise TornReadError(f"Ring buffer still mid-write after {attempts} reads")
+
+    def reset(self):
+        """
+        Empty the buffer and mark it cold, so it is warmed again. Callers must
+        serialize writers.
+        """
+        if self.header[SEQUENCE] % 2 == 0:
+            self.header[SEQUENCE] += 1
+        self.header[COUNT] = 0
+        self.header[HEAD] = 0
+        self.header[WARMED] = 0
+        self.header[SEQUENCE] += 1
+
+
+class RingBufferStore:
+    """
+    Ring buffers of recent fixes, keyed by satellite id. Buffers are created on
+    first use and warmed from the database, so reads keep working from memory
+    even while the database is slow or locked by the ingest writer.
+    """
+
+    def __init__(self, capacity, shared=False, prefix='tracker_ring'):
+        self.capacity = capacity
+        self.shared = shared
+        self.prefix = prefix
+        self._buffers = {}
+        self._segments = {}
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def _write_lock(self):
+        with self._lock:
+            if not self.shared:
+                yield
+                return
+            # Writers in other processes are serialized through a lock file
+            path = os.path.join(tempfile.gettempdir(), f"{self.prefix}.lock")
+            with open(path, 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _segment_name(self, satellite_id):
+        return f"{self.prefix}_{satellite_id}"
+
+    def _attach(self, satellite_id):
+        size = PositionRingBuffer.nbytes(self.capacity)
+        name = self._segment_name(satellite_id)
+        try:
+            segment = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            segment = shared_memory.SharedMemory(name=name)
+        # Segments outlive the process that created them; see unlink()
+        resource_tracker.unregister(segment._name, 'shared_memory')
+        self._segments[satellite_id] = segment
+        return PositionRingBuffer(self.capacity, segment.buf)
+
+    def get(self, satellite_id):
+        buffer = self._buffers.get(satellite_id)
+        if buffer is None:
+            with self._lock:
+                buffer = self._buffers.get(satellite_id)
+                if buffer is None:
+                    if self.shared:
+                        buffer = self._attach(satellite_id)
+                    else:
+                        buffer = PositionRingBuffer(self.capacity)
+                    self._buffers[satellite_id] = buffer
+        return buffer
+
+    def satellite_ids(self):
+        """
+        Ids of the satellites whose buffers this process has opened
+        """
+        with self._lock:
+            return set(self._buffers)
+
+    def warm(self, satellite_ids):
+        """
+        Fill cold buffers from the database with a single windowed query
+        """
+        cold = [satellite_id for satellite_id in satellite_ids if not self.get(satellite_id).warmed]
+        if not cold:
+            return
+        rows = (
+            SatellitePosition.objects.filter(satellite_id__in=cold)
+            .annotate(rank=Window(
+                RowNumber(), partition_by=[F('satellite_id')], order_by=F('timestamp').desc()
+            ))
+            .filter(rank__lte=self.capacity)
+            .values_list('satellite_id', 'timestamp', 'latitude', 'longitude', 'altitude', 'velocity')
+        )
+        fixes = {satellite_id: [] for satellite_id in cold}
+        for satellite_id, timestamp, latitude, longitude, altitude, velocity in rows:
+            fixes[satellite_id].append((timestamp.timestamp(), latitude, longitude, altitude, velocity))
+        with self._write_lock():
+            for satellite_id, satellite_fixes in fixes.items():
+                buffer = self.get(satellite_id)
+                if not buffer.warmed:
+                    buffer.append(to_fixes(satellite_fixes))
+
+    def extend(self, positions):
+        """
+        Append saved SatellitePosition objects to their satellites' buffers
+        """
+        by_satellite = {}
+        for position in positions:
+            by_satellite.setdefault(position.satellite_id, []).append((
+                position.timestamp.timestamp(), position.latitude, position.longitude,
+                position.altitude, position.velocity,
+            ))
+        # Warm first so a buffer never starts out holding only the newest fix
+        self.warm(by_satellite)
+        with self._write_lock():
+            for satellite_id, satellite_fixes in by_satellite.items():
+                self.get(satellite_id).append(to_fixes(satellite_fixes))
+
+    def latest(self, satellite_ids, n=None):
+        """
+        Return the newest fixes of each satellite, newest first, keyed by satellite id
+        """
+        self.warm(satellite_ids)
+        latest = {}
+        for satellite_id in satellite_ids:
+            try:
+                latest[satellite_id] = self.get(satellite_id).latest(n)
+            except TornReadError:
+                latest[satellite_id] = self._recover(satellite_id, n)
+        return latest
+
+    def _recover(self, satellite_id, n):
+        """
+        Read a buffer that stayed mid-write. Live writers only leave it so
+        while holding the write lock, so once we hold it, a buffer still
+        mid-write was abandoned by a writer that died: it is emptied and
+        warmed again from the database.
+        """
+        with self._write_lock():
+            buffer = self.get(satellite_id)
+            if buffer.sequence % 2:
+                print(f"Ring buffer of satellite {satellite_id} was abandoned mid-write; reloading it.")
+                buffer.reset()
+        self.warm([satellite_id])
+        return buffer.latest(n)
+
+    def unlink(self):
+        """
+        Remove every shared memory segment this store attached to
+        """
+        with self._lock:
+            # Drop the array views first, they keep the segments' buffers exported
+            self._buffers = {}
+            segments, self._segments = self._segments, {}
+            for segment in segments.values():
+                segment.close()
+                # unlink() unregisters the segment from the resource tracker again
+                resource_tracker.register(segment._name, 'shared_memory')
+                try:
+                    segment.unlink()
+                except FileNotFoundError:
+                    pass
+
+
+def to_fixes(rows):
+    """
+    Build a FIX_DTYPE array from (timestamp, lat, lon, alt, velocity) tuples,
+    storing missing altitude/velocity as NaN
+    """
+    return np.array(
+        [tuple(np.nan if value is None else value for value in row) for row in rows],
+        dtype=FIX_DTYPE,
+    )
+
+
+def fixes_to_dicts(fixes):
+    """
+    Convert a FIX_DTYPE array to the JSON shape served by the positions API
+    """
+    return [
+        {
+            'timestamp': datetime.fromtimestamp(timestamp, tz=dt_timezone.utc).isoformat(),
+            'latitude': latitude,
+            'longitude': longitude,
+            'altitude': None if altitude != altitude else altitude,
+            'velocity': None if velocity != velocity else velocity
+        }
+        for timestamp, latitude, longitude, altitude, velocity in fixes.tolist()
+    ]
+
+
+def fixes_to_columns(fixes):
+    """
+    Convert a FIX_DTYPE array to columns for the compact renderers: epoch
+    second timestamps and float32 coordinates, with NaN for missing values
+    """
+    return {
+        'timestamp': fixes['timestamp'].astype('<i8'),
+        'latitude': fixes['latitude'].astype('<f4'),
+        'longitude': fixes['longitude'].astype('<f4'),
+        'altitude': fixes['altitude'].astype('<f4'),
+        'velocity': fixes['velocity'].astype('<f4'),
+    }
+
+
+ring_buffers = RingBufferStore(
+    capacity=settings.TRACKER_RING_BUFFER_CAPACITY,
+    shared=settings.TRACKER_RING_BUFFER_SHARED,
+)
@@ -1,154 +1,331 @@
-import ray
-import requests
-from datetime import datetime
+import time
+from datetime import timezone as dt_timezone
+from django.conf import settings
+from django.db.models import Exists, OuterRef
 from django.utils import timezone
 from .models import Satellite, SatellitePosition, UserSatelliteSelection
+from .executors import get_executor
+from .http_fetcher import fetch_json
+from .metrics import (
+    ingest_cycle_seconds, ingest_fixes, ingest_phase_seconds, upstream_request_seconds, upstream_requests
+)
+from .parsers import get_parser
+from .partitions import drop_partitions_before, ensure_partition, insert_positions
+from .pubsub import broker
+from .tracks import prune_track_points, record_positions
+from .upstream import cache_ttl, is_host_failure, response_cache, upstream_health
 
 
-# Initialize Ray
-if not ray.is_initialized():
-    ray.init(ignore_reinit_error=True)
+def tracked_satellites(satellites=None):
+    """
+    Narrow a Satellite queryset (default: all) to satellites with at least one
+    active selection, answered from the partial index on active selections
+    """
+    if satellites is None:
+        satellites = Satellite.objects.all()
+    return satellites.filter(Exists(
+        UserSatelliteSelection.objects.filter(satellite=OuterRef('pk'), is_active=True)
+    ))
 
 
-@ray.remote
-def fetch_satellite_data(satellite_id, api_url):
+def fetch_over_http(satellites, on_idle=None):
     """
-    Ray remote function to fetch satellite data from API
+    Fetch satellites from their api_url with the configured fetch backend,
+    yielding (result, satellite) pairs. Each api_url is requested once, even
+    when several satellites share it; recently fetched responses are served
+    from the cache, and hosts that are backed off are skipped. on_idle is
+    passed on to the fetch backend (see fetch_urls).
     """
-    try:
-        response = requests.get(api_url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        # Parse different API response formats
-        if 'iss_position' in data:  # open-notify.org format
-            return {
-                'satellite_id': satellite_id,
-                'latitude': float(data['iss_position']['latitude']),
-                'longitude': float(data['iss_position']['longitude']),
-                'timestamp': datetime.fromtimestamp(int(data['timestamp'])),
-                'altitude': None,
-                'velocity': None,
-                'success': True
-            }
-        elif 'latitude' in data:  # wheretheiss.at format
-            return {
-                'satellite_id': satellite_id,
-                'latitude': float(data['latitude']),
-                'longitude': float(data['longitude']),
-                'timestamp': datetime.fromtimestamp(int(data['timestamp'])),
-                'altitude': float(data.get('altitude', 0)),
-                'velocity': float(data.get('velocity', 0)),
-                'success': True
-            }
-        elif 'lat' in data:  # satellitemap.space format
-            return {
-                'satellite_id': satellite_id,
-                'latitude': float(data['lat']),
-                'longitude': float(data['lon']),
-                'timestamp': datetime.fromisoformat(data['timestamp'].replace('Z', '+00:00')),
-                'altitude': float(data.get('alt', 0)),
-                'velocity': None,
-                'success': True
-            }
+    if not satellites:
+        return
+    
+    with ingest_phase_seconds.time(phase='group'):
+        by_url = {}
+        for satellite in satellites:
+            by_url.setdefault(satellite.api_url, []).append(satellite)
+    
+    urls = []
+    for api_url, url_satellites in by_url.items():
+        data = response_cache.get(api_url)
+        if data is not None:
+            upstream_requests.inc(host=upstream_health.host(api_url), outcome='cached')
+            yield from parse_for_satellites(url_satellites, data)
+        elif upstream_health.allow(api_url):
+            urls.append(api_url)
         else:
-            return {
-                'satellite_id': satellite_id,
-                'success': False,
-                'error': 'Unknown API response format'
-            }
-            
-    except requests.exceptions.RequestException as e:
-        return {
-            'satellite_id': satellite_id,
-            'success': False,
-            'error': str(e)
-        }
-    except Exception as e:
-        return {
-            'satellite_id': satellite_id,
-            'success': False,
-            'error': str(e)
-        }
-
-
-def fetch_and_save_satellite_positions():
-    """
-    Main function to fetch satellite positions for all users with active selections
-    Uses Ray to parallelize API calls
-    """
-    print(f"[{timezone.now()}] Starting satellite position fetch...")
+            upstream_requests.inc(host=upstream_health.host(api_url), outcome='skipped')
+            for satellite in url_satellites:
+                yield {
+                    'satellite_id': satellite.id,
+                    'success': False,
+                    'error': f"Skipped, {upstream_health.host(api_url)} is backed off"
+                }, satellite
     
-    # Get all active satellite selections
-    active_selections = UserSatelliteSelection.objects.filter(is_active=True).select_related('user', 'satellite')
+    # The health of each host is judged once the cycle is over, from all of
+    # its responses, so neither their number nor their order matters
+    succeeded, failed = set(), {}
+    try:
+        for response in fetch_urls(urls, on_idle):
+            api_url = response['api_url']
+            host = upstream_health.host(api_url)
+            upstream_requests.inc(host=host, outcome='success' if response['success'] else 'error')
+            if 'elapsed' in response:
+                upstream_request_seconds.observe(response['elapsed'], host=host)
+            if response['success']:
+                succeeded.add(host)
+                response_cache.set(
+                    api_url, response['data'],
+                    cache_ttl(min(satellite.poll_interval for satellite in by_url[api_url])),
+                )
+                yield from parse_for_satellites(by_url[api_url], response['data'])
+                continue
+            
+            if is_host_failure(response):
+                failed.setdefault(host, []).append(response)
+            for satellite in by_url[api_url]:
+                yield {
+                    'satellite_id': satellite.id,
+                    'success': False,
+                    'error': response['error']
+                }, satellite
+    finally:
+        record_host_health(succeeded, failed)
+
+
+def record_host_health(succeeded, failed):
+    """
+    Record one outcome per host for a fetch cycle: hosts that answered any
+    request are healthy, and the others with failures are backed off once
+    """
+    for host in succeeded:
+        upstream_health.record_success(host)
+    for host, responses in failed.items():
+        if host in succeeded:
+            continue
+        retry_after = max((response.get('retry_after') or 0 for response in responses), default=0)
+        delay = upstream_health.record_failure(host, retry_after or None)
+        print(
+            f"Upstream {host} failed {len(responses)} request(s) ({responses[0]['error']}); "
+            f"backing off for {delay:.0f}s."
+        )
+
+
+def fetch_urls(urls, on_idle=None):
+    """
+    Fetch and decode urls with the configured fetch backend, yielding
+    responses in completion order. The async backend calls on_idle whenever
+    it is about to wait for the next response.
+    """
+    if not urls:
+        return
     
-    if not active_selections.exists():
-        print("No active satellite selections found.")
+    if settings.TRACKER_FETCH_BACKEND == 'async':
+        from .async_fetcher import get_fetch_engine
+        yield from get_fetch_engine().fetch(urls, deadline=settings.TRACKER_FETCH_DEADLINE, on_idle=on_idle)
         return
     
-    # Group by satellite to avoid duplicate API calls
-    satellite_users = {}
-    for selection in active_selections:
-        sat_id = selection.satellite.id
-        if sat_id not in satellite_users:
-            satellite_users[sat_id] = {
-                'satellite': selection.satellite,
-                'users': []
+    for (api_url, _), response, error in get_executor().imap_unordered(
+        fetch_json, [(api_url, settings.TRACKER_FETCH_TIMEOUT) for api_url in urls],
+        timeout=settings.TRACKER_FETCH_DEADLINE
+    ):
+        if error is not None:
+            # The executors only report their own timeouts and crashes
+            response = {
+                'api_url': api_url,
+                'success': False,
+                'error': str(error),
+                'cancelled': isinstance(error, TimeoutError),
             }
-        satellite_users[sat_id]['users'].append(selection.user)
-    
-    # Fetch data for all satellites in parallel using Ray
-    ray_tasks = []
-    for sat_data in satellite_users.values():
-        satellite = sat_data['satellite']
-        task = fetch_satellite_data.remote(satellite.id, satellite.api_url)
-        ray_tasks.append((task, sat_data))
-    
-    # Wait for all tasks to complete
-    results = []
-    for task, sat_data in ray_tasks:
+        yield response
+
+
+def parse_for_satellites(satellites, data):
+    """
+    Parse one decoded upstream response for every satellite sharing its
+    api_url. Each format is parsed once, so a batch response feeding dozens of
+    satellites is decoded a single time.
+    """
+    parsed = {}
+    for satellite in satellites:
         try:
-            result = ray.get(task, timeout=15)
-            results.append((result, sat_data))
+            parser = get_parser(satellite.response_format)
+            if parser.name not in parsed:
+                with ingest_phase_seconds.time(phase='parse'):
+                    parsed[parser.name] = parser.parse(data)
+            fix = parsed[parser.name].get(satellite.satellite_id if parser.batch else None)
         except Exception as e:
-            print(f"Error getting result for satellite {sat_data['satellite'].name}: {e}")
+            yield {
+                'satellite_id': satellite.id,
+                'success': False,
+                'error': f"Malformed response: {e}"
+            }, satellite
+            continue
+        if fix is None:
+            yield {
+                'satellite_id': satellite.id,
+                'success': False,
+                'error': f"Satellite {satellite.satellite_id} missing from batch response"
+            }, satellite
+        else:
+            yield {'satellite_id': satellite.id, **fix, 'success': True}, satellite
+
+
+def cross_check_position(satellite, propagated, fetched):
+    """
+    Compare a propagated fix against the upstream API and report disagreements
+    """
+    if not (propagated.get('success') and fetched.get('success')):
+        return
+    from .propagation import great_circle_km
+    distance = great_circle_km(
+        propagated['latitude'], propagated['longitude'],
+        fetched['latitude'], fetched['longitude'],
+    )
+    if distance > settings.TRACKER_CROSS_CHECK_TOLERANCE_KM:
+        print(
+            f"Cross-check mismatch for satellite {satellite.name}: propagated fix is "
+            f"{distance:.1f} km from {satellite.api_url}"
+        )
+
+
+def fetch_and_save_satellite_positions(satellites=None):
+    """
+    Main function to fetch satellite positions for every satellite with at least
+    one active selection, optionally limited to the `satellites` queryset (the
+    scheduler polls one slot of satellites at a time). Each fix is stored once
+    per satellite, regardless of how many users are tracking it.
+    Satellites with a loaded element set are propagated on-box with SGP4; the
+    rest are fetched concurrently from their api_url. Returns the number of
+    fixes saved.
+    """
+    with ingest_cycle_seconds.time():
+        saved = _fetch_and_save_satellite_positions(satellites)
+    ingest_fixes.inc(saved)
+    return saved
+
+
+def _fetch_and_save_satellite_positions(satellites):
+    # Satellites with at least one active selection, each fetched once
+    scheduled_slot = satellites is not None
+    with ingest_phase_seconds.time(phase='select'):
+        satellites = list(tracked_satellites(satellites))
     
-    # Save results to database
-    positions_to_create = []
-    for result, sat_data in results:
-        if result.get('success'):
-            satellite = sat_data['satellite']
-            users = sat_data['users']
-            
-            # Create position records for all users tracking this satellite
-            for user in users:
-                position = SatellitePosition(
-                    satellite=satellite,
-                    user=user,
-                    timestamp=timezone.make_aware(result['timestamp']) if timezone.is_naive(result['timestamp']) else result['timestamp'],
-                    latitude=result['latitude'],
-                    longitude=result['longitude'],
-                    altitude=result.get('altitude'),
-                    velocity=result.get('velocity')
-                )
-                positions_to_create.append(position)
+    if not satellites:
+        # Empty poll slots are routine; only report a fleet-wide empty run
+        if not scheduled_slot:
+            print("No active satellite selections found.")
+        return 0
+    
+    print(f"[{timezone.now()}] Starting satellite position fetch for {len(satellites)} satellites...")
+    
+    # Propagate every satellite we have elements for in one vectorized call
+    from .propagation import get_propagator
+    propagator = get_propagator()
+    propagated = {}
+    if propagator is not None:
+        now = timezone.now().replace(microsecond=0)
+        with ingest_phase_seconds.time(phase='propagate'):
+            propagated = propagator.positions_at(now, [satellite.satellite_id for satellite in satellites])
+    
+    http_satellites = [
+        satellite for satellite in satellites
+        if satellite.satellite_id not in propagated or settings.TRACKER_HTTP_CROSS_CHECK
+    ]
+    
+    # Fixes are written, and published to readers, in bounded batches as
+    # they arrive (and whenever the fetch is waiting on slower upstreams),
+    # so one slow upstream never holds back the others
+    writer = PositionWriter(settings.TRACKER_INGEST_BATCH_SIZE, settings.TRACKER_INGEST_FLUSH_INTERVAL)
+    for satellite in satellites:
+        if satellite.satellite_id in propagated:
+            writer.add(propagated[satellite.satellite_id], satellite)
+    writer.flush()
+    
+    # Fetch data for the remaining satellites in parallel, in completion order
+    for result, satellite in fetch_over_http(http_satellites, on_idle=writer.flush):
+        if satellite.satellite_id in propagated:
+            cross_check_position(satellite, propagated[satellite.satellite_id], result)
         else:
-            print(f"Failed to fetch data for satellite {sat_data['satellite'].name}: {result.get('error')}")
+            writer.add(result, satellite)
+    writer.flush()
     
-    # Bulk create all positions
-    if positions_to_create:
-        SatellitePosition.objects.bulk_create(positions_to_create)
-        print(f"Successfully saved {len(positions_to_create)} position records.")
+    if writer.saved:
+        print(f"Successfully saved {writer.saved} position records.")
     else:
         print("No position data to save.")
+    return writer.saved
+
+
+class PositionWriter:
+    """
+    Buffers fetched fixes and writes them to the day partitions, the track
+    rollups, the ring buffers and live subscribers once `batch_size` fixes are
+    pending or the oldest pending fix has waited `flush_interval` seconds.
+    """
+
+    def __init__(self, batch_size, flush_interval):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.saved = 0
+        self._pending = []
+        self._first_pending_at = None
+
+    def add(self, result, satellite):
+        if not result.get('success'):
+            print(f"Failed to fetch data for satellite {satellite.name}: {result.get('error')}")
+            return
+        self._pending.append(SatellitePosition(
+            satellite=satellite,
+            timestamp=timezone.make_aware(result['timestamp']) if timezone.is_naive(result['timestamp']) else result['timestamp'],
+            latitude=result['latitude'],
+            longitude=result['longitude'],
+            altitude=result.get('altitude'),
+            velocity=result.get('velocity')
+        ))
+        if self._first_pending_at is None:
+            self._first_pending_at = time.monotonic()
+        if (len(self._pending) >= self.batch_size
+                or time.monotonic() - self._first_pending_at >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        positions, self._pending, self._first_pending_at = self._pending, [], None
+        if not positions:
+            return
+        # A fix already stored for the same timestamp is skipped
+        with ingest_phase_seconds.time(phase='write'):
+            insert_positions(positions)
+        with ingest_phase_seconds.time(phase='rollup'):
+            record_positions(positions)
+        from .ringbuffer import ring_buffers
+        with ingest_phase_seconds.time(phase='publish'):
+            ring_buffers.extend(positions)
+            broker.publish_positions(positions)
+        self.saved += len(positions)
 
 
 def cleanup_old_positions(days=7):
     """
-    Clean up old satellite position data
+    Clean up old satellite position data by dropping whole day partitions,
+    and create tomorrow's partition ahead of the first fix that needs it.
+    Closed days are compacted into the archive first, so nothing is lost.
     """
     from datetime import timedelta
-    cutoff_date = timezone.now() - timedelta(days=days)
-    deleted_count = SatellitePosition.objects.filter(created_at__lt=cutoff_date).delete()[0]
-    if deleted_count > 0:
-        print(f"Cleaned up {deleted_count} old position records.")
\ No newline at end of file
+    today = timezone.now().astimezone(dt_timezone.utc).date()
+    cutoff = today - timedelta(days=days)
+    if settings.TRACKER_ARCHIVE_ENABLED:
+        from .archive import archive_closed_days, archive_cutoff
+        archived = archive_closed_days()
+        if archived:
+            print(f"Archived {len(archived)} closed days of positions: {', '.join(map(str, archived))}.")
+        # Days still in their grace period are not archived yet
+        cutoff = min(cutoff, archive_cutoff())
+    dropped = drop_partitions_before(cutoff)
+    if dropped:
+        print(f"Dropped {len(dropped)} old position partitions: {', '.join(map(str, dropped))}.")
+    ensure_partition(today + timedelta(days=1))
+    pruned = prune_track_points(
+        timezone.now() - timedelta(days=settings.TRACKER_TRACK_RETENTION_DAYS)
+    )
+    if pruned:
+        print(f"Deleted {pruned} old track points.")
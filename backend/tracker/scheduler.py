@@ -1,7 +1,108 @@
+import threading
+import time
+from datetime import timedelta
+
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from django.conf import settings
-from .satellite_service import fetch_and_save_satellite_positions, cleanup_old_positions
+from django.db.models.functions import Mod
+from django.utils import timezone
+from .models import Satellite
+from .satellite_service import fetch_and_save_satellite_positions, cleanup_old_positions, tracked_satellites
+
+
+POLL_JOB_PREFIX = 'poll_'
+
+# Effective interval of each poll job, stretched while its cycles run long
+_intervals = {}
+_intervals_lock = threading.Lock()
+
+
+def poll_job_id(interval, slot):
+    return f"{POLL_JOB_PREFIX}{interval}_{slot}"
+
+
+def poll_trigger(interval, slot, start=True):
+    """
+    Interval trigger for one slot. Slots start evenly spread across the
+    interval (from a second from now, so slot 0 does not wait a whole interval),
+    and each run is jittered within its slot's share of it.
+    """
+    slots = settings.TRACKER_POLL_SLOTS
+    start_date = timezone.now() + timedelta(seconds=1 + interval * slot / slots) if start else None
+    return IntervalTrigger(seconds=interval, start_date=start_date, jitter=interval / slots)
+
+
+def poll_slot(scheduler, interval, slot):
+    """
+    Fetch the satellites polled every `interval` seconds that fall in `slot`,
+    then apply backpressure when the cycle took too long
+    """
+    satellites = Satellite.objects.annotate(
+        poll_slot=Mod('id', settings.TRACKER_POLL_SLOTS)
+    ).filter(poll_interval=interval, poll_slot=slot)
+    
+    started = time.monotonic()
+    fetch_and_save_satellite_positions(satellites)
+    apply_backpressure(scheduler, interval, slot, time.monotonic() - started)
+
+
+def apply_backpressure(scheduler, interval, slot, elapsed):
+    """
+    Double a poll job's interval while its cycles take more than
+    TRACKER_POLL_BACKPRESSURE of it (up to TRACKER_POLL_MAX_BACKOFF times the
+    configured interval), and halve it back once cycles are fast again
+    """
+    job_id = poll_job_id(interval, slot)
+    with _intervals_lock:
+        current = _intervals.get(job_id, interval)
+        if elapsed > current * settings.TRACKER_POLL_BACKPRESSURE:
+            target = min(current * 2, interval * settings.TRACKER_POLL_MAX_BACKOFF)
+        elif elapsed < current * settings.TRACKER_POLL_BACKPRESSURE / 2 and current > interval:
+            target = max(current // 2, interval)
+        else:
+            return
+        if target == current:
+            return
+        _intervals[job_id] = target
+    
+    print(f"Poll job {job_id} took {elapsed:.1f}s; running it every {target}s instead of every {current}s.")
+    scheduler.reschedule_job(job_id, trigger=poll_trigger(target, slot, start=False))
+
+
+def sync_poll_jobs(scheduler):
+    """
+    Keep one poll job per (interval, slot) for the intervals of the satellites
+    currently selected by someone, adding and removing jobs as that changes
+    """
+    intervals = set(tracked_satellites().order_by().values_list('poll_interval', flat=True).distinct())
+    wanted = {
+        poll_job_id(interval, slot): (interval, slot)
+        for interval in intervals
+        for slot in range(settings.TRACKER_POLL_SLOTS)
+    }
+    
+    for job in scheduler.get_jobs():
+        if job.id.startswith(POLL_JOB_PREFIX) and job.id not in wanted:
+            job.remove()
+            with _intervals_lock:
+                _intervals.pop(job.id, None)
+    
+    for job_id, (interval, slot) in wanted.items():
+        if scheduler.get_job(job_id) is None:
+            scheduler.add_job(
+                poll_slot,
+                trigger=poll_trigger(interval, slot),
+                args=[scheduler, interval, slot],
+                id=job_id,
+                name=f"Fetch satellite positions every {interval}s (slot {slot})",
+                # A slow run is never overlapped by the next one; missed runs
+                # collapse into a single catch-up run
+                max_instances=1,
+                coalesce=True,
+                misfire_grace_time=interval,
+            )
 
 
 def start_scheduler():
@@ -10,12 +111,16 @@ def start_scheduler():
     """
     scheduler = BackgroundScheduler()
     
-    # Fetch satellite positions every minute at the start of the minute
+    # Poll jobs follow each satellite's poll_interval; pick up changes every minute
     scheduler.add_job(
-        fetch_and_save_satellite_positions,
-        trigger=CronTrigger(second=0),  # Run at the start of every minute
-        id='fetch_satellite_positions',
-        name='Fetch satellite positions every minute',
+        sync_poll_jobs,
+        trigger=IntervalTrigger(seconds=settings.TRACKER_POLL_SYNC_INTERVAL),
+        args=[scheduler],
+        id='sync_poll_jobs',
+        name='Sync satellite poll jobs',
+        next_run_time=timezone.now(),
+        max_instances=1,
+        coalesce=True,
         replace_existing=True,
     )
     
@@ -31,4 +136,4 @@ def start_scheduler():
     scheduler.start()
     print("Scheduler started successfully!")
     
-    return scheduler
\ No newline at end of file
+    return scheduler
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from rest_framework import serializers
+
+from .cache import invalidate_selections
+from .models import Satellite, UserSatelliteSelection
+
+
+def update_selections(user, add=(), remove=()):
+    """
+    Start tracking the satellites in `add` and stop tracking those in `remove`
+    for a user, in a constant number of queries. New and previously stopped
+    selections are written with a single upsert. Raises ValidationError when a
+    satellite is unknown or the user would exceed TRACKER_MAX_SELECTIONS.
+    Returns (created, reactivated, removed) sets of satellite ids.
+    """
+    add, remove = set(add) - set(remove), set(remove)
+
+    if add:
+        known = set(Satellite.objects.filter(id__in=add, is_active=True).values_list('id', flat=True))
+        unknown = add - known
+        if unknown:
+            raise serializers.ValidationError(
+                f"Unknown satellites: {', '.join(map(str, sorted(unknown)))}"
+            )
+
+    with transaction.atomic():
+        # Every active selection, plus any earlier selection of an added satellite
+        existing = dict(
+            UserSatelliteSelection.objects.select_for_update()
+            .filter(Q(is_active=True) | Q(satellite_id__in=add), user=user)
+            .values_list('satellite_id', 'is_active')
+        )
+        active = {satellite_id for satellite_id, is_active in existing.items() if is_active}
+        created = add - set(existing)
+        reactivated = {satellite_id for satellite_id in add & set(existing) if not existing[satellite_id]}
+        removed = remove & active
+
+        total = len(active - removed) + len(created) + len(reactivated)
+        if total > settings.TRACKER_MAX_SELECTIONS:
+            raise serializers.ValidationError(
+                f"You can only track {settings.TRACKER_MAX_SELECTIONS} satellites at a time. "
+                f"Please stop tracking {total - settings.TRACKER_MAX_SELECTIONS} first."
+            )
+
+        if removed:
+            UserSatelliteSelection.objects.filter(
+                user=user, satellite_id__in=removed, is_active=True
+            ).update(is_active=False)
+        if created or reactivated:
+            UserSatelliteSelection.objects.bulk_create(
+                [
+                    UserSatelliteSelection(user=user, satellite_id=satellite_id, is_active=True)
+                    for satellite_id in sorted(created | reactivated)
+                ],
+                update_conflicts=True,
+                unique_fields=['user', 'satellite'],
+                update_fields=['is_active'],
+            )
+
+    if created or reactivated or removed:
+        invalidate_selections(user.id)
+    return created, reactivated, removed
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
 from .models import Satellite, SatellitePosition, UserSatelliteSelection
 
@@ -49,25 +50,17 @@ class UserSatelliteSelectionSerializer(serializers.ModelSerializer):
         model = UserSatelliteSelection
         fields = ['id', 'satellite', 'satellite_name', 'selected_at', 'is_active']
         read_only_fields = ['selected_at', 'is_active']
+
+
+class BulkSelectionSerializer(serializers.Serializer):
+    add = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list, max_length=settings.TRACKER_MAX_SELECTIONS
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(), required=False, default=list, max_length=settings.TRACKER_MAX_SELECTIONS
+    )
     
     def validate(self, data):
-        user = self.context['request'].user
-        satellite = data['satellite']
-        
-        active_selections = UserSatelliteSelection.objects.filter(
-            user=user, is_active=True
-        ).count()
-        
-        if active_selections >= 2:
-            raise serializers.ValidationError(
-                "You can only track 2 satellites at a time. Please deactivate one first."
-            )
-        
-        if UserSatelliteSelection.objects.filter(
-            user=user, satellite=satellite, is_active=True
-        ).exists():
-            raise serializers.ValidationError(
-                "You are already tracking this satellite."
-            )
-        
+        if not data['add'] and not data['remove']:
+            raise serializers.ValidationError("Nothing to add or remove.")
         return data
\ No newline at end of file
@@ -0,0 +1,178 @@
+"""
+Local stand-in for the upstream position APIs, used by the benchmarks.
+
+UpstreamSimulator serves synthetic fixes in the built-in response formats
+(see tracker.parsers) from a background thread, on one or more loopback
+ports so the fetchers see several hosts:
+
+    /<format>/<norad id>                  open-notify, wheretheiss, satellitemap
+    /positions-batch/<first>-<last>       one batch response for a range of ids
+
+Each response is delayed by `latency` seconds (plus up to `jitter`), or by
+the `delay` query parameter when a request has one, and a `failure_rate`
+fraction of requests fail with HTTP 503. `peak_in_flight` records the most
+concurrent requests each host (host:port) has served.
+"""
+import asyncio
+import math
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+
+SINGLE_FORMATS = ('open-notify', 'wheretheiss', 'satellitemap')
+BATCH_FORMAT = 'positions-batch'
+
+ORBIT_PERIOD = 5580.0  # seconds, about 93 minutes
+SIDEREAL_DAY = 86164.0
+
+
+def synthetic_fix(norad_id, now):
+    """
+    A deterministic circular orbit per NORAD id: (lat, lon, alt, velocity)
+    """
+    inclination = math.radians(20 + norad_id % 80)
+    angle = (norad_id * 0.618034) % 1 * 2 * math.pi + now * 2 * math.pi / ORBIT_PERIOD
+    latitude = math.degrees(math.asin(math.sin(inclination) * math.sin(angle)))
+    longitude = math.degrees(math.atan2(math.cos(inclination) * math.sin(angle), math.cos(angle)))
+    longitude = (longitude - now * 360 / SIDEREAL_DAY + norad_id * 37) % 360 - 180
+    return latitude, longitude, 400.0 + norad_id % 1200, 27000.0
+
+
+def render(response_format, norad_id, now):
+    """
+    A response body for one satellite in one of the single-satellite formats
+    """
+    latitude, longitude, altitude, velocity = synthetic_fix(norad_id, now)
+    timestamp = int(now)
+    if response_format == 'open-notify':
+        return {
+            'message': 'success',
+            'timestamp': timestamp,
+            'iss_position': {'latitude': f'{latitude:.4f}', 'longitude': f'{longitude:.4f}'},
+        }
+    if response_format == 'wheretheiss':
+        return {
+            'name': f'sat-{norad_id}', 'id': norad_id, 'latitude': latitude, 'longitude': longitude,
+            'altitude': altitude, 'velocity': velocity, 'timestamp': timestamp, 'units': 'kilometers',
+        }
+    if response_format == 'satellitemap':
+        return {
+            'lat': latitude, 'lon': longitude, 'alt': altitude,
+            'timestamp': datetime.fromtimestamp(timestamp, tz=dt_timezone.utc).isoformat(),
+        }
+    raise ValueError(f"Unknown response format {response_format!r}")
+
+
+def render_batch(first, last, now):
+    positions = []
+    for norad_id in range(first, last + 1):
+        latitude, longitude, altitude, velocity = synthetic_fix(norad_id, now)
+        positions.append({
+            'norad_id': norad_id, 'latitude': latitude, 'longitude': longitude,
+            'altitude': altitude, 'velocity': velocity, 'timestamp': int(now),
+        })
+    return {'positions': positions}
+
+
+class UpstreamSimulator:
+    def __init__(self, hosts=1, latency=0.05, jitter=0.0, failure_rate=0.0, seed=0):
+        self.hosts = hosts
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.failures = 0
+        self.in_flight = {}
+        self.peak_in_flight = {}
+        self.base_urls = []
+        self._random = random.Random(seed)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._started = threading.Event()
+        self._error = None
+
+    def url(self, index, response_format, norad_id):
+        """
+        The api_url of a single-satellite format, spread over the hosts by index
+        """
+        return f"{self.base_urls[index % self.hosts]}/{response_format}/{norad_id}"
+
+    def batch_url(self, index, first, last):
+        return f"{self.base_urls[index % self.hosts]}/{BATCH_FORMAT}/{first}-{last}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='upstream-simulator', daemon=True)
+        self._thread.start()
+        self._started.wait()
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def stop(self):
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        self.requests += 1
+        host = request.host
+        self.in_flight[host] = self.in_flight.get(host, 0) + 1
+        self.peak_in_flight[host] = max(self.peak_in_flight.get(host, 0), self.in_flight[host])
+        try:
+            delay = float(request.query['delay'])
+        except (KeyError, ValueError):
+            delay = self.latency + self._random.random() * self.jitter
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.in_flight[host] -= 1
+        if self._random.random() < self.failure_rate:
+            self.failures += 1
+            return web.json_response({'error': 'simulated failure'}, status=503)
+
+        response_format, key = request.match_info['format'], request.match_info['key']
+        now = time.time()
+        try:
+            if response_format == BATCH_FORMAT:
+                first, last = (int(value) for value in key.split('-'))
+                return web.json_response(render_batch(first, last, now))
+            return web.json_response(render(response_format, int(key), now))
+        except ValueError:
+            return web.json_response({'error': 'not found'}, status=404)
+
+    def _run(self):
+        from aiohttp import web
+
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            app = web.Application()
+            app.router.add_get('/{format}/{key}', self._handle)
+            self._runner = web.AppRunner(app, access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            for _ in range(self.hosts):
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.bind(('127.0.0.1', 0))
+                self._loop.run_until_complete(web.SockSite(self._runner, sock).start())
+                self.base_urls.append(f"http://127.0.0.1:{sock.getsockname()[1]}")
+        except Exception as e:
+            self._error = e
+            self._started.set()
+            return
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.close()
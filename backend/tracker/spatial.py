@@ -0,0 +1,261 @@
+"""
+Spatial index over the latest fix of every tracked satellite.
+
+Fixes are kept in flat NumPy arrays, one slot per satellite, holding the
+sub-satellite point as a unit vector. A lat/lon grid maps each cell to the
+slots whose sub-satellite point lies in it, so a query only computes exact
+distances for the slots in the cells its area overlaps. The index is updated
+in place as new fixes arrive (see tracker.relay).
+"""
+import math
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import SatellitePosition
+
+
+# Spherical Earth, as in tracker.propagation.great_circle_km
+EARTH_RADIUS_KM = 6378.137
+
+
+def unit_vector(lat, lon):
+    lat, lon = np.radians(lat), np.radians(lon)
+    return np.stack([np.cos(lat) * np.cos(lon), np.cos(lat) * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+class PositionIndex:
+    def __init__(self, cell_degrees=10, capacity=1024):
+        self.cell_degrees = cell_degrees
+        self.rows = math.ceil(180 / cell_degrees)
+        self.cols = math.ceil(360 / cell_degrees)
+        self._slots = {}
+        self._names = {}
+        self._size = 0
+        self._allocate(capacity)
+        self._cells = defaultdict(set)
+        self._cell_arrays = {}
+        self._lock = threading.RLock()
+        self._seeded = False
+
+    def _allocate(self, capacity):
+        def grow(array, shape, dtype):
+            grown = np.zeros(shape, dtype=dtype)
+            if array is not None:
+                grown[:len(array)] = array
+            return grown
+
+        self._ids = grow(getattr(self, '_ids', None), capacity, np.int64)
+        self._xyz = grow(getattr(self, '_xyz', None), (capacity, 3), np.float64)
+        self._lat = grow(getattr(self, '_lat', None), capacity, np.float64)
+        self._lon = grow(getattr(self, '_lon', None), capacity, np.float64)
+        self._alt = grow(getattr(self, '_alt', None), capacity, np.float64)
+        self._time = grow(getattr(self, '_time', None), capacity, np.float64)
+        self._cell = grow(getattr(self, '_cell', None), capacity, np.int64)
+
+    def __len__(self):
+        return self._size
+
+    def _cell_of(self, lat, lon):
+        row = min(int((lat + 90) // self.cell_degrees), self.rows - 1)
+        col = int(((lon + 180) % 360) // self.cell_degrees) % self.cols
+        return row * self.cols + col
+
+    def update(self, positions):
+        """
+        Store the newest of the given SatellitePosition-like fixes of each
+        satellite, ignoring fixes older than the one already indexed
+        """
+        with self._lock:
+            for position in positions:
+                timestamp = position.timestamp.timestamp()
+                slot = self._slots.get(position.satellite_id)
+                if slot is None:
+                    if self._size == len(self._ids):
+                        self._allocate(2 * len(self._ids))
+                    slot = self._size
+                    self._size += 1
+                    self._slots[position.satellite_id] = slot
+                    self._ids[slot] = position.satellite_id
+                    self._cell[slot] = -1
+                elif timestamp <= self._time[slot]:
+                    continue
+
+                self._names[position.satellite_id] = position.satellite.name
+                self._lat[slot] = position.latitude
+                self._lon[slot] = position.longitude
+                self._alt[slot] = np.nan if position.altitude is None else position.altitude
+                self._time[slot] = timestamp
+                self._xyz[slot] = unit_vector(position.latitude, position.longitude)
+
+                cell = self._cell_of(position.latitude, position.longitude)
+                if cell != self._cell[slot]:
+                    if self._cell[slot] >= 0:
+                        self._cells[self._cell[slot]].discard(slot)
+                        self._cell_arrays.pop(self._cell[slot], None)
+                    self._cells[cell].add(slot)
+                    self._cell_arrays.pop(cell, None)
+                    self._cell[slot] = cell
+
+    def seed(self, lookback):
+        """
+        Fill the index with the latest fix of every satellite seen within
+        `lookback`, once per process
+        """
+        if self._seeded:
+            return
+        with self._lock:
+            if self._seeded:
+                return
+            latest = (
+                SatellitePosition.objects.filter(timestamp__gte=timezone.now() - lookback)
+                .annotate(rank=Window(
+                    RowNumber(), partition_by=[F('satellite_id')], order_by=F('timestamp').desc()
+                ))
+                .filter(rank=1)
+                .select_related('satellite')
+            )
+            self.update(list(latest))
+            self._seeded = True
+
+    def _candidates(self, lat_min, lat_max, lon_ranges):
+        """
+        Slots in the grid cells overlapping the given latitude band and
+        longitude ranges (degrees, each within -180..180)
+        """
+        row_min = max(int((lat_min + 90) // self.cell_degrees), 0)
+        row_max = min(int((lat_max + 90) // self.cell_degrees), self.rows - 1)
+        cols = set()
+        for lon_min, lon_max in lon_ranges:
+            col_min = int((lon_min + 180) // self.cell_degrees)
+            col_max = min(int((lon_max + 180) // self.cell_degrees), self.cols - 1)
+            cols.update(range(col_min, col_max + 1))
+
+        cells = [row * self.cols + col for row in range(row_min, row_max + 1) for col in cols]
+        if len(cells) * 4 > self.rows * self.cols:
+            # Most of the globe: scanning every slot is cheaper than gathering
+            return np.arange(self._size)
+
+        arrays = []
+        for cell in cells:
+            array = self._cell_arrays.get(cell)
+            if array is None:
+                array = self._cell_arrays[cell] = np.fromiter(self._cells.get(cell, ()), dtype=np.int64)
+            if len(array):
+                arrays.append(array)
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int64)
+
+    def _around(self, lat, lon, angle):
+        """
+        Candidate slots within `angle` radians of a point
+        """
+        degrees = math.degrees(angle)
+        lat_min, lat_max = lat - degrees, lat + degrees
+        if lat_min <= -90 or lat_max >= 90 or math.sin(angle) >= math.cos(math.radians(lat)):
+            # The cap reaches a pole: every longitude
+            return self._candidates(max(lat_min, -90), min(lat_max, 90), [(-180, 180)])
+        spread = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+        return self._candidates(lat_min, lat_max, split_longitudes(lon - spread, lon + spread))
+
+    def _fresh(self, slots, max_age):
+        cutoff = timezone.now().timestamp() - max_age.total_seconds()
+        return slots[self._time[slots] >= cutoff]
+
+    def _results(self, slots, **columns):
+        ids = self._ids[slots].tolist()
+        altitudes = self._alt[slots]
+        rows = zip(
+            ids,
+            [self._names[satellite_id] for satellite_id in ids],
+            self._lat[slots].tolist(),
+            self._lon[slots].tolist(),
+            np.where(np.isnan(altitudes), None, altitudes).tolist(),
+            [datetime.fromtimestamp(timestamp, tz=dt_timezone.utc).isoformat() for timestamp in self._time[slots].tolist()],
+            *(values.tolist() for values in columns.values()),
+        )
+        keys = ['satellite_id', 'satellite', 'latitude', 'longitude', 'altitude', 'timestamp', *columns]
+        return [dict(zip(keys, row)) for row in rows]
+
+    def within_radius(self, lat, lon, radius_km, max_age):
+        """
+        Satellites whose sub-satellite point is within radius_km of lat/lon,
+        nearest first
+        """
+        angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+        with self._lock:
+            slots = self._fresh(self._around(lat, lon, angle), max_age)
+            dots = self._xyz[slots] @ unit_vector(lat, lon)
+            keep = dots >= math.cos(angle)
+            slots, dots = slots[keep], dots[keep]
+            order = np.argsort(-dots)
+            distance = EARTH_RADIUS_KM * np.arccos(np.clip(dots[order], -1, 1))
+            return self._results(slots[order], distance_km=distance)
+
+    def within_bbox(self, lat_min, lon_min, lat_max, lon_max, max_age):
+        """
+        Satellites whose sub-satellite point is inside the box. A box with
+        lon_min > lon_max crosses the antimeridian.
+        """
+        lon_ranges = [(lon_min, lon_max)] if lon_min <= lon_max else [(lon_min, 180), (-180, lon_max)]
+        with self._lock:
+            slots = self._fresh(self._candidates(lat_min, lat_max, lon_ranges), max_age)
+            lat, lon = self._lat[slots], self._lon[slots]
+            keep = (lat >= lat_min) & (lat <= lat_max)
+            if lon_min <= lon_max:
+                keep &= (lon >= lon_min) & (lon <= lon_max)
+            else:
+                keep &= (lon >= lon_min) | (lon <= lon_max)
+            return self._results(slots[keep])
+
+    def above_horizon(self, lat, lon, min_elevation, max_age):
+        """
+        Satellites at least min_elevation degrees above the horizon of an
+        observer at lat/lon (sea level), highest first. Fixes without an
+        altitude are skipped.
+        """
+        elevation = math.radians(min_elevation)
+        with self._lock:
+            altitudes = self._alt[:self._size]
+            max_alt = np.nanmax(altitudes) if self._size and not np.isnan(altitudes).all() else 0.0
+            # Widest ground footprint at that elevation, for the highest satellite
+            angle = math.acos(EARTH_RADIUS_KM * math.cos(elevation) / (EARTH_RADIUS_KM + max_alt)) - elevation
+            angle = max(angle, 0.0)
+            up = unit_vector(lat, lon)
+            slots = self._fresh(self._around(lat, lon, angle), max_age)
+            xyz = self._xyz[slots]
+            keep = xyz @ up >= math.cos(angle)
+            slots, xyz = slots[keep], xyz[keep]
+            altitudes = self._alt[slots]
+            keep = ~np.isnan(altitudes)
+            slots, xyz, altitudes = slots[keep], xyz[keep], altitudes[keep]
+
+            satellite = xyz * (EARTH_RADIUS_KM + altitudes)[:, None]
+            line_of_sight = satellite - EARTH_RADIUS_KM * up
+            distance = np.linalg.norm(line_of_sight, axis=1)
+            elevations = np.degrees(np.arcsin(np.clip((line_of_sight @ up) / distance, -1, 1)))
+            keep = elevations >= min_elevation
+            slots, elevations, distance = slots[keep], elevations[keep], distance[keep]
+            order = np.argsort(-elevations)
+            return self._results(slots[order], elevation=elevations[order], range_km=distance[order])
+
+
+def split_longitudes(lon_min, lon_max):
+    """
+    Split a longitude range that may extend past +-180 into ranges within it
+    """
+    if lon_max - lon_min >= 360:
+        return [(-180, 180)]
+    if lon_min < -180:
+        return [(lon_min + 360, 180), (-180, lon_max)]
+    if lon_max > 180:
+        return [(lon_min, 180), (-180, lon_max - 360)]
+    return [(lon_min, lon_max)]
+
+
+position_index = PositionIndex(cell_degrees=settings.TRACKER_SPATIAL_CELL_DEGREES)
@@ -0,0 +1,110 @@
+import asyncio
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import get_selected_satellites, is_user_active
+from .pubsub import broker, encode_event
+
+
+class PositionStreamApp:
+    """
+    ASGI endpoint streaming new fixes of the user's selected satellites as
+    server-sent events. Browsers cannot set headers on an EventSource, so the
+    JWT access token is passed as the `token` query parameter.
+    """
+
+    heartbeat_interval = 15
+
+    def __init__(self, broker=broker):
+        self.broker = broker
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode())
+        user_id = self.authenticate(query.get('token', [''])[0])
+        if user_id is not None and not await sync_to_async(is_user_active)(user_id):
+            user_id = None
+        if user_id is None:
+            await self.respond(send, 401, b'{"detail":"Invalid or missing token"}')
+            return
+
+        satellites = await sync_to_async(self.selected_satellites)(user_id)
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                (b'access-control-allow-origin', b'*'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': encode_event('subscribed', {'satellites': satellites}),
+            'more_body': True,
+        })
+
+        subscription = self.broker.subscribe(
+            [satellite['id'] for satellite in satellites], asyncio.get_running_loop()
+        )
+        disconnected = asyncio.ensure_future(self.wait_for_disconnect(receive))
+        try:
+            while not disconnected.done():
+                message = asyncio.ensure_future(subscription.get())
+                done, _ = await asyncio.wait(
+                    {message, disconnected},
+                    timeout=self.heartbeat_interval,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if message in done:
+                    body = message.result()
+                else:
+                    message.cancel()
+                    if disconnected in done:
+                        break
+                    body = b': heartbeat\n\n'
+                await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+        finally:
+            subscription.close()
+            disconnected.cancel()
+
+    @staticmethod
+    def authenticate(raw_token):
+        if not raw_token:
+            return None
+        try:
+            token = AccessToken(raw_token)
+        except TokenError:
+            return None
+        return token.get(api_settings.USER_ID_CLAIM)
+
+    @staticmethod
+    def selected_satellites(user_id):
+        return [
+            {'id': satellite_id, 'name': name}
+            for satellite_id, name in get_selected_satellites(user_id)
+        ]
+
+    @staticmethod
+    async def wait_for_disconnect(receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+    @staticmethod
+    async def respond(send, status, body):
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [
+                (b'content-type', b'application/json'),
+                (b'access-control-allow-origin', b'*'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': body})
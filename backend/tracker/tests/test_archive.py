@@ -0,0 +1,82 @@
+import shutil
+import tempfile
+from datetime import datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.test import TestCase, override_settings
+
+from tracker.archive import archive_closed_days, archive_day, archived_count, is_archived, read_range
+from tracker.models import Satellite, SatellitePosition
+from tracker.partitions import ensure_partition, insert_positions, list_partitions
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        # Partitions created by earlier tests were rolled back with them
+        list_partitions(refresh=True)
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir)
+        settings = override_settings(TRACKER_ARCHIVE_DIR=archive_dir, TRACKER_ARCHIVE_GRACE_DAYS=1)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.satellites = [
+            Satellite.objects.create(name=f'Sat {i}', satellite_id=str(i), api_url=f'https://example.com/{i}')
+            for i in range(3)
+        ]
+        self.today = datetime.now(dt_timezone.utc).date()
+
+    def add_fixes(self, day, minutes, satellites=None):
+        midnight = datetime.combine(day, dt_time(), tzinfo=dt_timezone.utc)
+        insert_positions([
+            SatellitePosition(
+                satellite=satellite, timestamp=midnight + timedelta(minutes=minute),
+                latitude=minute / 10, longitude=-minute / 7,
+                altitude=None if minute % 3 == 0 else 400.0 + minute, velocity=27600.0,
+            )
+            for satellite in satellites or self.satellites
+            for minute in minutes
+        ])
+        list_partitions(refresh=True)
+
+    def test_days_in_their_grace_period_are_not_archived(self):
+        old_day, yesterday = self.today - timedelta(days=2), self.today - timedelta(days=1)
+        for day in (old_day, yesterday, self.today):
+            self.add_fixes(day, range(5))
+
+        self.assertEqual(archive_closed_days(), [old_day])
+        self.assertFalse(is_archived(yesterday))
+        self.assertEqual(archive_closed_days(), [])
+
+    def test_a_day_is_archived_again_once_its_partition_gains_fixes(self):
+        day = self.today - timedelta(days=3)
+        self.add_fixes(day, range(5))
+        self.assertEqual(archive_closed_days(), [day])
+
+        self.add_fixes(day, range(5, 8), self.satellites[:1])
+        self.assertEqual(archive_closed_days(), [day])
+        self.assertEqual(archived_count(day), 18)
+
+    def test_streamed_archive_round_trips(self):
+        day = self.today - timedelta(days=3)
+        minutes = range(0, 60 * 24, 7)
+        self.add_fixes(day, minutes)
+
+        # Chunks smaller than a satellite's fixes, and not a divisor of them
+        self.assertEqual(archive_day(day, chunk_size=97), 3 * len(minutes))
+
+        midnight = datetime.combine(day, dt_time(), tzinfo=dt_timezone.utc)
+        fixes = read_range(self.satellites[1].id, midnight, midnight + timedelta(days=1))
+        expected_ms = [int((midnight + timedelta(minutes=minute)).timestamp() * 1000) for minute in minutes]
+        self.assertEqual(fixes['timestamp'].tolist(), expected_ms)
+        np.testing.assert_allclose(fixes['latitude'], [minute / 10 for minute in minutes], atol=1e-6)
+        np.testing.assert_allclose(fixes['longitude'], [-minute / 7 for minute in minutes], atol=1e-6)
+        self.assertTrue(np.isnan(fixes['altitude'][0]))
+        self.assertEqual(fixes['altitude'][1], 407.0)
+
+    def test_an_empty_partition_archives_to_an_empty_day(self):
+        day = self.today - timedelta(days=3)
+        ensure_partition(day)
+
+        self.assertEqual(archive_day(day), 0)
+        self.assertEqual(archived_count(day), 0)
@@ -0,0 +1,87 @@
+import time
+
+from django.test import SimpleTestCase
+
+from tracker.async_fetcher import AsyncFetchEngine, interleave_hosts
+from tracker.simulator import UpstreamSimulator
+
+
+class AsyncFetchTestCase(SimpleTestCase):
+    simulator_options = {}
+    engine_options = {}
+
+    def setUp(self):
+        self.simulator = UpstreamSimulator(**{'latency': 0.0, **self.simulator_options}).start()
+        self.addCleanup(self.simulator.stop)
+        self.engine = AsyncFetchEngine(**{'request_timeout': 5, **self.engine_options})
+        self.addCleanup(self.engine.close)
+
+    def urls(self, count, response_format='wheretheiss'):
+        return [self.simulator.url(i, response_format, 25544 + i) for i in range(count)]
+
+
+class BackpressureTests(AsyncFetchTestCase):
+    simulator_options = {'hosts': 2}
+    engine_options = {'max_pending': 4}
+
+    def test_slow_consumer_holds_back_requests(self):
+        consumed = 0
+        for response in self.engine.fetch(self.urls(40), deadline=30):
+            self.assertTrue(response['success'])
+            consumed += 1
+            self.assertLessEqual(self.simulator.requests, consumed + self.engine.max_pending)
+            time.sleep(0.005)
+        self.assertEqual(consumed, 40)
+
+    def test_hosts_are_interleaved(self):
+        urls = ['http://a/1', 'http://a/2', 'http://a/3', 'http://b/1']
+        self.assertEqual(list(interleave_hosts(urls)), ['http://a/1', 'http://b/1', 'http://a/2', 'http://a/3'])
+
+
+class FetchTests(AsyncFetchTestCase):
+    simulator_options = {'hosts': 2, 'latency': 0.05}
+    engine_options = {'max_per_host': 3}
+
+    def test_concurrency_is_capped_per_host(self):
+        responses = list(self.engine.fetch(self.urls(24), deadline=30))
+        self.assertEqual(len(responses), 24)
+        self.assertTrue(all(response['success'] for response in responses))
+        self.assertEqual(len(self.simulator.peak_in_flight), 2)
+        self.assertEqual(set(self.simulator.peak_in_flight.values()), {3})
+
+    def test_responses_are_yielded_in_completion_order(self):
+        slow = f"{self.urls(1)[0]}?delay=0.5"
+        fast = self.urls(4)[1:]
+        responses = list(self.engine.fetch([slow, *fast], deadline=30))
+        self.assertEqual([response['api_url'] for response in responses][-1], slow)
+        self.assertEqual({response['api_url'] for response in responses[:3]}, set(fast))
+
+    def test_requests_past_the_deadline_are_reported(self):
+        stuck = f"{self.urls(1)[0]}?delay=2"
+        fast = self.urls(2)[1]
+        start = time.monotonic()
+        responses = {response['api_url']: response for response in self.engine.fetch([stuck, fast], deadline=0.3)}
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertTrue(responses[fast]['success'])
+        self.assertFalse(responses[stuck]['success'])
+        self.assertTrue(responses[stuck]['cancelled'])
+        self.assertIn('deadline', responses[stuck]['error'])
+
+    def test_upstream_errors_carry_their_status(self):
+        missing = self.simulator.url(0, 'no-such-format', 25544)
+        response, = self.engine.fetch([missing], deadline=30)
+        self.assertFalse(response['success'])
+        self.assertEqual(response['status'], 404)
+
+    def test_on_idle_runs_only_once_caught_up(self):
+        calls = []
+
+        def on_idle():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                # Slow enough for every response to arrive meanwhile
+                time.sleep(0.3)
+
+        responses = list(self.engine.fetch(self.urls(5), deadline=30, on_idle=on_idle))
+        self.assertEqual(len(responses), 5)
+        self.assertEqual(len(calls), 1)
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from tracker.backfill import Backfill, ElementsSource, parse_timestamp
+from tracker.models import Satellite, SatellitePosition
+from tracker.partitions import list_partitions
+
+
+ISS_TLE = (
+    '1 25544U 98067A   19343.69339541  .00001764  00000-0  38792-4 0  9991',
+    '2 25544  51.6439 211.2001 0007417  17.6667  85.6398 15.50103472202482',
+)
+
+
+class ParseTimestampTests(SimpleTestCase):
+    def test_formats(self):
+        expected = datetime(2024, 1, 1, 12, tzinfo=dt_timezone.utc)
+        for value in (1704110400, ' 1704110400.0 ', '2024-01-01T12:00:00Z', '2024-01-01T12:00:00', '2024-01-01T13:00:00+01:00'):
+            with self.subTest(value=value):
+                self.assertEqual(parse_timestamp(value), expected)
+
+
+class ElementsBackfillTests(TestCase):
+    def setUp(self):
+        # Partitions created by earlier tests were rolled back with them
+        list_partitions(refresh=True)
+        Satellite.objects.create(
+            name='ISS', satellite_id='25544', api_url='https://example.com/25544',
+            tle_line1=ISS_TLE[0], tle_line2=ISS_TLE[1],
+        )
+        self.checkpoint_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.checkpoint_dir)
+        self.start = datetime(2019, 12, 9, 12, 0, tzinfo=dt_timezone.utc)
+
+    def interrupted_run(self, source):
+        def interrupt(backfill):
+            raise KeyboardInterrupt
+
+        backfill = Backfill(source, chunk_size=3, checkpoint_dir=self.checkpoint_dir)
+        with self.assertRaises(KeyboardInterrupt):
+            backfill.run(on_chunk=interrupt)
+        self.assertEqual(backfill.saved, 3)
+
+    def test_rerun_resumes_a_range_up_to_now(self):
+        first_run = self.start + timedelta(minutes=10)
+        with mock.patch('django.utils.timezone.now', return_value=first_run):
+            self.interrupted_run(ElementsSource(Satellite.objects.all(), self.start, None, 60))
+
+        # The rerun keeps the end chosen by the first run
+        with mock.patch('django.utils.timezone.now', return_value=first_run + timedelta(hours=1)):
+            source = ElementsSource(Satellite.objects.all(), self.start, None, 60)
+            backfill = Backfill(source, chunk_size=3, checkpoint_dir=self.checkpoint_dir)
+            self.assertTrue(backfill.load_checkpoint())
+            self.assertEqual(source.end, first_run)
+            backfill.run()
+
+        self.assertEqual(backfill.saved, 10)
+        self.assertEqual(SatellitePosition.objects.count(), 10)
+        self.assertEqual(os.listdir(self.checkpoint_dir), [])
+
+    def test_explicit_end_is_part_of_the_job(self):
+        end = self.start + timedelta(minutes=10)
+        self.interrupted_run(ElementsSource(Satellite.objects.all(), self.start, end, 60))
+
+        other = Backfill(
+            ElementsSource(Satellite.objects.all(), self.start, end + timedelta(minutes=1), 60),
+            checkpoint_dir=self.checkpoint_dir,
+        )
+        self.assertFalse(other.load_checkpoint())
+        same = Backfill(ElementsSource(Satellite.objects.all(), self.start, end, 60), checkpoint_dir=self.checkpoint_dir)
+        self.assertTrue(same.load_checkpoint())
+        self.assertEqual(same.saved, 3)
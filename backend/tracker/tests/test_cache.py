@@ -0,0 +1,82 @@
+import os
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from tracker.cache import SharedVersions, get_selected_satellites, invalidate_selections
+from tracker.models import Satellite, UserSatelliteSelection
+from tracker.relay import PositionRelay
+
+
+class SelectionCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='observer')
+        self.iss, self.hubble = (
+            Satellite.objects.create(name=name, satellite_id=norad_id, api_url=f'https://example.com/{norad_id}')
+            for name, norad_id in (('ISS', '25544'), ('Hubble', '20580'))
+        )
+        UserSatelliteSelection.objects.create(user=self.user, satellite=self.iss)
+
+    def select_elsewhere(self):
+        # As another worker process would: its cache invalidation never reaches us
+        UserSatelliteSelection.objects.create(user=self.user, satellite=self.hubble)
+
+    @override_settings(TRACKER_SHARED_CACHE=False)
+    def test_process_cache_reloads_once_another_process_bumps_the_version(self):
+        versions = SharedVersions(f'tracker_test_versions_{os.getpid()}', slots=64)
+        self.addCleanup(versions.unlink)
+        # The table as another process on the host attaches it
+        elsewhere = SharedVersions(versions.name, versions.slots)
+        self.addCleanup(elsewhere.unlink)
+
+        with mock.patch('tracker.cache.selection_versions', versions):
+            self.assertEqual(get_selected_satellites(self.user.id), [(self.iss.id, 'ISS')])
+            self.select_elsewhere()
+            with self.assertNumQueries(0):
+                self.assertEqual(len(get_selected_satellites(self.user.id)), 1)
+
+            elsewhere.bump(self.user.id)
+            self.assertEqual(len(get_selected_satellites(self.user.id)), 2)
+            with self.assertNumQueries(0):
+                self.assertEqual(len(get_selected_satellites(self.user.id)), 2)
+
+    @override_settings(TRACKER_SHARED_CACHE=False)
+    def test_invalidation_bumps_the_shared_version(self):
+        versions = SharedVersions(f'tracker_test_versions_{os.getpid()}', slots=64)
+        self.addCleanup(versions.unlink)
+
+        with mock.patch('tracker.cache.selection_versions', versions):
+            before = versions.get(self.user.id)
+            invalidate_selections(self.user.id)
+            self.assertEqual(versions.get(self.user.id), before + 1)
+            self.assertEqual(versions.get(self.user.id + 1), 0)
+
+    @override_settings(TRACKER_SHARED_CACHE=True)
+    def test_shared_cache_holds_selections_until_invalidated(self):
+        get_selected_satellites(self.user.id)
+        self.select_elsewhere()
+        with self.assertNumQueries(0):
+            self.assertEqual(len(get_selected_satellites(self.user.id)), 1)
+        invalidate_selections(self.user.id)
+        self.assertEqual(len(get_selected_satellites(self.user.id)), 2)
+
+
+class RelayStartTests(SimpleTestCase):
+    def test_started_once_per_process(self):
+        relay = PositionRelay(interval=3600, lookback=timedelta(minutes=5), overlap=timedelta(seconds=5))
+        self.addCleanup(relay.stop)
+        relay.start()
+        thread = relay._thread
+        relay.start()
+        self.assertIs(relay._thread, thread)
+
+        # A forked worker inherits the state but not the thread
+        with mock.patch('os.getpid', return_value=-1):
+            relay.start()
+            self.assertIsNot(relay._thread, thread)
+            self.assertTrue(relay._thread.is_alive())
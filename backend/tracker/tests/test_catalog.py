@@ -0,0 +1,91 @@
+import os
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from tracker.cache import SharedVersions
+from tracker.models import Satellite
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+class SyncCatalogTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('observer', password='secret')
+        self.client.force_authenticate(self.user)
+
+    def sync(self, filename):
+        call_command('sync_catalog', os.path.join(FIXTURES, filename), stdout=StringIO())
+
+    def names(self):
+        return [satellite['name'] for satellite in self.client.get('/api/satellites/').data['results']]
+
+    def test_sync_drops_cached_catalog_pages(self):
+        Satellite.objects.create(name='Hubble', satellite_id='20580', api_url='https://example.com/20580')
+        self.assertEqual(self.names(), ['Hubble'])
+
+        self.sync('stations.tle')
+        self.assertEqual(self.names(), ['Hubble', 'ISS (ZARYA)', 'NORAD 99999'])
+
+    @override_settings(TRACKER_SHARED_CACHE=False)
+    def test_sync_in_another_process_drops_cached_catalog_pages(self):
+        versions = SharedVersions(f'tracker_test_catalog_{os.getpid()}', slots=1)
+        self.addCleanup(versions.unlink)
+        # The table as the sync_catalog process attaches it
+        elsewhere = SharedVersions(versions.name, versions.slots)
+        self.addCleanup(elsewhere.unlink)
+
+        with mock.patch('tracker.cache.catalog_versions', versions):
+            self.assertEqual(self.names(), [])
+            # Written by the other process, whose cache we do not share
+            Satellite.objects.bulk_create([
+                Satellite(name='Hubble', search_name='hubble', satellite_id='20580', api_url='https://example.com/20580')
+            ])
+            self.assertEqual(self.names(), [])
+
+            elsewhere.bump(0)
+            self.assertEqual(self.names(), ['Hubble'])
+
+    def test_resync_updates_older_elements_only(self):
+        self.sync('stations.tle')
+        Satellite.objects.filter(satellite_id='25544').update(
+            name='ISS', tle_line1='', tle_line2='', elements_epoch=None
+        )
+
+        self.sync('stations.json')
+        iss = Satellite.objects.get(satellite_id='25544')
+        self.assertEqual(iss.name, 'ISS')
+        self.assertTrue(iss.tle_line1.startswith('1 25544U'))
+
+
+class CatalogPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.force_authenticate(User.objects.create_user('observer', password='secret'))
+
+    def test_pages_through_names_differing_only_in_case(self):
+        # Eight names sharing the search name 'abc', and one on either side
+        names = ['aaa', 'zzz'] + [
+            ''.join(c.upper() if mask >> i & 1 else c for i, c in enumerate('abc')) for mask in range(8)
+        ]
+        satellites = [
+            Satellite.objects.create(name=name, satellite_id=str(i), api_url=f'https://example.com/{i}')
+            for i, name in enumerate(names)
+        ]
+
+        seen = []
+        url, params = '/api/satellites/', {'page_size': 3}
+        while url:
+            data = self.client.get(url, params).data
+            seen += [satellite['id'] for satellite in data['results']]
+            url, params = data['next'], {}
+
+        ties = sorted(satellite.id for satellite in satellites[2:])
+        self.assertEqual(seen, [satellites[0].id, *ties, satellites[1].id])
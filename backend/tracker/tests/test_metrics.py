@@ -0,0 +1,59 @@
+import urllib.error
+import urllib.request
+
+from django.test import SimpleTestCase, override_settings
+
+from tracker.metrics import serve_metrics
+
+
+class ServeMetricsTests(SimpleTestCase):
+    def serve(self, **kwargs):
+        server = serve_metrics(0, **kwargs)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def get(self, server, headers=None):
+        host, port = server.server_address[:2]
+        request = urllib.request.Request(f'http://{host}:{port}/metrics', headers=headers or {})
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, response.read().decode()
+        except urllib.error.HTTPError as e:
+            return e.code, ''
+
+    def test_binds_to_loopback_by_default(self):
+        server = self.serve(token='s3cret')
+
+        self.assertEqual(server.server_address[0], '127.0.0.1')
+        status, body = self.get(server, {'Authorization': 'Bearer s3cret'})
+        self.assertEqual(status, 200)
+        self.assertIn('# TYPE', body)
+
+    def test_requires_the_token(self):
+        server = self.serve(token='s3cret')
+
+        self.assertEqual(self.get(server)[0], 401)
+        self.assertEqual(self.get(server, {'Authorization': 'Bearer wrong'})[0], 401)
+        self.assertEqual(self.get(server, {'Authorization': 'Bearer s3cret'})[0], 200)
+
+    def test_serves_nothing_without_a_token(self):
+        server = self.serve()
+
+        self.assertEqual(self.get(server)[0], 404)
+
+
+class MetricsViewTests(SimpleTestCase):
+    @override_settings(TRACKER_METRICS_TOKEN='')
+    def test_not_found_without_a_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer ').status_code, 404)
+
+    @override_settings(TRACKER_METRICS_TOKEN='s3cret')
+    def test_requires_the_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'# TYPE', response.content)
@@ -0,0 +1,28 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.test import SimpleTestCase
+
+from tracker.parsers import get_parser
+
+
+class ResponseParserTests(SimpleTestCase):
+    def test_iso_timestamps_with_a_z_suffix(self):
+        fix = get_parser('satellitemap').parse(
+            {'lat': 51.5, 'lon': -0.1, 'alt': 420, 'timestamp': '2024-03-01T12:00:05Z'}
+        )[None]
+
+        self.assertEqual(fix['timestamp'], datetime(2024, 3, 1, 12, 0, 5, tzinfo=dt_timezone.utc))
+        self.assertEqual((fix['latitude'], fix['longitude'], fix['altitude']), (51.5, -0.1, 420.0))
+
+    def test_iso_timestamps_with_an_offset_or_none(self):
+        parser = get_parser('satellitemap')
+
+        fix = parser.parse({'lat': 0, 'lon': 0, 'timestamp': '2024-03-01T14:00:05+02:00'})[None]
+        self.assertEqual(fix['timestamp'], datetime(2024, 3, 1, 12, 0, 5, tzinfo=dt_timezone.utc))
+        fix = parser.parse({'lat': 0, 'lon': 0, 'timestamp': '2024-03-01T12:00:05'})[None]
+        self.assertEqual(fix['timestamp'], datetime(2024, 3, 1, 12, 0, 5, tzinfo=dt_timezone.utc))
+
+    def test_auto_detects_iso_formats(self):
+        fix = get_parser('auto').parse({'lat': 1, 'lon': 2, 'timestamp': '2024-03-01T12:00:05.250Z'})[None]
+
+        self.assertEqual(fix['timestamp'], datetime(2024, 3, 1, 12, 0, 5, 250000, tzinfo=dt_timezone.utc))
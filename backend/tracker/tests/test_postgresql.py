@@ -0,0 +1,124 @@
+"""
+Storage and locking paths that only exist on PostgreSQL. They run when the
+tests are pointed at a server (DATABASE_ENGINE=postgresql and the POSTGRES_*
+variables, for a user allowed to create the test database) and are skipped
+on SQLite.
+"""
+import threading
+import unittest
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+
+from tracker.ingest import IngestLock
+from tracker.models import Satellite, SatellitePosition
+from tracker.partitions import (
+    STAGING_TABLE, VIEW_NAME, ensure_partition, insert_positions, list_partitions, partition_table,
+)
+
+
+requires_postgresql = unittest.skipUnless(
+    connection.vendor == 'postgresql', 'needs PostgreSQL (DATABASE_ENGINE=postgresql)'
+)
+
+
+def fixes(satellite, start, count, step=timedelta(minutes=1)):
+    return [
+        SatellitePosition(
+            satellite_id=satellite.id, timestamp=start + i * step,
+            latitude=i * 0.5, longitude=-i * 0.5, altitude=420.0, velocity=None,
+        )
+        for i in range(count)
+    ]
+
+
+@requires_postgresql
+class PartitionTests(TestCase):
+    def setUp(self):
+        list_partitions(refresh=True)
+        self.satellite = Satellite.objects.create(name='ISS', satellite_id='25544', api_url='https://example.com/25544')
+        self.start = datetime(2024, 3, 1, 23, 50, tzinfo=dt_timezone.utc)
+
+    def test_ensure_partition_adds_it_to_the_view(self):
+        day = date(2024, 2, 1)
+        ensure_partition(day)
+        self.assertIn(day, list_partitions(refresh=True))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_get_viewdef(%s::regclass)", [VIEW_NAME])
+            self.assertIn(partition_table(day), cursor.fetchone()[0])
+
+        # Partition ids start from the day's block, so they stay unique in the view
+        insert_positions(fixes(self.satellite, datetime(2024, 2, 1, tzinfo=dt_timezone.utc), 1))
+        position = SatellitePosition.objects.get()
+        self.assertGreaterEqual(position.id, day.toordinal() * 10 ** 9)
+
+    def test_insert_positions_splits_days_and_skips_duplicates(self):
+        batch = fixes(self.satellite, self.start, 20)
+        insert_positions(batch)
+        self.assertEqual(SatellitePosition.objects.count(), 20)
+        self.assertEqual(
+            SatellitePosition.objects.filter(timestamp__date=date(2024, 3, 2)).count(), 10,
+        )
+
+        # Replaying overlapping fixes keeps one row per satellite and timestamp
+        insert_positions(fixes(self.satellite, self.start + timedelta(minutes=15), 10))
+        self.assertEqual(SatellitePosition.objects.count(), 25)
+
+    def test_staging_table_is_reused_and_emptied(self):
+        insert_positions(fixes(self.satellite, self.start, 5))
+        insert_positions(fixes(self.satellite, self.start + timedelta(hours=1), 5))
+        self.assertEqual(SatellitePosition.objects.count(), 10)
+        if connection.Database.__name__ == 'psycopg':
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT count(*) FROM {connection.ops.quote_name(STAGING_TABLE)}")
+                self.assertEqual(cursor.fetchone()[0], 5)
+
+    def test_altitude_and_missing_velocity_round_trip(self):
+        insert_positions(fixes(self.satellite, self.start, 2))
+        position = SatellitePosition.objects.order_by('timestamp').last()
+        self.assertEqual((position.latitude, position.longitude), (0.5, -0.5))
+        self.assertEqual(position.altitude, 420.0)
+        self.assertIsNone(position.velocity)
+
+
+@requires_postgresql
+class IngestLockTests(TransactionTestCase):
+    def contend(self):
+        """
+        Try to take the lock from another session (each thread has its own
+        database connection), returning whether that worked
+        """
+        outcome = []
+
+        def run():
+            lock = IngestLock()
+            try:
+                outcome.append(lock.acquire())
+                lock.release()
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        return outcome[0]
+
+    def test_only_one_session_leads(self):
+        lock = IngestLock()
+        self.assertTrue(lock.uses_database)
+        self.assertTrue(lock.acquire())
+        try:
+            self.assertTrue(lock.is_held())
+            self.assertFalse(self.contend())
+        finally:
+            lock.release()
+        self.assertFalse(lock.is_held())
+        self.assertTrue(self.contend())
+
+    def test_lock_is_lost_with_the_session(self):
+        lock = IngestLock()
+        self.assertTrue(lock.acquire())
+        connection.close()
+        self.assertFalse(lock.is_held())
+        self.assertTrue(self.contend())
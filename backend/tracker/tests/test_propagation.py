@@ -0,0 +1,319 @@
+import math
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone as dt_timezone
+from unittest import mock
+
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from tracker import propagation
+from tracker.interpolation import choose_fixes, slerp
+from tracker.models import Satellite, UserSatelliteSelection
+from tracker.passes import elevations, observer_vectors, predict_passes
+from tracker.propagation import Propagator, get_propagator, load_element_sets
+from tracker.ringbuffer import to_fixes
+
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+# The sgp4 documentation's example instant for this ISS element set, at which
+# SGP4 puts it at r = (-6102.443, -986.332, -2820.313) km (TEME)
+REFERENCE_TIME = (2458827 + 0.362605 - 2440587.5) * 86400
+REFERENCE_RADIUS_KM = math.sqrt(6102.443287 ** 2 + 986.332057 ** 2 + 2820.313033 ** 2)
+REFERENCE_SPEED_KMH = math.sqrt(1.455253 ** 2 + 5.527414 ** 2 + 5.101042 ** 2) * 3600
+
+
+class LoadElementSetsTests(SimpleTestCase):
+    def test_loads_named_and_unnamed_tle_sets(self):
+        element_sets = load_element_sets(os.path.join(FIXTURES, 'stations.tle'))
+
+        self.assertEqual([s.norad_id for s in element_sets], ['25544', '99999'])
+        self.assertEqual([s.name for s in element_sets], ['ISS (ZARYA)', ''])
+        self.assertEqual(element_sets[0].epoch.isoformat()[:19], '2019-12-09T16:38:29')
+
+    def test_loads_omm_json_and_csv(self):
+        for filename in ('stations.json', 'stations.csv'):
+            with self.subTest(filename=filename):
+                [element_set] = load_element_sets(os.path.join(FIXTURES, filename))
+                self.assertEqual(element_set.norad_id, '25544')
+                self.assertEqual(element_set.name, 'ISS (ZARYA)')
+                self.assertEqual(element_set.epoch.isoformat()[:19], '2019-12-09T16:38:29')
+
+    def test_loads_every_catalog_file_in_a_directory(self):
+        element_sets = load_element_sets(FIXTURES)
+
+        # stations.csv, stations.json, stations.tle
+        self.assertEqual([s.norad_id for s in element_sets], ['25544', '25544', '25544', '99999'])
+
+    def test_tle_and_omm_sets_propagate_alike(self):
+        element_sets = [
+            load_element_sets(os.path.join(FIXTURES, filename))[0]
+            for filename in ('stations.tle', 'stations.json', 'stations.csv')
+        ]
+        columns = Propagator(element_sets).propagate([REFERENCE_TIME])
+
+        for key in ('latitude', 'longitude', 'altitude'):
+            np.testing.assert_allclose(columns[key][1:, 0], columns[key][0, 0], atol=1e-6)
+
+
+class PropagatorTests(SimpleTestCase):
+    def setUp(self):
+        self.propagator = Propagator(load_element_sets(os.path.join(FIXTURES, 'stations.tle')))
+
+    def test_matches_the_reference_sgp4_state(self):
+        position = self.propagator.positions_at(REFERENCE_TIME, ['25544'])['25544']
+
+        self.assertTrue(position['success'])
+        self.assertEqual(position['timestamp'], REFERENCE_TIME)
+        self.assertAlmostEqual(position['latitude'], -24.661, places=3)
+        self.assertAlmostEqual(position['longitude'], 160.341, places=3)
+        self.assertAlmostEqual(position['altitude'], 420.18, places=2)
+        self.assertAlmostEqual(position['velocity'], REFERENCE_SPEED_KMH, places=1)
+
+        # Geodetic latitude sits just poleward of the geocentric one, and the
+        # altitude is the radius less the ellipsoid's radius there
+        geocentric = math.degrees(math.asin(-2820.313033 / REFERENCE_RADIUS_KM))
+        self.assertTrue(-0.2 < position['latitude'] - geocentric < 0)
+        self.assertAlmostEqual(position['altitude'], REFERENCE_RADIUS_KM - 6374.6, delta=1.0)
+
+    def test_failed_element_sets_yield_nan_and_errors(self):
+        # The decaying object propagates at its epoch but not a day later
+        epoch = self.propagator.element_sets[1].epoch.timestamp()
+        columns = self.propagator.propagate([epoch, epoch + 86400])
+
+        self.assertFalse(np.isnan(columns['latitude'][1, 0]))
+        for key in ('latitude', 'longitude', 'altitude', 'velocity'):
+            self.assertTrue(np.isnan(columns[key][1, 1]))
+            self.assertFalse(np.isnan(columns[key][0, 1]))
+
+        results = self.propagator.positions_at(epoch + 86400, ['25544', 99999, '12345'])
+        self.assertEqual(set(results), {'25544', '99999'})
+        self.assertTrue(results['25544']['success'])
+        self.assertFalse(results['99999']['success'])
+        self.assertIn('SGP4 propagation failed', results['99999']['error'])
+
+
+class GetPropagatorTests(SimpleTestCase):
+    def setUp(self):
+        self.catalog_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.catalog_dir)
+        self.path = os.path.join(self.catalog_dir, 'stations.json')
+
+        patcher = mock.patch.multiple(propagation, _propagator=None, _propagator_mtime=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        settings = override_settings(TRACKER_ELEMENTS_PATH=self.catalog_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def write_catalog(self, text, mtime):
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.utime(self.path, (mtime, mtime))
+
+    def fixture(self):
+        with open(os.path.join(FIXTURES, 'stations.json'), encoding='utf-8') as f:
+            return f.read()
+
+    @mock.patch('builtins.print')
+    def test_keeps_the_previous_propagator_when_the_catalog_is_malformed(self, print_):
+        self.write_catalog(self.fixture(), 1000)
+        loaded = get_propagator()
+        self.assertIn('25544', loaded)
+
+        # Caught halfway through a rewrite
+        self.write_catalog(self.fixture()[:200], 2000)
+        self.assertIs(get_propagator(), loaded)
+        # Reported once, and not retried until the files change again
+        self.assertIs(get_propagator(), loaded)
+        print_.assert_called_once()
+
+        self.write_catalog(self.fixture(), 3000)
+        self.assertIsNot(get_propagator(), loaded)
+
+    @mock.patch('builtins.print')
+    def test_no_propagator_from_a_malformed_first_catalog(self, print_):
+        self.write_catalog('[{"OBJECT_NAME": "ISS', 1000)
+
+        self.assertIsNone(get_propagator())
+        print_.assert_called_once()
+
+
+class PredictPassesTests(SimpleTestCase):
+    def setUp(self):
+        self.element_sets = load_element_sets(os.path.join(FIXTURES, 'stations.tle'))[:1]
+        position = Propagator(self.element_sets).positions_at(REFERENCE_TIME, ['25544'])['25544']
+        self.lat, self.lon = position['latitude'], position['longitude']
+
+    def test_overhead_pass_of_an_observer_under_the_ground_track(self):
+        [passes] = predict_passes(
+            self.element_sets, self.lat, self.lon, REFERENCE_TIME - 3600, REFERENCE_TIME + 3600
+        )
+
+        self.assertEqual(len(passes), 1)
+        [overhead] = passes
+        self.assertLess(overhead['rise'], overhead['culmination'])
+        self.assertLess(overhead['culmination'], overhead['set'])
+        self.assertAlmostEqual(overhead['culmination'], REFERENCE_TIME, delta=5)
+        self.assertGreater(overhead['max_elevation'], 89)
+        # A low earth orbit crosses from 10 degrees to 10 degrees in minutes
+        self.assertTrue(4 * 60 < overhead['set'] - overhead['rise'] < 10 * 60)
+
+    def test_pass_in_progress_at_the_window_start_has_no_rise(self):
+        [passes] = predict_passes(
+            self.element_sets, self.lat, self.lon, REFERENCE_TIME, REFERENCE_TIME + 3600
+        )
+
+        self.assertIsNone(passes[0]['rise'])
+        self.assertIsNotNone(passes[0]['set'])
+
+    def test_higher_minimum_elevation_shortens_the_pass(self):
+        [[low]] = predict_passes(
+            self.element_sets, self.lat, self.lon, REFERENCE_TIME - 3600, REFERENCE_TIME + 3600
+        )
+        [[high]] = predict_passes(
+            self.element_sets, self.lat, self.lon, REFERENCE_TIME - 3600, REFERENCE_TIME + 3600,
+            min_elevation=45.0,
+        )
+
+        self.assertGreater(high['rise'], low['rise'])
+        self.assertLess(high['set'], low['set'])
+
+
+# Passes of the ISS element set above over Sydney (at a pass cell centre)
+# reaching 10 degrees: rise, culmination, set (UTC) and max elevation,
+# matching a search at one second steps
+SYDNEY = (-33.9, 151.2)
+SYDNEY_PASSES = [
+    ('2019-12-09T19:00:07Z', '2019-12-09T19:01:44Z', '2019-12-09T19:03:21Z', 12.75),
+    ('2019-12-09T20:35:29Z', '2019-12-09T20:38:53Z', '2019-12-09T20:42:14Z', 83.15),
+    ('2019-12-10T11:39:19Z', '2019-12-10T11:41:57Z', '2019-12-10T11:44:36Z', 20.90),
+    ('2019-12-10T13:15:28Z', '2019-12-10T13:18:33Z', '2019-12-10T13:21:39Z', 30.68),
+]
+SYDNEY_START = REFERENCE_TIME - 6 * 3600
+
+
+def utc_timestamp(value):
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+
+
+class PassRegressionTests(SimpleTestCase):
+    def setUp(self):
+        self.element_sets = load_element_sets(os.path.join(FIXTURES, 'stations.tle'))[:1]
+
+    def test_sydney_passes_over_a_day(self):
+        [passes] = predict_passes(self.element_sets, *SYDNEY, SYDNEY_START, SYDNEY_START + 86400)
+
+        self.assertEqual(len(passes), len(SYDNEY_PASSES))
+        for satellite_pass, (rise, culmination, set_, max_elevation) in zip(passes, SYDNEY_PASSES):
+            with self.subTest(rise=rise):
+                self.assertAlmostEqual(satellite_pass['rise'], utc_timestamp(rise), delta=1)
+                self.assertAlmostEqual(satellite_pass['culmination'], utc_timestamp(culmination), delta=1)
+                self.assertAlmostEqual(satellite_pass['set'], utc_timestamp(set_), delta=1)
+                self.assertAlmostEqual(satellite_pass['max_elevation'], max_elevation, delta=0.01)
+
+    def test_pinned_passes_match_a_search_at_one_second_steps(self):
+        position, up = observer_vectors(*SYDNEY)
+        satrecs = [self.element_sets[0].satrec]
+        for rise, culmination, set_, max_elevation in SYDNEY_PASSES:
+            times = np.arange(utc_timestamp(rise) - 60, utc_timestamp(set_) + 60)
+            elevation = elevations(satrecs, np.zeros(len(times), dtype=np.int64), times, position, up)
+            visible = times[elevation >= 10]
+            with self.subTest(rise=rise):
+                self.assertAlmostEqual(visible[0], utc_timestamp(rise), delta=1)
+                self.assertAlmostEqual(visible[-1], utc_timestamp(set_), delta=1)
+                self.assertAlmostEqual(times[np.argmax(elevation)], utc_timestamp(culmination), delta=1)
+                self.assertAlmostEqual(elevation.max(), max_elevation, delta=0.01)
+
+
+class PassPredictionViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        user = User.objects.create_user(username='observer')
+        self.client.force_authenticate(user)
+        iss = Satellite(name='ISS', satellite_id='25544', api_url='https://example.com/25544')
+        iss.set_elements(load_element_sets(os.path.join(FIXTURES, 'stations.tle'))[0])
+        iss.save()
+        hubble = Satellite.objects.create(name='Hubble', satellite_id='20580', api_url='https://example.com/20580')
+        for satellite in (iss, hubble):
+            UserSatelliteSelection.objects.create(user=user, satellite=satellite)
+
+    def test_passes_over_the_next_day(self):
+        now = datetime.fromtimestamp(SYDNEY_START, tz=dt_timezone.utc)
+        with mock.patch('django.utils.timezone.now', return_value=now):
+            response = self.client.get('/api/passes/', {'lat': SYDNEY[0], 'lon': SYDNEY[1], 'days': 1})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['without_elements'], ['Hubble'])
+        self.assertEqual(len(response.data['passes']), len(SYDNEY_PASSES))
+        for satellite_pass, (rise, culmination, set_, max_elevation) in zip(response.data['passes'], SYDNEY_PASSES):
+            with self.subTest(rise=rise):
+                self.assertEqual(satellite_pass['satellite'], 'ISS')
+                for key, expected in (('rise', rise), ('culmination', culmination), ('set', set_)):
+                    self.assertAlmostEqual(utc_timestamp(satellite_pass[key]), utc_timestamp(expected), delta=1)
+                self.assertAlmostEqual(satellite_pass['max_elevation'], max_elevation, delta=0.01)
+
+    def test_out_of_range_requests_are_bad_requests(self):
+        for params in ({'lat': 0}, {'lat': 95, 'lon': 0}, {'lat': 0, 'lon': 0, 'days': 30}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/passes/', params).status_code, 400)
+
+
+class SlerpTests(SimpleTestCase):
+    def test_endpoints_and_midpoint_along_the_equator(self):
+        lat, lon = slerp(
+            np.zeros(4), np.zeros(4), np.zeros(4), np.full(4, 90.0), np.array([0.0, 0.5, 1.0, 1.5])
+        )
+
+        np.testing.assert_allclose(lat, 0, atol=1e-9)
+        np.testing.assert_allclose(lon, [0, 45, 90, 135], atol=1e-9)
+
+    def test_follows_the_great_circle_over_the_pole(self):
+        lat, lon = slerp(np.array([60.0]), np.array([0.0]), np.array([60.0]), np.array([180.0]), np.array([0.5]))
+
+        self.assertAlmostEqual(float(lat[0]), 90.0, places=6)
+
+
+class ChooseFixesTests(SimpleTestCase):
+    def setUp(self):
+        self.fixes = to_fixes([(100.0, 0.0, 0.0, 400.0, None), (110.0, 0.0, 1.0, 400.0, None),
+                               (200.0, 0.0, 2.0, 400.0, None)])
+
+    def choose(self, at):
+        return choose_fixes(self.fixes, at, max_gap=30, max_extrapolation=20)
+
+    def test_exact_fix(self):
+        first, second, method = self.choose(110.0)
+
+        self.assertEqual(method, 'fix')
+        self.assertEqual(first['timestamp'], 110.0)
+        self.assertEqual(second['timestamp'], 110.0)
+
+    def test_interpolates_between_close_fixes(self):
+        first, second, method = self.choose(105.0)
+
+        self.assertEqual(method, 'interpolated')
+        self.assertEqual((first['timestamp'], second['timestamp']), (100.0, 110.0))
+
+    def test_refuses_to_bridge_a_wide_gap(self):
+        self.assertIsNone(self.choose(150.0))
+
+    def test_extrapolates_a_short_way_past_close_fixes(self):
+        fixes = self.fixes[:2]
+
+        first, second, method = choose_fixes(fixes, 120.0, max_gap=30, max_extrapolation=20)
+        self.assertEqual(method, 'extrapolated')
+        self.assertEqual((first['timestamp'], second['timestamp']), (100.0, 110.0))
+        self.assertIsNone(choose_fixes(fixes, 140.0, max_gap=30, max_extrapolation=20))
+
+    def test_does_not_extrapolate_from_fixes_too_far_apart(self):
+        self.assertIsNone(self.choose(210.0))
+
+    def test_older_than_every_fix(self):
+        self.assertEqual(self.choose(50.0), 'older')
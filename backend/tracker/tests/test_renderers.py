@@ -0,0 +1,183 @@
+import json
+import math
+from unittest import mock
+
+import msgpack
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+
+from tracker.models import Satellite, UserSatelliteSelection
+from tracker.renderers import BINARY_MAGIC, COLUMN_DTYPES, MessagePackRenderer, encode_positions
+from tracker.ringbuffer import RingBufferStore, fixes_to_columns, to_fixes
+
+
+def decode_positions(data):
+    """
+    Parse the binary layout of tracker.renderers, as a browser would
+    """
+    assert data[:4] == BINARY_MAGIC
+    satellites, fixes, names_length = np.frombuffer(data, dtype='<u4', count=3, offset=4).tolist()
+    counts = np.frombuffer(data, dtype='<u4', count=satellites, offset=16).tolist()
+    offset = 16 + 4 * satellites
+    names = data[offset:offset + names_length].decode().split('\n') if satellites else []
+    offset += names_length
+    offset += -offset % 8
+
+    columns = {}
+    for column, dtype in COLUMN_DTYPES.items():
+        # Typed arrays need aligned offsets
+        assert offset % np.dtype(dtype).itemsize == 0
+        columns[column] = np.frombuffer(data, dtype=dtype, count=fixes, offset=offset)
+        offset += fixes * np.dtype(dtype).itemsize
+    assert offset == len(data)
+
+    result, start = {}, 0
+    for name, count in zip(names, counts):
+        result[name] = {column: values[start:start + count] for column, values in columns.items()}
+        start += count
+    return result
+
+
+ISS_FIXES = to_fixes([
+    (1704067260.0, 51.6, -0.1, 420.5, 27600.0),
+    (1704067200.0, 51.2, -3.8, None, None),
+])
+HUBBLE_FIXES = to_fixes([(1704067230.0, -28.4, 151.2, 535.1, 27300.0)])
+
+
+class BinaryLayoutTests(SimpleTestCase):
+    def test_round_trip_in_name_order(self):
+        data = encode_positions({
+            'ISS': fixes_to_columns(ISS_FIXES), 'Hubble': fixes_to_columns(HUBBLE_FIXES),
+        })
+
+        decoded = decode_positions(data)
+        self.assertEqual(list(decoded), ['Hubble', 'ISS'])
+        iss = decoded['ISS']
+        self.assertEqual(iss['timestamp'].tolist(), [1704067260, 1704067200])
+        np.testing.assert_array_equal(iss['latitude'], np.float32([51.6, 51.2]))
+        self.assertEqual(iss['altitude'][0], np.float32(420.5))
+        self.assertTrue(math.isnan(iss['altitude'][1]) and math.isnan(iss['velocity'][1]))
+        self.assertEqual(decoded['Hubble']['longitude'].tolist(), [np.float32(151.2)])
+
+    def test_header_and_columns_are_little_endian(self):
+        data = encode_positions({'ISS': fixes_to_columns(ISS_FIXES[:1])})
+
+        # Satellite count, fix count, names length, fixes per satellite
+        self.assertEqual(data[:20], b'STP1' + b''.join(n.to_bytes(4, 'little') for n in (1, 1, 3, 1)))
+        # Names padded to 8 bytes, then the timestamp and float32 columns
+        self.assertEqual(data[20:24], b'ISS\x00')
+        self.assertEqual(data[24:32], (1704067260).to_bytes(8, 'little'))
+        self.assertEqual(data[32:36], bytes.fromhex('66664e42'))  # float32 51.6
+        self.assertEqual(len(data), 24 + 8 + 4 * 4)
+
+    def test_columns_are_converted_to_the_wire_dtypes(self):
+        # Big-endian float64 and int32 columns are written in the layout's dtypes
+        columns = {
+            'timestamp': np.array([1704067260], dtype='>i4'),
+            **{column: np.array([1.5], dtype='>f8') for column in ('latitude', 'longitude', 'altitude', 'velocity')},
+        }
+        decoded = decode_positions(encode_positions({'ISS': columns}))['ISS']
+        self.assertEqual(decoded['timestamp'].dtype, np.dtype('<i8'))
+        self.assertEqual(decoded['latitude'].dtype, np.dtype('<f4'))
+        self.assertEqual(decoded['timestamp'].tolist(), [1704067260])
+        self.assertEqual(decoded['velocity'].tolist(), [1.5])
+
+    def test_multibyte_names_keep_the_columns_aligned(self):
+        data = encode_positions({'Ōtautahi-1': fixes_to_columns(HUBBLE_FIXES), 'ISS': fixes_to_columns(ISS_FIXES)})
+        decoded = decode_positions(data)
+        self.assertEqual(list(decoded), ['ISS', 'Ōtautahi-1'])
+        self.assertEqual(decoded['Ōtautahi-1']['timestamp'].tolist(), [1704067230])
+
+    def test_no_satellites(self):
+        data = encode_positions({})
+        self.assertEqual(len(data), 16)
+        self.assertEqual(decode_positions(data), {})
+
+
+class MessagePackTests(SimpleTestCase):
+    def test_round_trip_with_float32_coordinates(self):
+        data = MessagePackRenderer().render({'ISS': fixes_to_columns(ISS_FIXES)})
+
+        iss = msgpack.unpackb(data)['ISS']
+        self.assertEqual(iss['timestamp'], [1704067260, 1704067200])
+        # Packed as single floats: they widen back to the float32 value
+        self.assertEqual(iss['latitude'], [float(np.float32(51.6)), float(np.float32(51.2))])
+        self.assertNotEqual(iss['latitude'][0], 51.6)
+        self.assertTrue(math.isnan(iss['altitude'][1]))
+        self.assertEqual(data[data.index(b'latitude') + 9], 0xca)  # msgpack float32
+
+    def test_numpy_scalars_and_unsupported_values(self):
+        renderer = MessagePackRenderer()
+        self.assertEqual(msgpack.unpackb(renderer.render({'count': np.int64(3)})), {'count': 3})
+        self.assertEqual(renderer.render(None), b'')
+        with self.assertRaises(TypeError):
+            renderer.render({'when': object()})
+
+
+class PositionNegotiationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='observer')
+        self.client.force_authenticate(self.user)
+        store = RingBufferStore(capacity=8)
+        for name, satellite_id, fixes in (('ISS', '25544', ISS_FIXES), ('Hubble', '20580', HUBBLE_FIXES)):
+            satellite = Satellite.objects.create(name=name, satellite_id=satellite_id, api_url=f'https://example.com/{satellite_id}')
+            UserSatelliteSelection.objects.create(user=self.user, satellite=satellite)
+            # Appended oldest first, as the ingest job does
+            store.get(satellite.id).append(fixes[::-1])
+        patcher = mock.patch('tracker.views.ring_buffers', store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get(self, accept=None, **params):
+        headers = {'HTTP_ACCEPT': accept} if accept else {}
+        return self.client.get('/api/positions/', params, **headers)
+
+    def test_msgpack(self):
+        response = self.get('application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        positions = msgpack.unpackb(response.content)
+        self.assertEqual(set(positions), {'ISS', 'Hubble'})
+        self.assertEqual(positions['ISS']['timestamp'], [1704067260, 1704067200])
+
+    def test_binary(self):
+        for response in (self.get('application/vnd.tracker.positions'), self.get(format='bin')):
+            self.assertEqual(response['Content-Type'], 'application/vnd.tracker.positions')
+            decoded = decode_positions(response.content)
+            self.assertEqual(list(decoded), ['Hubble', 'ISS'])
+            self.assertEqual(decoded['ISS']['timestamp'].tolist(), [1704067260, 1704067200])
+            np.testing.assert_array_equal(decoded['Hubble']['altitude'], np.float32([535.1]))
+
+    def test_json_is_the_fallback(self):
+        for accept in (None, '*/*', 'application/json', 'text/csv, */*;q=0.1'):
+            with self.subTest(accept=accept):
+                response = self.get(accept)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                iss = json.loads(response.content)['ISS']
+                self.assertEqual(iss[0]['timestamp'], '2024-01-01T00:01:00+00:00')
+                self.assertEqual(iss[0]['latitude'], 51.6)
+                self.assertIsNone(iss[1]['altitude'])
+
+    def test_unacceptable_media_type(self):
+        self.assertEqual(self.get('text/csv').status_code, 406)
+
+    def test_each_representation_has_its_own_etag(self):
+        etags = {self.get(accept)['ETag'] for accept in ('application/json', 'application/msgpack', 'application/vnd.tracker.positions')}
+        self.assertEqual(len(etags), 3)
+        response = self.get('application/msgpack')
+        self.assertIn('Accept', response['Vary'])
+        response = self.client.get(
+            '/api/positions/', HTTP_ACCEPT='application/msgpack', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_binary_errors_are_json(self):
+        self.client.force_authenticate(None)
+        response = self.get('application/vnd.tracker.positions')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIn('detail', json.loads(response.content))
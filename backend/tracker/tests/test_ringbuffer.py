@@ -0,0 +1,62 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.test import SimpleTestCase, TestCase
+
+from tracker.models import Satellite, SatellitePosition
+from tracker.partitions import insert_positions, list_partitions
+from tracker.ringbuffer import SEQUENCE, PositionRingBuffer, RingBufferStore, TornReadError, to_fixes
+
+
+class PositionRingBufferTests(SimpleTestCase):
+    def setUp(self):
+        self.buffer = PositionRingBuffer(3)
+        self.buffer.append(to_fixes([(float(t), t, -t, 400.0, None) for t in range(5)]))
+
+    def test_keeps_the_newest_fixes(self):
+        self.assertEqual(self.buffer.latest()['timestamp'].tolist(), [4.0, 3.0, 2.0])
+        self.assertEqual(self.buffer.latest(1)['timestamp'].tolist(), [4.0])
+
+    def test_waits_for_a_write_in_progress(self):
+        self.buffer.header[SEQUENCE] += 1
+
+        def finish_write():
+            time.sleep(0.005)
+            self.buffer.header[SEQUENCE] += 1
+
+        writer = threading.Thread(target=finish_write)
+        writer.start()
+        self.assertEqual(len(self.buffer.latest()), 3)
+        writer.join()
+
+    def test_gives_up_on_an_abandoned_write(self):
+        self.buffer.header[SEQUENCE] += 1
+        start = time.monotonic()
+        with self.assertRaises(TornReadError):
+            self.buffer.latest()
+        self.assertLess(time.monotonic() - start, 1)
+
+
+class RingBufferStoreTests(TestCase):
+    def test_abandoned_buffer_is_reloaded_from_the_database(self):
+        list_partitions(refresh=True)
+        satellite = Satellite.objects.create(name='ISS', satellite_id='25544', api_url='https://example.com/25544')
+        start = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+        insert_positions([
+            SatellitePosition(
+                satellite_id=satellite.id, timestamp=start + timedelta(minutes=i),
+                latitude=float(i), longitude=0.0, altitude=None, velocity=None,
+            )
+            for i in range(4)
+        ])
+        store = RingBufferStore(capacity=3)
+        self.assertEqual(len(store.latest([satellite.id])[satellite.id]), 3)
+
+        # A writer died between its two sequence increments, mid-way through
+        buffer = store.get(satellite.id)
+        buffer.header[SEQUENCE] += 1
+        buffer.fixes['latitude'] = -1
+        fixes = store.latest([satellite.id])[satellite.id]
+        self.assertEqual(fixes['latitude'].tolist(), [3.0, 2.0, 1.0])
+        self.assertEqual(buffer.sequence % 2, 0)
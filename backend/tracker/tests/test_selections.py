@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+
+from tracker.cache import get_selected_satellites
+from tracker.models import Satellite, UserSatelliteSelection
+from tracker.selections import update_selections
+
+
+def create_satellites(count):
+    return [
+        Satellite.objects.create(name=f'SAT {i}', satellite_id=str(i), api_url=f'https://example.com/{i}')
+        for i in range(count)
+    ]
+
+
+@override_settings(TRACKER_MAX_SELECTIONS=3)
+class UpdateSelectionsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = User.objects.create_user(username='observer')
+        self.satellites = create_satellites(5)
+        self.ids = [satellite.id for satellite in self.satellites]
+
+    def active_ids(self):
+        return set(
+            UserSatelliteSelection.objects.filter(user=self.user, is_active=True).values_list('satellite_id', flat=True)
+        )
+
+    def test_creates_and_removes_in_constant_queries(self):
+        update_selections(self.user, add=self.ids[:1])
+        # Satellite check, savepoint, locking read, update, upsert, release
+        with self.assertNumQueries(6):
+            created, reactivated, removed = update_selections(self.user, add=self.ids[1:3], remove=self.ids[:1])
+        self.assertEqual((created, reactivated, removed), ({self.ids[1], self.ids[2]}, set(), {self.ids[0]}))
+        self.assertEqual(self.active_ids(), {self.ids[1], self.ids[2]})
+
+    def test_reactivates_an_inactive_selection_in_place(self):
+        selection = UserSatelliteSelection.objects.create(user=self.user, satellite=self.satellites[0], is_active=False)
+
+        created, reactivated, removed = update_selections(self.user, add=self.ids[:1])
+        self.assertEqual((created, reactivated, removed), (set(), {self.ids[0]}, set()))
+        self.assertEqual(UserSatelliteSelection.objects.filter(user=self.user).count(), 1)
+        selection.refresh_from_db()
+        self.assertTrue(selection.is_active)
+
+    def test_adding_an_active_selection_changes_nothing(self):
+        update_selections(self.user, add=self.ids[:1])
+        with mock.patch('tracker.selections.invalidate_selections') as invalidate:
+            self.assertEqual(update_selections(self.user, add=self.ids[:1]), (set(), set(), set()))
+        invalidate.assert_not_called()
+
+    def test_exceeding_the_limit_writes_nothing(self):
+        update_selections(self.user, add=self.ids[:2])
+
+        with self.assertRaisesMessage(serializers.ValidationError, 'Please stop tracking 1 first'):
+            update_selections(self.user, add=self.ids[2:4])
+        self.assertEqual(self.active_ids(), set(self.ids[:2]))
+
+    def test_removals_make_room_within_the_same_update(self):
+        update_selections(self.user, add=self.ids[:3])
+
+        update_selections(self.user, add=self.ids[3:5], remove=self.ids[:2])
+        self.assertEqual(self.active_ids(), set(self.ids[2:5]))
+
+    def test_reactivations_count_towards_the_limit(self):
+        UserSatelliteSelection.objects.create(user=self.user, satellite=self.satellites[0], is_active=False)
+        update_selections(self.user, add=self.ids[1:4])
+
+        with self.assertRaises(serializers.ValidationError):
+            update_selections(self.user, add=self.ids[:1])
+        self.assertFalse(UserSatelliteSelection.objects.get(user=self.user, satellite=self.satellites[0]).is_active)
+
+    def test_unknown_or_inactive_satellites_are_rejected(self):
+        Satellite.objects.filter(id=self.ids[1]).update(is_active=False)
+
+        with self.assertRaisesMessage(serializers.ValidationError, f'Unknown satellites: {self.ids[1]}, 9999'):
+            update_selections(self.user, add=[self.ids[0], self.ids[1], 9999])
+        self.assertEqual(self.active_ids(), set())
+
+    @override_settings(TRACKER_SHARED_CACHE=True)
+    def test_changes_drop_the_cached_selections(self):
+        update_selections(self.user, add=self.ids[:1])
+        self.assertEqual(get_selected_satellites(self.user.id), [(self.ids[0], 'SAT 0')])
+
+        update_selections(self.user, add=self.ids[1:2], remove=self.ids[:1])
+        self.assertEqual(get_selected_satellites(self.user.id), [(self.ids[1], 'SAT 1')])
+
+
+@override_settings(TRACKER_MAX_SELECTIONS=2)
+class SelectionViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='observer', password='secret-password')
+        self.client.force_authenticate(self.user)
+        self.ids = [satellite.id for satellite in create_satellites(3)]
+
+    def test_list_advertises_the_selection_limit(self):
+        response = self.client.get('/api/selections/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Selection-Limit'], '2')
+
+    def test_bulk_update_beyond_the_limit_is_a_bad_request(self):
+        response = self.client.post('/api/selections/bulk/', {'add': self.ids}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(UserSatelliteSelection.objects.filter(user=self.user).exists())
+
+    def test_bulk_update_returns_the_changes_and_selections(self):
+        self.client.post('/api/selections/bulk/', {'add': self.ids[:2]}, format='json')
+
+        response = self.client.post(
+            '/api/selections/bulk/', {'add': self.ids[2:], 'remove': self.ids[:1]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['added'], self.ids[2:])
+        self.assertEqual(response.data['removed'], self.ids[:1])
+        self.assertEqual({selection['satellite'] for selection in response.data['selections']}, set(self.ids[1:]))
+
+    def test_selecting_a_stopped_satellite_again_reactivates_it(self):
+        self.assertEqual(self.client.post('/api/selections/', {'satellite': self.ids[0]}).status_code, 201)
+        selection = UserSatelliteSelection.objects.get(user=self.user)
+        self.client.delete(f'/api/selections/{selection.id}/')
+
+        response = self.client.post('/api/selections/', {'satellite': self.ids[0]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], selection.id)
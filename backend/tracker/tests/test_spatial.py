@@ -0,0 +1,185 @@
+import math
+import random
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from tracker.spatial import EARTH_RADIUS_KM, PositionIndex, split_longitudes
+
+
+MAX_AGE = timedelta(minutes=10)
+# Kilometres per degree of great circle
+DEGREE_KM = EARTH_RADIUS_KM * math.pi / 180
+
+
+def fix(satellite_id, latitude, longitude, altitude=420.0, age=0):
+    return SimpleNamespace(
+        satellite_id=satellite_id, satellite=SimpleNamespace(name=f'SAT {satellite_id}'),
+        latitude=latitude, longitude=longitude, altitude=altitude,
+        timestamp=timezone.now() - timedelta(seconds=age),
+    )
+
+
+def ids(results):
+    return [result['satellite_id'] for result in results]
+
+
+def great_circle_km(lat0, lon0, lat1, lon1):
+    lat0, lon0, lat1, lon1 = map(math.radians, (lat0, lon0, lat1, lon1))
+    cos = math.sin(lat0) * math.sin(lat1) + math.cos(lat0) * math.cos(lat1) * math.cos(lon1 - lon0)
+    return EARTH_RADIUS_KM * math.acos(min(max(cos, -1), 1))
+
+
+class GridCellTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PositionIndex(cell_degrees=10)
+
+    def test_cell_edges_belong_to_the_next_cell(self):
+        self.assertEqual(self.index._cell_of(0, 0), 9 * 36 + 18)
+        self.assertEqual(self.index._cell_of(-0.001, -0.001), 8 * 36 + 17)
+        self.assertEqual(self.index._cell_of(10, 10), 10 * 36 + 19)
+
+    def test_poles_and_antimeridian_stay_on_the_grid(self):
+        self.assertEqual(self.index._cell_of(-90, -180), 0)
+        # The north pole joins the last row, and 180 wraps onto -180
+        self.assertEqual(self.index._cell_of(90, 180), 17 * 36)
+        self.assertEqual(self.index._cell_of(90, 179.999), 17 * 36 + 35)
+
+    def test_uneven_cells_cover_the_globe(self):
+        index = PositionIndex(cell_degrees=7)
+        self.assertEqual((index.rows, index.cols), (26, 52))
+        self.assertEqual(index._cell_of(90, 179.999), index.rows * index.cols - 1)
+
+    def test_moving_fix_leaves_its_old_cell(self):
+        self.index.update([fix(1, 5, 5)])
+        self.index.update([fix(1, 45, 5)])
+        self.assertEqual(ids(self.index.within_bbox(0, 0, 10, 10, MAX_AGE)), [])
+        self.assertEqual(ids(self.index.within_bbox(40, 0, 50, 10, MAX_AGE)), [1])
+
+    def test_older_fix_is_ignored(self):
+        self.index.update([fix(1, 5, 5)])
+        self.index.update([fix(1, 45, 5, age=60)])
+        self.assertEqual(self.index.within_bbox(0, 0, 10, 10, MAX_AGE)[0]['latitude'], 5)
+
+    def test_split_longitudes(self):
+        self.assertEqual(split_longitudes(-10, 10), [(-10, 10)])
+        self.assertEqual(split_longitudes(170, 190), [(170, 180), (-180, -170)])
+        self.assertEqual(split_longitudes(-190, -170), [(170, 180), (-180, -170)])
+        self.assertEqual(split_longitudes(-200, 200), [(-180, 180)])
+
+
+class WithinRadiusTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PositionIndex(cell_degrees=10)
+
+    def test_radius_filter_and_distances(self):
+        self.index.update([fix(1, 0, 0.5), fix(2, 0, 1), fix(3, 0, 1.01), fix(4, 1, 0)])
+        results = self.index.within_radius(0, 0, DEGREE_KM + 0.1, MAX_AGE)
+        self.assertEqual(ids(results)[0], 1)
+        self.assertEqual(set(ids(results)), {1, 2, 4})
+        self.assertAlmostEqual(results[0]['distance_km'], DEGREE_KM / 2, places=3)
+        self.assertAlmostEqual(results[-1]['distance_km'], DEGREE_KM, places=3)
+
+    def test_across_the_antimeridian(self):
+        self.index.update([fix(1, 0, 179.9), fix(2, 0, -179.9), fix(3, 0, 0)])
+        self.assertEqual(set(ids(self.index.within_radius(0, 180, 50, MAX_AGE))), {1, 2})
+        self.assertEqual(set(ids(self.index.within_radius(0, -179.95, 50, MAX_AGE))), {1, 2})
+
+    def test_across_a_pole(self):
+        self.index.update([fix(1, 89.9, 0), fix(2, 89.9, 180), fix(3, 90, 0), fix(4, 80, 90)])
+        results = self.index.within_radius(89.9, 180, 50, MAX_AGE)
+        self.assertEqual(ids(results), [2, 3, 1])
+        self.assertAlmostEqual(results[-1]['distance_km'], 0.2 * DEGREE_KM, places=3)
+
+    def test_stale_fixes_are_left_out(self):
+        self.index.update([fix(1, 0, 0, age=3600)])
+        self.assertEqual(self.index.within_radius(0, 0, 100, MAX_AGE), [])
+
+    def test_matches_a_scan_of_every_fix(self):
+        rng = random.Random(18)
+        points = {
+            satellite_id: (math.degrees(math.asin(rng.uniform(-1, 1))), rng.uniform(-180, 180))
+            for satellite_id in range(2000)
+        }
+        self.index.update([fix(satellite_id, *point) for satellite_id, point in points.items()])
+
+        for _ in range(200):
+            lat, lon = rng.uniform(-90, 90), rng.uniform(-180, 180)
+            radius_km = rng.choice([100, 1000, 3000])
+            expected = {
+                satellite_id for satellite_id, point in points.items()
+                if great_circle_km(lat, lon, *point) <= radius_km
+            }
+            with self.subTest(lat=lat, lon=lon, radius_km=radius_km):
+                self.assertEqual(set(ids(self.index.within_radius(lat, lon, radius_km, MAX_AGE))), expected)
+
+
+class WithinBboxTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PositionIndex(cell_degrees=10)
+
+    def test_edges_are_inclusive(self):
+        self.index.update([fix(1, 10, 10), fix(2, 0, 0), fix(3, 10.001, 10)])
+        self.assertEqual(set(ids(self.index.within_bbox(0, 0, 10, 10, MAX_AGE))), {1, 2})
+
+    def test_box_crossing_the_antimeridian(self):
+        self.index.update([fix(1, 0, 175), fix(2, 0, -175), fix(3, 0, 0), fix(4, 20, 175)])
+        self.assertEqual(set(ids(self.index.within_bbox(-5, 170, 5, -170, MAX_AGE))), {1, 2})
+
+
+class AboveHorizonTests(SimpleTestCase):
+    def setUp(self):
+        self.index = PositionIndex(cell_degrees=10)
+
+    def test_overhead_and_below_the_horizon(self):
+        # A satellite at 420 km sets some 20.3 degrees of arc away
+        self.index.update([fix(1, 0, 0), fix(2, 0, 5), fix(3, 0, 21), fix(4, 0, 1, altitude=None)])
+        results = self.index.above_horizon(0, 0, 0, MAX_AGE)
+        self.assertEqual(ids(results), [1, 2])
+        self.assertAlmostEqual(results[0]['elevation'], 90)
+        self.assertAlmostEqual(results[0]['range_km'], 420)
+        self.assertEqual(ids(self.index.above_horizon(0, 0, 45, MAX_AGE)), [1])
+
+    def test_over_the_antimeridian(self):
+        self.index.update([fix(1, 0, -178)])
+        self.assertEqual(ids(self.index.above_horizon(0, 178, 10, MAX_AGE)), [1])
+
+
+class OverheadViewTests(APITestCase):
+    def setUp(self):
+        self.client.force_authenticate(User.objects.create_user(username='observer'))
+        index = PositionIndex(cell_degrees=10)
+        index._seeded = True
+        index.update([fix(1, 51.5, -0.1), fix(2, 52.5, -0.1), fix(3, -33.9, 151.2)])
+        patcher = mock.patch('tracker.views.position_index', index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_radius_query_lists_nearest_first(self):
+        response = self.client.get('/api/overhead/', {'lat': 51.5, 'lon': -0.1, 'radius_km': 200})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual([satellite['satellite'] for satellite in response.data['satellites']], ['SAT 1', 'SAT 2'])
+
+    def test_bbox_and_horizon_queries(self):
+        response = self.client.get('/api/overhead/', {'bbox': '-40,150,-30,-170'})
+        self.assertEqual(ids(response.data['satellites']), [3])
+        response = self.client.get('/api/overhead/', {'lat': -33.9, 'lon': 151.2, 'horizon': '', 'min_elevation': 80})
+        self.assertEqual(ids(response.data['satellites']), [3])
+
+    def test_invalid_queries_are_bad_requests(self):
+        for params in (
+            {'lat': 0, 'lon': 0},
+            {'lat': 0, 'lon': 0, 'radius_km': 10, 'horizon': ''},
+            {'lat': 91, 'lon': 0, 'radius_km': 10},
+            {'lat': 0, 'lon': 0, 'radius_km': -1},
+            {'lat': 0, 'lon': 0, 'horizon': '', 'min_elevation': 'high'},
+            {'bbox': '10,0,0,10'},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get('/api/overhead/', params).status_code, 400)
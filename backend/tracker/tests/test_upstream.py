@@ -0,0 +1,143 @@
+from unittest import mock
+
+from django.test import SimpleTestCase, override_settings
+
+from tracker.models import Satellite
+from tracker.satellite_service import fetch_over_http
+from tracker.upstream import ResponseCache, cache_ttl, is_host_failure, response_cache, upstream_health
+
+
+def failure(api_url, status=None, **extra):
+    response = {'api_url': api_url, 'success': False, 'error': f"HTTP {status}", **extra}
+    if status is not None:
+        response['status'] = status
+    return response
+
+
+class HostFailureTests(SimpleTestCase):
+    def test_only_host_level_failures_count(self):
+        self.assertTrue(is_host_failure(failure('http://a/', 503)))
+        self.assertTrue(is_host_failure(failure('http://a/', 429)))
+        self.assertTrue(is_host_failure(failure('http://a/')))
+        self.assertFalse(is_host_failure(failure('http://a/', 404)))
+        self.assertFalse(is_host_failure(failure('http://a/', 200)))
+        self.assertFalse(is_host_failure(failure('http://a/', cancelled=True)))
+
+
+class FetchCycleHealthTests(SimpleTestCase):
+    def setUp(self):
+        upstream_health.clear()
+        response_cache.clear()
+        self.addCleanup(upstream_health.clear)
+        self.satellites = [
+            Satellite(id=i, name=f'Sat {i}', satellite_id=str(i), api_url=f'http://upstream.test/{i}')
+            for i in range(1, 6)
+        ]
+
+    def run_cycle(self, responses):
+        with mock.patch('tracker.satellite_service.fetch_urls', return_value=iter(responses)):
+            return list(fetch_over_http(self.satellites))
+
+    def test_failures_count_once_per_host_and_cycle(self):
+        self.run_cycle([failure(satellite.api_url, 503) for satellite in self.satellites])
+        self.assertEqual(upstream_health.status()['upstream.test'][0], 1)
+
+    def test_client_errors_and_deadline_cancellations_do_not_count(self):
+        results = self.run_cycle(
+            [failure(satellite.api_url, 404) for satellite in self.satellites[:3]]
+            + [failure(satellite.api_url, cancelled=True) for satellite in self.satellites[3:]]
+        )
+        self.assertEqual(len(results), 5)
+        self.assertEqual(upstream_health.status(), {})
+
+    def test_a_success_keeps_the_host_healthy_whatever_the_order(self):
+        success = {'api_url': self.satellites[0].api_url, 'success': True, 'data': {}}
+        failures = [failure(satellite.api_url, 500) for satellite in self.satellites[1:]]
+        for responses in ([success, *failures], [*failures, success]):
+            upstream_health.record_failure('upstream.test')
+            response_cache.clear()
+            self.run_cycle(responses)
+            self.assertEqual(upstream_health.status(), {})
+
+    def test_retry_after_is_honoured(self):
+        self.run_cycle([failure(self.satellites[0].api_url, 429, retry_after=120)])
+        failures, retry_in = upstream_health.status()['upstream.test']
+        self.assertEqual(failures, 1)
+        self.assertGreater(retry_in, 100)
+
+
+class ResponseCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.cache = ResponseCache()
+        self.now = 1000.0
+        patcher = mock.patch('tracker.upstream.time.monotonic', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entries_expire_after_their_ttl(self):
+        self.cache.set('http://a/', {'a': 1}, 10)
+        self.cache.set('http://b/', {'b': 1}, 30)
+
+        self.now += 9.9
+        self.assertEqual(self.cache.get('http://a/'), {'a': 1})
+        self.now += 0.1
+        self.assertIsNone(self.cache.get('http://a/'))
+        self.assertEqual(self.cache.get('http://b/'), {'b': 1})
+
+    def test_expired_entries_are_swept_at_most_once_per_ttl(self):
+        for i in range(100):
+            self.cache.set(f'http://a/{i}', {}, 10)
+            self.now += 0.05
+        # Every entry is still stored: the first set swept, the rest did not
+        self.assertEqual(len(self.cache), 100)
+
+        self.now += 10
+        self.cache.set('http://b/', {}, 10)
+        self.assertEqual(len(self.cache), 1)
+
+
+class CacheTtlTests(SimpleTestCase):
+    @override_settings(TRACKER_UPSTREAM_CACHE_TTL=None, TRACKER_POLL_SLOTS=6)
+    def test_one_poll_slot_by_default(self):
+        self.assertEqual(cache_ttl(60), 10)
+        self.assertEqual(cache_ttl(300), 50)
+
+    @override_settings(TRACKER_UPSTREAM_CACHE_TTL=4)
+    def test_fixed_override(self):
+        self.assertEqual(cache_ttl(60), 4)
+
+
+@override_settings(TRACKER_UPSTREAM_CACHE_TTL=None, TRACKER_POLL_SLOTS=6)
+class SharedUpstreamTests(SimpleTestCase):
+    def setUp(self):
+        upstream_health.clear()
+        response_cache.clear()
+        self.addCleanup(response_cache.clear)
+        self.satellites = [
+            Satellite(id=i, name=f'Sat {i}', satellite_id=str(i), api_url='http://upstream.test/batch',
+                      response_format='positions-batch', poll_interval=60)
+            for i in range(1, 4)
+        ]
+        self.data = {'positions': [
+            {'norad_id': str(i), 'latitude': i, 'longitude': -i, 'timestamp': 1700000000} for i in range(1, 4)
+        ]}
+
+    def test_neighbouring_slots_reuse_the_response_until_the_next_run(self):
+        response = {'api_url': 'http://upstream.test/batch', 'success': True, 'data': self.data}
+        now = [1000.0]
+        with mock.patch('tracker.upstream.time.monotonic', side_effect=lambda: now[0]), \
+                mock.patch('tracker.satellite_service.fetch_urls', side_effect=lambda urls, on_idle: iter(
+                    [response] if urls else [])) as fetch_urls:
+            # Slot 0 fetches, and the next slot, 10 s on at most, is served from the cache
+            results = list(fetch_over_http(self.satellites[:1]))
+            now[0] += 9
+            results += list(fetch_over_http(self.satellites[1:2]))
+            self.assertEqual([urls for (urls, on_idle), kwargs in fetch_urls.call_args_list], [
+                ['http://upstream.test/batch'], [],
+            ])
+            self.assertTrue(all(result['success'] for result, satellite in results))
+
+            # Slot 0's next run, at least 50 s on, fetches again
+            now[0] += 41
+            list(fetch_over_http(self.satellites[:1]))
+            self.assertEqual(fetch_urls.call_args_list[-1][0][0], ['http://upstream.test/batch'])
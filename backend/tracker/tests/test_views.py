@@ -0,0 +1,102 @@
+import asyncio
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import override_settings
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tracker.cache import is_user_active
+from tracker.models import Satellite, UserSatelliteSelection
+from tracker.streaming import PositionStreamApp
+
+
+class TimeRangeTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='observer', password='secret-password')
+        self.satellite = Satellite.objects.create(
+            name='ISS', satellite_id='25544', api_url='https://example.com/25544',
+        )
+        UserSatelliteSelection.objects.create(user=self.user, satellite=self.satellite)
+        self.client.force_authenticate(self.user)
+
+    def test_unparseable_end_is_a_bad_request(self):
+        for url, params in (
+            (f'/api/archive/{self.satellite.id}/', {}),
+            ('/api/tracks/', {'satellite': self.satellite.id}),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url, {**params, 'end': 'garbage'})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('ISO 8601', response.json()['error'])
+
+    def test_invalid_start_is_a_bad_request(self):
+        response = self.client.get(f'/api/archive/{self.satellite.id}/', {'start': '2024-13-01T00:00:00Z'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_range_longer_than_allowed_is_a_bad_request(self):
+        response = self.client.get(
+            '/api/tracks/',
+            {'satellite': self.satellite.id, 'start': '2000-01-01T00:00:00Z', 'end': '2024-01-01T00:00:00Z'},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('at most', response.json()['error'])
+
+    def test_end_alone_defaults_to_the_preceding_day(self):
+        response = self.client.get(
+            '/api/tracks/', {'satellite': self.satellite.id, 'end': '2024-01-02T00:00:00+00:00'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['start'], '2024-01-01T00:00:00+00:00')
+
+
+class PositionPollTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='observer', password='secret-password')
+        satellite = Satellite.objects.create(name='ISS', satellite_id='25544', api_url='https://example.com/25544')
+        UserSatelliteSelection.objects.create(user=self.user, satellite=satellite)
+        self.token = str(AccessToken.for_user(self.user))
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.token}')
+
+    @override_settings(TRACKER_SHARED_CACHE=False)
+    def test_repeat_poll_is_answered_without_the_database(self):
+        response = self.client.get('/api/positions/')
+        self.assertEqual(response.status_code, 200)
+
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/positions/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(TRACKER_SHARED_CACHE=False)
+    def test_deactivated_user_is_refused_at_the_next_poll(self):
+        self.assertEqual(self.client.get('/api/positions/').status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+        for url in ('/api/positions/', '/api/positions/at/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response.json()['code'], 'user_inactive')
+
+    def test_deleted_user_is_refused(self):
+        self.assertEqual(self.client.get('/api/positions/').status_code, 200)
+
+        self.user.delete()
+        self.assertEqual(self.client.get('/api/positions/').status_code, 401)
+
+    def test_stream_refuses_deactivated_user(self):
+        self.user.is_active = False
+        self.user.save()
+        # Cached here: the stream's thread cannot read the test transaction
+        self.assertFalse(is_user_active(self.user.id))
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'query_string': f'token={self.token}'.encode()}
+        asyncio.run(PositionStreamApp()(scope, None, send))
+        self.assertEqual(sent[0]['status'], 401)
@@ -0,0 +1,90 @@
+"""
+Level-of-detail rollups of satellite ground tracks.
+
+Every ingested fix is folded into TrackPoint rows at each resolution in
+TRACKER_TRACK_RESOLUTIONS, keeping the first fix of each bucket. A track is then
+read from the finest resolution whose bucket count over the requested span
+fits TRACKER_TRACK_MAX_POINTS, so the payload stays bounded whatever the span.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+
+from .models import TrackPoint
+
+
+def bucket_start(timestamp, resolution):
+    """
+    Return the start of the resolution-second bucket holding timestamp
+    """
+    seconds = int(timestamp.timestamp())
+    return datetime.fromtimestamp(seconds - seconds % resolution, tz=dt_timezone.utc)
+
+
+def build_track_points(positions, model=TrackPoint):
+    """
+    Build the track points for SatellitePosition-like objects at every
+    resolution, one per bucket: the earliest of the positions falling in it
+    """
+    points = {}
+    for position in sorted(positions, key=lambda position: position.timestamp):
+        for resolution in settings.TRACKER_TRACK_RESOLUTIONS:
+            bucket = bucket_start(position.timestamp, resolution)
+            key = (position.satellite_id, resolution, bucket)
+            if key not in points:
+                points[key] = model(
+                    satellite_id=position.satellite_id,
+                    resolution=resolution,
+                    bucket=bucket,
+                    timestamp=position.timestamp,
+                    latitude=position.latitude,
+                    longitude=position.longitude,
+                    altitude=position.altitude,
+                )
+    return list(points.values())
+
+
+def record_positions(positions):
+    """
+    Fold newly ingested positions into the rollups. A bucket keeps its first
+    fix, so later fixes of the same bucket are skipped by the unique constraint.
+    """
+    TrackPoint.objects.bulk_create(build_track_points(positions), ignore_conflicts=True)
+
+
+def choose_resolution(start, end, requested=None):
+    """
+    Return the finest resolution at or above `requested` seconds whose bucket
+    count between start and end fits TRACKER_TRACK_MAX_POINTS
+    """
+    span = (end - start).total_seconds()
+    resolutions = sorted(settings.TRACKER_TRACK_RESOLUTIONS)
+    for resolution in resolutions:
+        if requested is not None and resolution < requested:
+            continue
+        if span / resolution <= settings.TRACKER_TRACK_MAX_POINTS:
+            return resolution
+    return resolutions[-1]
+
+
+def get_track(satellite_id, start, end, resolution):
+    """
+    Return a satellite's track points between start and end as
+    (timestamp, latitude, longitude, altitude) tuples, oldest first
+    """
+    return list(
+        TrackPoint.objects.filter(
+            satellite_id=satellite_id, resolution=resolution,
+            bucket__gte=bucket_start(start, resolution), bucket__lte=end,
+        )
+        .order_by('bucket')
+        .values_list('timestamp', 'latitude', 'longitude', 'altitude')[:settings.TRACKER_TRACK_MAX_POINTS]
+    )
+
+
+def prune_track_points(before):
+    """
+    Delete track points in buckets older than `before`, returning the number removed
+    """
+    deleted, _ = TrackPoint.objects.filter(bucket__lt=before).delete()
+    return deleted
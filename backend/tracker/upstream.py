@@ -0,0 +1,157 @@
+"""
+Health tracking and response caching for upstream position APIs.
+
+Failures are tracked per host, since a dead server takes every URL it serves
+with it. Only failures that say something about the host count: server
+errors, rate limiting and requests that got no answer. Decoded responses are
+cached per api_url for one poll slot, so satellites sharing an upstream are
+fetched once even when they are polled in neighbouring slots.
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.conf import settings
+
+
+class UpstreamHealth:
+    """
+    Consecutive failures per upstream host. Callers record at most one
+    outcome per host and fetch cycle. Each failure backs the host off
+    exponentially (base_delay * 2 ** (failures - 1), capped at max_delay, and
+    never shorter than a Retry-After the host sent). At failure_threshold
+    consecutive failures the circuit opens: once the backoff expires, a single
+    probe request is let through, and the others stay blocked until it answers.
+    """
+
+    def __init__(self, base_delay, max_delay, failure_threshold):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def host(api_url):
+        return urlsplit(api_url).netloc.lower()
+
+    def allow(self, api_url):
+        """
+        Return whether api_url may be requested now
+        """
+        with self._lock:
+            state = self._hosts.get(self.host(api_url))
+            if state is None:
+                return True
+            now = time.monotonic()
+            if now < state['blocked_until']:
+                return False
+            if state['failures'] >= self.failure_threshold:
+                # Half-open: this request is the probe
+                state['blocked_until'] = now + self.base_delay
+            return True
+
+    def record_success(self, host):
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def record_failure(self, host, retry_after=None):
+        """
+        Record a failure of the host, returning how long it is now backed off
+        """
+        with self._lock:
+            state = self._hosts.setdefault(host, {'failures': 0, 'blocked_until': 0.0})
+            state['failures'] += 1
+            delay = min(self.base_delay * 2 ** (state['failures'] - 1), self.max_delay)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            state['blocked_until'] = time.monotonic() + delay
+            return delay
+
+    def clear(self):
+        with self._lock:
+            self._hosts = {}
+
+    def status(self):
+        """
+        Return {host: (consecutive failures, seconds until retried)} for
+        unhealthy hosts
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                host: (state['failures'], max(state['blocked_until'] - now, 0.0))
+                for host, state in self._hosts.items()
+            }
+
+
+def is_host_failure(response):
+    """
+    Whether a failed response counts against its host: a 5xx, a 429, or no
+    response at all. Other 4xx and undecodable bodies concern a single URL,
+    and requests cancelled at the fetch deadline say nothing about the host.
+    """
+    if response.get('cancelled'):
+        return False
+    status = response.get('status')
+    return status is None or status >= 500 or status == 429
+
+
+class ResponseCache:
+    """
+    Decoded upstream responses keyed by api_url, each kept for the ttl it
+    was stored with. Expired entries are dropped when read, and swept out
+    at most once per ttl, so storing a response costs O(1).
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._next_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, api_url):
+        with self._lock:
+            entry = self._entries.get(api_url)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[api_url]
+                return None
+            return data
+
+    def set(self, api_url, data, ttl):
+        now = time.monotonic()
+        with self._lock:
+            if now >= self._next_sweep:
+                self._entries = {url: entry for url, entry in self._entries.items() if entry[0] > now}
+                self._next_sweep = now + ttl
+            self._entries[api_url] = (now + ttl, data)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            self._next_sweep = 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def cache_ttl(poll_interval):
+    """
+    Seconds to cache a response fetched for satellites polled every
+    `poll_interval` seconds: one poll slot, which bridges the neighbouring
+    slots sharing the api_url but is shorter than the gap before the same
+    slot polls again (jitter only delays a slot, by at most its length)
+    """
+    if settings.TRACKER_UPSTREAM_CACHE_TTL is not None:
+        return settings.TRACKER_UPSTREAM_CACHE_TTL
+    return poll_interval / max(settings.TRACKER_POLL_SLOTS, 2)
+
+
+upstream_health = UpstreamHealth(
+    base_delay=settings.TRACKER_UPSTREAM_BACKOFF_BASE,
+    max_delay=settings.TRACKER_UPSTREAM_BACKOFF_MAX,
+    failure_threshold=settings.TRACKER_UPSTREAM_FAILURE_THRESHOLD,
+)
+response_cache = ResponseCache()
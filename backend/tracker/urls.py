@@ -5,7 +5,13 @@ from .views import (
     UserLogoutView,
     SatelliteListView,
     UserSatelliteSelectionView,
-    SatellitePositionView
+    BulkSelectionView,
+    SatellitePositionView,
+    PositionAtView,
+    PositionArchiveView,
+    SatelliteTrackView,
+    OverheadView,
+    PassPredictionView
 )
 
 urlpatterns = [
@@ -14,6 +20,12 @@ urlpatterns = [
     path('logout/', UserLogoutView.as_view(), name='logout'),
     path('satellites/', SatelliteListView.as_view(), name='satellite-list'),
     path('selections/', UserSatelliteSelectionView.as_view(), name='user-selections'),
+    path('selections/bulk/', BulkSelectionView.as_view(), name='user-selections-bulk'),
     path('selections/<int:pk>/', UserSatelliteSelectionView.as_view(), name='user-selection-delete'),
     path('positions/', SatellitePositionView.as_view(), name='satellite-positions'),
+    path('positions/at/', PositionAtView.as_view(), name='satellite-positions-at'),
+    path('archive/<int:satellite_id>/', PositionArchiveView.as_view(), name='position-archive'),
+    path('tracks/', SatelliteTrackView.as_view(), name='satellite-tracks'),
+    path('overhead/', OverheadView.as_view(), name='overhead'),
+    path('passes/', PassPredictionView.as_view(), name='satellite-passes'),
 ]
\ No newline at end of file
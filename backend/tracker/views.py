@@ -1,16 +1,42 @@
+import hashlib
+import hmac
+from datetime import timedelta
+
+import numpy as np
 from rest_framework import generics, status
+from rest_framework.pagination import CursorPagination
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.conf import settings
 from django.contrib.auth import authenticate
-from django.db import IntegrityError
-from .models import Satellite, SatellitePosition, UserSatelliteSelection
+from django.core.cache import cache
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, quote_etag
+from .archive import read_range
+from .authentication import ActiveUserJWTAuthentication
+from .cache import catalog_key, get_selected_satellites, invalidate_selections
+from .db import ReplicaReadMixin
+from .interpolation import positions_at
+from .metrics import registry
+from .renderers import MessagePackRenderer, PositionBinaryRenderer
+from .ringbuffer import fixes_to_columns, fixes_to_dicts, ring_buffers
+from .selections import update_selections
+from .spatial import position_index
+from .tracks import choose_resolution, get_track
+from .models import Satellite, UserSatelliteSelection
 from .serializers import (
     UserRegistrationSerializer,
     SatelliteSerializer,
     SatellitePositionSerializer,
-    UserSatelliteSelectionSerializer
+    UserSatelliteSelectionSerializer,
+    BulkSelectionSerializer
 )
 
 
@@ -85,10 +111,49 @@ class UserLogoutView(APIView):
             return Response({'message': 'Logged out'}, status=status.HTTP_200_OK)
 
 
-class SatelliteListView(generics.ListAPIView):
+class CatalogPagination(CursorPagination):
+    # search_name is not unique ("ISS" and "iss"); the cursor tells tied rows
+    # apart by their offset, which needs a stable order among them
+    ordering = ('search_name', 'id')
+    page_size = settings.TRACKER_CATALOG_PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = settings.TRACKER_CATALOG_MAX_PAGE_SIZE
+
+
+class SatelliteListView(ReplicaReadMixin, generics.ListAPIView):
+    """
+    Active satellites in name order, a cursor page at a time (`next` links
+    to the following page). `search` keeps names starting with it (case
+    insensitive) and `norad_id` (comma separated) those NORAD ids. Pages are
+    cached for TRACKER_CATALOG_CACHE_TIMEOUT seconds.
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = SatelliteSerializer
-    queryset = Satellite.objects.filter(is_active=True)
+    pagination_class = CatalogPagination
+    
+    def get_queryset(self):
+        satellites = Satellite.objects.filter(is_active=True)
+        prefix = self.request.query_params.get('search', '').strip().lower()
+        if prefix:
+            if connection.vendor == 'sqlite':
+                # SQLite's LIKE cannot use the index; an equivalent range can
+                satellites = satellites.filter(
+                    search_name__gte=prefix, search_name__lt=prefix[:-1] + chr(ord(prefix[-1]) + 1)
+                )
+            else:
+                satellites = satellites.filter(search_name__startswith=prefix)
+        norad_ids = [value.strip() for value in self.request.query_params.get('norad_id', '').split(',') if value.strip()]
+        if norad_ids:
+            satellites = satellites.filter(satellite_id__in=norad_ids)
+        return satellites
+    
+    def list(self, request, *args, **kwargs):
+        key = catalog_key(request.build_absolute_uri())
+        data = cache.get(key)
+        if data is None:
+            data = super().list(request, *args, **kwargs).data
+            cache.set(key, data, settings.TRACKER_CATALOG_CACHE_TIMEOUT)
+        return Response(data)
 
 
 class UserSatelliteSelectionView(APIView):
@@ -97,9 +162,11 @@ class UserSatelliteSelectionView(APIView):
     def get(self, request):
         selections = UserSatelliteSelection.objects.filter(
             user=request.user, is_active=True
-        )
+        ).select_related('satellite')
         serializer = UserSatelliteSelectionSerializer(selections, many=True)
-        return Response(serializer.data)
+        response = Response(serializer.data)
+        response['X-Selection-Limit'] = settings.TRACKER_MAX_SELECTIONS
+        return response
     
     def post(self, request):
         serializer = UserSatelliteSelectionSerializer(
@@ -111,50 +178,25 @@ class UserSatelliteSelectionView(APIView):
         # Get the satellite from validated data
         satellite = serializer.validated_data.get('satellite')
         
-        # Check if an active selection already exists
-        existing_selection = UserSatelliteSelection.objects.filter(
-            user=request.user,
-            satellite=satellite,
-            is_active=True
-        ).first()
+        # Creates the selection, or reactivates an earlier one, in one upsert
+        created, reactivated, _ = update_selections(request.user, add=[satellite.id])
+        selection = UserSatelliteSelection.objects.select_related('satellite').get(
+            user=request.user, satellite=satellite
+        )
         
-        if existing_selection:
+        if not (created or reactivated):
             return Response(
                 {
                     'error': 'You have already selected this satellite.',
-                    'selection': UserSatelliteSelectionSerializer(existing_selection).data
+                    'selection': UserSatelliteSelectionSerializer(selection).data
                 },
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if an inactive selection exists and reactivate it
-        inactive_selection = UserSatelliteSelection.objects.filter(
-            user=request.user,
-            satellite=satellite,
-            is_active=False
-        ).first()
-        
-        if inactive_selection:
-            inactive_selection.is_active = True
-            inactive_selection.save()
-            return Response(
-                UserSatelliteSelectionSerializer(inactive_selection).data,
-                status=status.HTTP_200_OK
-            )
-        
-        # Create new selection
-        try:
-            selection = serializer.save(user=request.user)
-            return Response(
-                UserSatelliteSelectionSerializer(selection).data,
-                status=status.HTTP_201_CREATED
-            )
-        except IntegrityError:
-            # Fallback in case of race condition
-            return Response(
-                {'error': 'This satellite is already in your selections.'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return Response(
+            UserSatelliteSelectionSerializer(selection).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
     
     def delete(self, request, pk):
         try:
@@ -163,6 +205,7 @@ class UserSatelliteSelectionView(APIView):
             )
             selection.is_active = False
             selection.save()
+            invalidate_selections(request.user.id)
             return Response(status=status.HTTP_204_NO_CONTENT)
         except UserSatelliteSelection.DoesNotExist:
             return Response(
@@ -170,36 +213,356 @@ class UserSatelliteSelectionView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-class SatellitePositionView(APIView):
+
+class BulkSelectionView(APIView):
+    """
+    Start and stop tracking many satellites in one request:
+    {"add": [satellite ids], "remove": [satellite ids]}. Returns the user's
+    active selections afterwards.
+    """
     permission_classes = [IsAuthenticated]
     
-    def get(self, request):
-        # Get user's active satellite selections
+    def post(self, request):
+        serializer = BulkSelectionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        created, reactivated, removed = update_selections(
+            request.user, add=serializer.validated_data['add'], remove=serializer.validated_data['remove']
+        )
         selections = UserSatelliteSelection.objects.filter(
             user=request.user, is_active=True
         ).select_related('satellite')
+        return Response({
+            'added': sorted(created | reactivated),
+            'removed': sorted(removed),
+            'selections': UserSatelliteSelectionSerializer(selections, many=True).data,
+        })
+
+
+class SatellitePositionView(ReplicaReadMixin, APIView):
+    """
+    Latest fixes of the user's selected satellites, served from the in-memory
+    ring buffers filled by the ingest job. Selections are cached, and the
+    ETag/Last-Modified validators let repeat polls get a 304 without touching
+    the database. The JWT authentication checks the user's cached active flag
+    instead of loading the user row on every poll, and cold buffers are warmed
+    from the read replica.
+    Clients accepting MessagePack or the binary layout of tracker.renderers
+    get columns of epoch seconds and float32 coordinates instead of JSON.
+    """
+    authentication_classes = [ActiveUserJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, MessagePackRenderer, PositionBinaryRenderer]
+    
+    def get(self, request):
+        # Positions are shared per satellite; the selection only grants visibility
+        satellites = get_selected_satellites(request.user.id)
+        latest = ring_buffers.latest(
+            [satellite_id for satellite_id, _ in satellites], settings.TRACKER_LATEST_POSITIONS
+        )
+        
+        # Each representation gets its own ETag
+        columnar = request.accepted_renderer.format in (MessagePackRenderer.format, PositionBinaryRenderer.format)
+        fingerprint = hashlib.md5(request.accepted_renderer.format.encode())
+        last_modified = None
+        for satellite_id, sat_name in satellites:
+            fixes = latest[satellite_id]
+            newest = float(fixes['timestamp'][0]) if len(fixes) else None
+            fingerprint.update(f"{satellite_id}:{sat_name}:{newest}:{len(fixes)};".encode())
+            if newest is not None:
+                last_modified = max(last_modified or newest, newest)
+        etag = quote_etag(fingerprint.hexdigest())
         
-        result = {}
-        
-        # For each selected satellite, get its latest positions
-        for selection in selections:
-            satellite = selection.satellite
-            sat_name = satellite.name
-            
-            # Get latest 10 positions for this satellite
-            positions = SatellitePosition.objects.filter(
-                user=request.user,
-                satellite=satellite
-            ).order_by('-timestamp')[:10]
-            
-            result[sat_name] = []
-            for pos in positions:
-                result[sat_name].append({
-                    'timestamp': pos.timestamp.isoformat(),
-                    'latitude': pos.latitude,
-                    'longitude': pos.longitude,
-                    'altitude': pos.altitude,
-                    'velocity': pos.velocity
-                })
-        
-        return Response(result)
\ No newline at end of file
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+        
+        to_result = fixes_to_columns if columnar else fixes_to_dicts
+        result = {sat_name: to_result(latest[satellite_id]) for satellite_id, sat_name in satellites}
+        response = Response(result)
+        patch_vary_headers(response, ['Accept'])
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class PositionAtView(ReplicaReadMixin, APIView):
+    """
+    Position of each of the user's selected satellites at `at` (ISO 8601,
+    default: now), interpolated along the great circle between the fixes
+    around it, or extrapolated from the two newest fixes. Satellites without
+    fixes close enough map to null.
+    """
+    authentication_classes = [ActiveUserJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            at = parse_datetime(request.query_params['at']) if 'at' in request.query_params else timezone.now()
+        except ValueError:
+            at = None
+        if at is None or timezone.is_naive(at):
+            return Response({'error': 'at must be an ISO 8601 timestamp with a timezone'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        satellites = get_selected_satellites(request.user.id)
+        positions = positions_at([satellite_id for satellite_id, _ in satellites], at)
+        return Response({
+            'timestamp': at.isoformat(),
+            'positions': {sat_name: positions[satellite_id] for satellite_id, sat_name in satellites},
+        })
+
+
+class PositionArchiveView(APIView):
+    """
+    Archived track of one of the user's selected satellites between `start` and
+    `end` (ISO 8601, default: the last 24 hours), returned as parallel columns
+    read straight from the memory-mapped archive.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, satellite_id):
+        satellites = dict(get_selected_satellites(request.user.id))
+        if satellite_id not in satellites:
+            return Response(
+                {'error': 'Satellite not found in your selections'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        try:
+            start, end = parse_time_range(request.query_params, timedelta(days=settings.TRACKER_ARCHIVE_MAX_RANGE_DAYS))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        columns = read_range(satellite_id, start, end)
+        return Response({
+            'satellite': satellites[satellite_id],
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'timestamps': columns['timestamp'].tolist(),
+            'latitude': columns['latitude'].tolist(),
+            'longitude': columns['longitude'].tolist(),
+            'altitude': nan_to_none(columns['altitude']),
+            'velocity': nan_to_none(columns['velocity']),
+        })
+
+
+class SatelliteTrackView(APIView):
+    """
+    Ground track of one of the user's selected satellites between `start` and
+    `end` (ISO 8601, default: the last 24 hours), served from the precomputed
+    rollups. `resolution` (seconds) is a lower bound: a coarser level is used
+    when the finer one would exceed TRACKER_TRACK_MAX_POINTS points. Also
+    served as MessagePack, with float32 coordinates.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer, MessagePackRenderer]
+    
+    def get(self, request):
+        try:
+            satellite_id = int(request.query_params['satellite'])
+        except (KeyError, ValueError):
+            return Response({'error': 'satellite is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        satellites = dict(get_selected_satellites(request.user.id))
+        if satellite_id not in satellites:
+            return Response(
+                {'error': 'Satellite not found in your selections'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        try:
+            start, end = parse_time_range(request.query_params, timedelta(days=settings.TRACKER_TRACK_RETENTION_DAYS))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            requested = int(request.query_params['resolution']) if 'resolution' in request.query_params else None
+        except ValueError:
+            return Response({'error': 'resolution must be a number of seconds'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        resolution = choose_resolution(start, end, requested)
+        points = get_track(satellite_id, start, end, resolution)
+        return Response({
+            'satellite': satellites[satellite_id],
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'resolution': resolution,
+            'timestamps': [int(timestamp.timestamp() * 1000) for timestamp, _, _, _ in points],
+            'latitude': [latitude for _, latitude, _, _ in points],
+            'longitude': [longitude for _, _, longitude, _ in points],
+            'altitude': [altitude for _, _, _, altitude in points],
+        })
+
+
+class OverheadView(APIView):
+    """
+    Satellites currently near an observer at `lat`/`lon`, answered from the
+    in-memory spatial index. Exactly one of:
+    - `radius_km`: sub-satellite point within that great-circle distance
+    - `bbox`: sub-satellite point inside min_lat,min_lon,max_lat,max_lon
+      (min_lon > max_lon crosses the antimeridian)
+    - `horizon`: at least `min_elevation` degrees (default 0) above the
+      observer's horizon
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        params = request.query_params
+        modes = [mode for mode in ('radius_km', 'bbox', 'horizon') if mode in params]
+        if len(modes) != 1:
+            return Response(
+                {'error': 'Exactly one of radius_km, bbox or horizon is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            if modes[0] == 'bbox':
+                min_lat, min_lon, max_lat, max_lon = (float(value) for value in params['bbox'].split(','))
+                points = [(min_lat, min_lon), (max_lat, max_lon)]
+                if min_lat > max_lat:
+                    raise ValueError
+            else:
+                lat, lon = float(params['lat']), float(params['lon'])
+                points = [(lat, lon)]
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'lat and lon, or bbox as min_lat,min_lon,max_lat,max_lon, are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not all(-90 <= lat <= 90 and -180 <= lon <= 180 for lat, lon in points):
+            return Response({'error': 'Coordinates are out of range'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            radius_km = float(params.get('radius_km', 1))
+            min_elevation = float(params.get('min_elevation', 0))
+        except ValueError:
+            return Response({'error': 'radius_km and min_elevation must be numbers'}, status=status.HTTP_400_BAD_REQUEST)
+        if not radius_km > 0 or not 0 <= min_elevation <= 90:
+            return Response(
+                {'error': 'radius_km must be positive and min_elevation between 0 and 90 degrees'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        max_age = timedelta(seconds=settings.TRACKER_SPATIAL_MAX_AGE)
+        position_index.seed(max_age)
+        if modes[0] == 'radius_km':
+            satellites = position_index.within_radius(lat, lon, radius_km, max_age)
+        elif modes[0] == 'bbox':
+            satellites = position_index.within_bbox(min_lat, min_lon, max_lat, max_lon, max_age)
+        else:
+            satellites = position_index.above_horizon(lat, lon, min_elevation, max_age)
+        
+        return Response({'count': len(satellites), 'satellites': satellites})
+
+
+class PassPredictionView(ReplicaReadMixin, APIView):
+    """
+    Upcoming passes of the user's selected satellites (or just `satellite`)
+    over an observer at `lat`/`lon` within the next `days` (default 1), that
+    reach `min_elevation` degrees (default 10). Computed from the satellites'
+    stored orbital elements; satellites without elements are listed apart.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        from .passes import get_passes, to_iso
+        
+        params = request.query_params
+        try:
+            lat, lon = float(params['lat']), float(params['lon'])
+            days = float(params.get('days', 1))
+            min_elevation = float(params.get('min_elevation', 10))
+        except (KeyError, ValueError):
+            return Response(
+                {'error': 'lat and lon are required; days and min_elevation must be numbers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            return Response({'error': 'Coordinates are out of range'}, status=status.HTTP_400_BAD_REQUEST)
+        if not (0 < days <= settings.TRACKER_PASS_MAX_DAYS and 0 <= min_elevation < 90):
+            return Response(
+                {'error': f"days must be at most {settings.TRACKER_PASS_MAX_DAYS} and min_elevation between 0 and 90 degrees"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        selected = dict(get_selected_satellites(request.user.id))
+        if 'satellite' in params:
+            try:
+                satellite_id = int(params['satellite'])
+            except ValueError:
+                satellite_id = None
+            if satellite_id not in selected:
+                return Response(
+                    {'error': 'Satellite not found in your selections'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            selected = {satellite_id: selected[satellite_id]}
+        
+        satellites = list(Satellite.objects.filter(id__in=selected))
+        with_elements = [satellite for satellite in satellites if satellite.elements_epoch is not None]
+        start = timezone.now()
+        end = start + timedelta(days=days)
+        passes = get_passes(with_elements, lat, lon, start, end, min_elevation)
+        
+        results = [
+            {
+                'satellite_id': satellite_id,
+                'satellite': selected[satellite_id],
+                'rise': to_iso(satellite_pass['rise']),
+                'culmination': to_iso(satellite_pass['culmination']),
+                'set': to_iso(satellite_pass['set']),
+                'max_elevation': round(satellite_pass['max_elevation'], 2),
+            }
+            for satellite_id, satellite_passes in passes.items()
+            for satellite_pass in satellite_passes
+        ]
+        results.sort(key=lambda satellite_pass: satellite_pass['culmination'])
+        return Response({
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'passes': results,
+            'without_elements': sorted(
+                selected[satellite.id] for satellite in satellites if satellite.elements_epoch is None
+            ),
+        })
+
+
+def metrics_view(request):
+    """
+    This process's metrics in the Prometheus text format, for scrapers
+    holding TRACKER_METRICS_TOKEN. Not served at all when no token is set.
+    """
+    token = settings.TRACKER_METRICS_TOKEN
+    if not token:
+        raise Http404
+    if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+        return HttpResponse(status=401)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def parse_time_range(params, max_span, default_span=timedelta(days=1)):
+    """
+    Read the `start` and `end` query parameters (ISO 8601 with a timezone),
+    defaulting to the `default_span` up to now. Raises ValueError with a
+    client-facing message when the range is invalid or longer than `max_span`.
+    """
+    try:
+        end = parse_datetime(params['end']) if 'end' in params else timezone.now()
+        start = parse_datetime(params['start']) if 'start' in params else None
+    except ValueError:
+        start = end = None
+    if 'start' not in params and end is not None:
+        start = end - default_span
+    if start is None or end is None or timezone.is_naive(start) or timezone.is_naive(end):
+        raise ValueError('start and end must be ISO 8601 timestamps with a timezone')
+    if end < start or end - start > max_span:
+        raise ValueError(f"The range must be positive and at most {max_span.days} days")
+    return start, end
+
+
+def nan_to_none(values):
+    """
+    Convert a float array to a JSON-safe list, mapping NaN to None
+    """
+    return np.where(np.isnan(values), None, values).tolist()
\ No newline at end of file
@@ -1,24 +1,56 @@
 import { useState, useEffect, useRef } from 'react';
 import { Card, Table, Alert, Badge, Spinner } from 'react-bootstrap';
 import { satelliteAPI } from '../services/api';
+import { estimatePosition } from '../services/interpolation';
+
+const MAX_POSITIONS = 10;
+// Current positions are extrapolated locally from the streamed fixes, so they
+// are redrawn far more often than fixes arrive without any extra requests
+const CURRENT_POSITION_INTERVAL = 1000;
 
 const LiveTracking = ({ refreshTrigger }) => {
   const [positionsData, setPositionsData] = useState({});
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState('');
   const [lastUpdate, setLastUpdate] = useState(null);
+  const [now, setNow] = useState(() => Date.now());
   const intervalRef = useRef(null);
 
+  useEffect(() => {
+    const timer = setInterval(() => setNow(Date.now()), CURRENT_POSITION_INTERVAL);
+    return () => clearInterval(timer);
+  }, []);
+
   useEffect(() => {
     fetchPositions();
-    
-    intervalRef.current = setInterval(() => {
-      fetchPositions();
-    }, 60000);
+
+    // New fixes are pushed by the server; fall back to polling if the stream
+    // is unavailable (e.g. when the backend is not served over ASGI)
+    const source = satelliteAPI.openPositionStream();
+    source.addEventListener('position', (event) => {
+      const update = JSON.parse(event.data);
+      setPositionsData((previous) => ({
+        ...previous,
+        [update.satellite]: [
+          ...update.positions,
+          ...(previous[update.satellite] || []),
+        ].slice(0, MAX_POSITIONS),
+      }));
+      setLastUpdate(new Date());
+    });
+    source.onerror = () => {
+      if (source.readyState === EventSource.CLOSED && !intervalRef.current) {
+        intervalRef.current = setInterval(() => {
+          fetchPositions();
+        }, 60000);
+      }
+    };
 
     return () => {
+      source.close();
       if (intervalRef.current) {
         clearInterval(intervalRef.current);
+        intervalRef.current = null;
       }
     };
   }, [refreshTrigger]);
@@ -26,7 +58,6 @@ const LiveTracking = ({ refreshTrigger }) => {
   const fetchPositions = async () => {
     try {
       const response = await satelliteAPI.getPositions();
-      console.log('API Response:', response.data); // Debug log
       setPositionsData(response.data);
       setLastUpdate(new Date());
       setError('');
@@ -56,8 +87,9 @@ const LiveTracking = ({ refreshTrigger }) => {
   };
 
   const satelliteNames = Object.keys(positionsData);
-  console.log('Satellite Names:', satelliteNames); // Debug log
-  console.log('Positions Data:', positionsData); // Debug log
+  const currentPositions = Object.fromEntries(
+    satelliteNames.map((name) => [name, estimatePosition(positionsData[name], now)])
+  );
 
   if (loading) {
     return (
@@ -105,6 +137,13 @@ const LiveTracking = ({ refreshTrigger }) => {
                 <h5 className="mb-0">
                   🛰️ {satelliteName}
                 </h5>
+                {currentPositions[satelliteName] && (
+                  <small>
+                    Now: {formatCoordinate(currentPositions[satelliteName].latitude)}°,{' '}
+                    {formatCoordinate(currentPositions[satelliteName].longitude)}°{' '}
+                    ({currentPositions[satelliteName].method})
+                  </small>
+                )}
               </Card.Header>
               <Card.Body className="p-0">
                 <div className="table-responsive">
@@ -151,7 +190,7 @@ const LiveTracking = ({ refreshTrigger }) => {
       </div>
 
       <Alert variant="info" className="mt-3">
-        ℹ️ Data automatically refreshes every 60 seconds
+        ℹ️ New positions appear as soon as they are fetched
       </Alert>
     </div>
   );
@@ -4,21 +4,40 @@ import { satelliteAPI } from '../services/api';
 
 const SelectSatellite = ({ onSatelliteSelected, refreshTrigger }) => {
   const [satellites, setSatellites] = useState([]);
+  const [nextPage, setNextPage] = useState(null);
+  const [search, setSearch] = useState('');
   const [selectedSatellites, setSelectedSatellites] = useState([]);
+  const [maxSelections, setMaxSelections] = useState(null);
   const [selectedSatelliteId, setSelectedSatelliteId] = useState('');
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState('');
   const [success, setSuccess] = useState('');
 
   useEffect(() => {
-    fetchSatellites();
     fetchSelectedSatellites();
   }, [refreshTrigger]);
 
-  const fetchSatellites = async () => {
+  // The catalog is paginated; search by name prefix instead of loading it all
+  useEffect(() => {
+    const timer = setTimeout(() => fetchSatellites(search), 300);
+    return () => clearTimeout(timer);
+  }, [search, refreshTrigger]);
+
+  const fetchSatellites = async (prefix) => {
+    try {
+      const response = await satelliteAPI.getAll(prefix.trim() ? { search: prefix.trim() } : {});
+      setSatellites(response.data.results);
+      setNextPage(response.data.next);
+    } catch (err) {
+      setError('Failed to load satellites');
+    }
+  };
+
+  const fetchMoreSatellites = async () => {
     try {
-      const response = await satelliteAPI.getAll();
-      setSatellites(response.data);
+      const response = await satelliteAPI.getPage(nextPage);
+      setSatellites((current) => [...current, ...response.data.results]);
+      setNextPage(response.data.next);
     } catch (err) {
       setError('Failed to load satellites');
     }
@@ -28,6 +47,8 @@ const SelectSatellite = ({ onSatelliteSelected, refreshTrigger }) => {
     try {
       const response = await satelliteAPI.getSelections();
       setSelectedSatellites(response.data);
+      const limit = parseInt(response.headers['x-selection-limit'], 10);
+      setMaxSelections(Number.isNaN(limit) ? null : limit);
     } catch (err) {
       console.error('Failed to load selections:', err);
     }
@@ -54,6 +75,8 @@ const SelectSatellite = ({ onSatelliteSelected, refreshTrigger }) => {
     } catch (err) {
       setError(err.response?.data?.satellite?.[0] || 
                err.response?.data?.non_field_errors?.[0] ||
+               err.response?.data?.[0] ||
+               err.response?.data?.error ||
                'Failed to select satellite');
     } finally {
       setLoading(false);
@@ -71,6 +94,8 @@ const SelectSatellite = ({ onSatelliteSelected, refreshTrigger }) => {
     }
   };
 
+  const atLimit = maxSelections !== null && selectedSatellites.length >= maxSelections;
+
   const getAvailableSatellites = () => {
     const selectedIds = selectedSatellites.map(sel => sel.satellite);
     return satellites.filter(sat => !selectedIds.includes(sat.id));
@@ -94,10 +119,17 @@ const SelectSatellite = ({ onSatelliteSelected, refreshTrigger }) => {
             <Form onSubmit={handleSubmit}>
               <Form.Group className="mb-3">
                 <Form.Label>Available Satellites</Form.Label>
+                <Form.Control
+                  type="search"
+                  placeholder="Search by name"
+                  value={search}
+                  onChange={(e) => setSearch(e.target.value)}
+                  className="mb-2"
+                />
                 <Form.Select
                   value={selectedSatelliteId}
                   onChange={(e) => setSelectedSatelliteId(e.target.value)}
-                  disabled={selectedSatellites.length >= 2}
+                  disabled={atLimit}
                 >
                   <option value="">-- Select a satellite --</option>
                   {satellites.map((sat) => (
@@ -110,9 +142,14 @@ const SelectSatellite = ({ onSatelliteSelected, refreshTrigger }) => {
                     </option>
                   ))}
                 </Form.Select>
-                {selectedSatellites.length >= 2 && (
+                {nextPage && (
+                  <Button variant="link" size="sm" className="px-0" onClick={fetchMoreSatellites}>
+                    Load more satellites
+                  </Button>
+                )}
+                {atLimit && (
                   <Form.Text className="text-danger">
-                    Maximum 2 satellites can be tracked. Please stop tracking one first.
+                    Maximum {maxSelections} satellites can be tracked. Please stop tracking one first.
                   </Form.Text>
                 )}
               </Form.Group>
@@ -120,7 +157,7 @@ const SelectSatellite = ({ onSatelliteSelected, refreshTrigger }) => {
               <Button 
                 variant="primary" 
                 type="submit"
-                disabled={loading || selectedSatellites.length >= 2 || !selectedSatelliteId}
+                disabled={loading || atLimit || !selectedSatelliteId}
                 className="w-100"
               >
                 {loading ? 'Starting Tracking...' : 'Start Tracking'}
@@ -165,7 +202,7 @@ const SelectSatellite = ({ onSatelliteSelected, refreshTrigger }) => {
             )}
             <div className="mt-3 text-center">
               <Badge bg="info">
-                {selectedSatellites.length} / 2 satellites selected
+                {selectedSatellites.length}{maxSelections !== null && ` / ${maxSelections}`} satellites selected
               </Badge>
             </div>
           </Card.Body>
@@ -62,11 +62,18 @@ export const authAPI = {
 };
 
 export const satelliteAPI = {
-  getAll: () => api.get('/satellites/'),
+  getAll: (params = {}) => api.get('/satellites/', { params }),
+  // Follows the `next` link of a catalog page
+  getPage: (url) => api.get(url),
   getSelections: () => api.get('/selections/'),
   selectSatellite: (satelliteId) => api.post('/selections/', { satellite: satelliteId }),
   deselectSatellite: (selectionId) => api.delete(`/selections/${selectionId}/`),
+  updateSelections: (add = [], remove = []) => api.post('/selections/bulk/', { add, remove }),
   getPositions: () => api.get('/positions/'),
+  openPositionStream: () =>
+    new EventSource(
+      `${API_BASE_URL}/stream/positions/?token=${encodeURIComponent(localStorage.getItem('access_token') || '')}`
+    ),
 };
 
 export default api;
\ No newline at end of file
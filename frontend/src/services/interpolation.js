@@ -0,0 +1,59 @@
+// Client-side counterpart of the backend's tracker.interpolation: the current
+// position of a satellite is extrapolated along the great circle through its
+// two newest fixes, at their angular rate, so it can be redrawn every second
+// from the fixes the position stream already delivers.
+
+// Same limits as TRACKER_INTERPOLATION_MAX_GAP and
+// TRACKER_INTERPOLATION_MAX_EXTRAPOLATION (seconds)
+const MAX_GAP = 600;
+const MAX_EXTRAPOLATION = 180;
+
+const toRadians = (degrees) => (degrees * Math.PI) / 180;
+const toDegrees = (radians) => (radians * 180) / Math.PI;
+
+const unitVector = (lat, lon) => {
+  const phi = toRadians(lat);
+  const lambda = toRadians(lon);
+  return [Math.cos(phi) * Math.cos(lambda), Math.cos(phi) * Math.sin(lambda), Math.sin(phi)];
+};
+
+export const slerp = (lat0, lon0, lat1, lon1, fraction) => {
+  const p0 = unitVector(lat0, lon0);
+  const p1 = unitVector(lat1, lon1);
+  const dot = p0[0] * p1[0] + p0[1] * p1[1] + p0[2] * p1[2];
+  const omega = Math.acos(Math.min(Math.max(dot, -1), 1));
+  const sinOmega = Math.sin(omega);
+  // Nearly coincident points: fall back to linear weights
+  const w0 = sinOmega > 1e-12 ? Math.sin((1 - fraction) * omega) / sinOmega : 1 - fraction;
+  const w1 = sinOmega > 1e-12 ? Math.sin(fraction * omega) / sinOmega : fraction;
+  const p = p0.map((value, i) => w0 * value + w1 * p1[i]);
+  const norm = Math.hypot(p[0], p[1], p[2]);
+  return {
+    latitude: toDegrees(Math.asin(Math.min(Math.max(p[2] / norm, -1), 1))),
+    longitude: toDegrees(Math.atan2(p[1], p[0])),
+  };
+};
+
+// Estimated position at `now` (epoch milliseconds) from a satellite's fixes,
+// newest first, or null when the fixes are too far apart or too old
+export const estimatePosition = (fixes, now) => {
+  if (!fixes?.length) {
+    return null;
+  }
+  const [newest, previous] = fixes;
+  const t1 = Date.parse(newest.timestamp);
+  if (now <= t1) {
+    return { latitude: newest.latitude, longitude: newest.longitude, method: 'fix' };
+  }
+  if (!previous) {
+    return null;
+  }
+  const t0 = Date.parse(previous.timestamp);
+  if (t1 <= t0 || t1 - t0 > MAX_GAP * 1000 || now - t1 > MAX_EXTRAPOLATION * 1000) {
+    return null;
+  }
+  const position = slerp(
+    previous.latitude, previous.longitude, newest.latitude, newest.longitude, (now - t0) / (t1 - t0)
+  );
+  return { ...position, method: 'extrapolated' };
+};